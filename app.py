@@ -1,37 +1,177 @@
-from flask import Flask, render_template, jsonify, request
-import tempfile
+from flask import Flask, Request, Response, render_template, jsonify, request, url_for
+import atexit
+import functools
+import io
+import itertools
 import os
-from perception.stt.stt_live import save_wav, transcribe_audio
-from perception.tone.tone_sentiment_live import analyze_tone
-from perception.nlu.nlu_live import nlu_process
-from memory.working_memory import WorkingMemory
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import instrumentation
+from jobs import JobQueueFull, JobRunner
+from perception.perception import PerceptionModule, analyze_transcription
+from perception.batch import AnalysisPool
+from streaming import StreamingServer
+from memory.working_memory import WorkingMemory, session_scope
 from memory.long_term_memory import LongTermMemory
+from memory.registry import MemoryRegistry
+from memory.ingest import IngestionQueue
+from memory.cache import RetrievalCache
+from memory.timeline import RESOLUTIONS, MoodTimeline
+
+class InMemoryRequest(Request):
+    """
+    Keep uploaded files in memory; werkzeug would otherwise spool uploads over 500 KB to disk.
+    """
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return io.BytesIO()
 
 # Initialize Flask application
 app = Flask(__name__)
+app.request_class = InMemoryRequest
+# Bound per-request memory now that uploads are never spooled to disk
+app.config['MAX_CONTENT_LENGTH'] = 25 * 1024 * 1024
+
+# Per-stage latency histograms and counters, served by /metrics
+instrumentation.enable(os.environ.get("METRICS_ENABLED", "1") == "1")
+
+# Spawned NLP workers import this module as __mp_main__ before running their tasks; they
+# only analyze, so the server's pools, queues and stores are built in the server process
+SERVER = __name__ != "__mp_main__"
+
+if SERVER:
+    # Shared perception front end; transcribes with the configured STT backend
+    perception = PerceptionModule()
+
+    # /analyze runs as a job: transcription (network-bound) on a thread pool, tone and NLU
+    # (CPU-bound) on a process pool, memory writes on a small thread pool. NLP_WORKERS=0 runs
+    # NLP on threads instead of processes; so does a process pool that keeps breaking.
+    stt_pool = ThreadPoolExecutor(int(os.environ.get("STT_WORKERS", 16)), thread_name_prefix="stt")
+    NLP_WORKERS = int(os.environ.get("NLP_WORKERS", os.cpu_count() or 1))
+    if NLP_WORKERS > 0:
+        nlp_pool = AnalysisPool(NLP_WORKERS)
+    else:
+        nlp_pool = ThreadPoolExecutor(4, thread_name_prefix="nlp")
+    memory_pool = ThreadPoolExecutor(int(os.environ.get("MEMORY_WORKERS", 4)), thread_name_prefix="memory")
+    jobs = JobRunner(max_pending=int(os.environ.get("ANALYZE_MAX_PENDING", 256)),
+                     ttl=float(os.environ.get("ANALYZE_JOB_TTL_SECONDS", 600)))
+    # Seconds a synchronous /analyze waits before answering 504 with the job id to poll
+    ANALYZE_TIMEOUT = float(os.environ.get("ANALYZE_TIMEOUT_SECONDS", 120))
+
+    # Memory writes are queued and batched in the background instead of on the request path
+    ingest = IngestionQueue()
+
+    # Repeated memory lookups reuse query embeddings and, until the memory is written to, results
+    retrieval_cache = RetrievalCache()
+
+    # Working memory is scoped per (user, session), bounded, and expires idle items; the least
+    # recently used sessions are closed once too many are open
+    wm_registry = MemoryRegistry(
+        factory=lambda key: WorkingMemory(ingest=ingest, cache=retrieval_cache,
+                                          session_id=session_scope(*key),
+                                          capacity=int(os.environ.get("WM_CAPACITY", 200)),
+                                          ttl=float(os.environ.get("WM_TTL_SECONDS", 3600))),
+        capacity=int(os.environ.get("WM_MAX_SESSIONS", 256)),
+    )
+
+    # Open per-user long-term memory stores, shared across requests and evicted LRU
+    ltm_registry = MemoryRegistry(
+        factory=lambda user_id: LongTermMemory(user_id=user_id, ingest=ingest, cache=retrieval_cache,
+                                               shared=os.environ.get("LTM_STORAGE", "directory") == "shared",
+                                               shards=int(os.environ.get("LTM_SHARDS", 16))),
+        capacity=int(os.environ.get("LTM_MAX_OPEN_STORES", 64)),
+    )
 
-# Initialize memory modules for short-term and long-term memory
-wm = WorkingMemory() # Working memory instance
+    # Per-user mood timelines, appended to as analyses are stored and queried by /mood_trend
+    timeline_registry = MemoryRegistry(factory=MoodTimeline,
+                                       capacity=int(os.environ.get("MOOD_TIMELINE_MAX_OPEN", 256)))
 
-# In-memory logs for display in the web interface
-wm_logs = [] # Logs for working memory operations
-ltm_logs = [] # Logs for long-term memory operations
+    def shutdown():
+        """
+        Drop queued analyses, let running memory writes finish, write everything they queued,
+        then close the stores, in that order (atexit alone would close the stores first).
+        """
+        for pool in (stt_pool, nlp_pool):
+            pool.shutdown(wait=False, cancel_futures=True)
+        memory_pool.shutdown(wait=True)
+        ingest.close()
+        for registry in (wm_registry, ltm_registry, timeline_registry):
+            registry.close_all()
+    atexit.register(shutdown)
+
+# In-memory logs for display in the web interface, keeping only the most recent entries
+LOG_LIMIT = int(os.environ.get("MEMORY_LOG_LIMIT", 1000))
+wm_logs = deque(maxlen=LOG_LIMIT) # Logs for working memory operations
+ltm_logs = deque(maxlen=LOG_LIMIT) # Logs for long-term memory operations
+logs_lock = threading.Lock()
+
+def append_log(logs, entry):
+    with logs_lock:
+        logs.append(entry)
+
+def log_page(logs, page=1, page_size=20):
+    """
+    One page of a memory log, newest first; page 1 holds the most recent entries.
+    """
+    start = (page - 1) * page_size
+    with logs_lock:
+        total = len(logs)
+        items = list(itertools.islice(reversed(logs), start, start + page_size))
+    return {"items": items, "page": page, "page_size": page_size, "total": total}
+
+def page_args():
+    # Clamp client-supplied paging so a response never holds more than 100 log entries
+    page = max(1, request.values.get('page', 1, type=int))
+    page_size = min(100, max(1, request.values.get('page_size', 20, type=int)))
+    return page, page_size
 
 # Define the route for the index page
 @app.route('/')
 def index():
     # Render the index.html template
-    return render_template('index.html')
+    return render_template('index.html', ws_port=WS_PORT)
+
+def remember(user_id, session_id, result):
+    """
+    Last step of an /analyze job: store the analysis in the session's working memory and
+    the user's long-term memory. A failed store is logged; the analysis is still returned.
+    """
+    # Store the result in the session's working memory
+    try:
+        with wm_registry.lease((user_id, session_id)) as wm:
+            wm.store(result)
+        append_log(wm_logs, result)
+    except Exception as e:
+        append_log(wm_logs, {"error": f"WM store failed: {str(e)}"})
+
+    # Store the result in long-term memory
+    try:
+        # Borrow the user's already-open store instead of opening it per request
+        with ltm_registry.lease(user_id) as ltm:
+            ltm.store(result, session_id=session_id)
+        append_log(ltm_logs, result)
+    except Exception as e:
+        append_log(ltm_logs, {"error": f"LTM store failed: {str(e)}"})
+
+    # Add the analysis to the user's mood timeline
+    try:
+        with timeline_registry.lease(user_id) as timeline:
+            timeline.append(result)
+    except Exception as e:
+        append_log(ltm_logs, {"error": f"Mood timeline append failed: {str(e)}"})
+    return result
 
 # Define the route for analyzing audio input
 @app.route('/analyze', methods=['POST'])
 def analyze():
     try:
+        # Reading the form parses the multipart upload
+        upload_started = time.perf_counter()
         # Get user_id from the request form data, default to 'default' if not provided
         user_id = request.form.get('user_id', 'default')
-
-        # Initialize long-term memory instance for the specific user
-        ltm = LongTermMemory(user_id=user_id)
+        # Working memory is per session; a user without explicit sessions has one
+        session_id = request.form.get('session_id', user_id)
 
         # Check if audio file is present in the request
         if 'audio' not in request.files:
@@ -40,53 +180,120 @@ def analyze():
         if audio_file.filename == '':
             return jsonify({"error": "No audio file selected"}), 400
 
-        # Save uploaded audio to a temporary WAV file
-        with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as f:
-            filename = f.name
-        audio_file.save(filename)
-
-        # Transcribe the audio file using speech-to-text
-        transcript = transcribe_audio(filename)
-        # Clean up the temporary audio file
-        os.unlink(filename)
-        # Analyze the tone of the transcribed text
-        tone = analyze_tone(transcript)
-        # Process the transcribed text and tone using natural language understanding
-        result = nlu_process(transcript, tone)
-
-        # Store the result in working memory
-        try:
-            wm.store(result, str(len(wm_logs)))
-            wm_logs.append(result)
-        except Exception as e:
-            wm_logs.append({"error": f"WM store failed: {str(e)}"})
+        audio = audio_file.read()
+        upload_seconds = time.perf_counter() - upload_started
+        instrumentation.observe("upload", upload_seconds, upload_started)
+        # trace=1 (query string) adds the timed spans of every stage to the response
+        trace = [("upload", upload_started, upload_seconds)] if request.args.get('trace') == '1' else None
 
-        # Store the result in long-term memory
+        # Transcribe the upload (and extract its pitch) straight from memory, analyze the
+        # transcript, then store the result
         try:
-            ltm.store(str(result), str(len(ltm_logs)))
-            ltm_logs.append(result)
-        except Exception as e:
-            ltm_logs.append({"error": f"LTM store failed: {str(e)}"})
-
-        # Return the analysis results, working memory logs, and long-term memory logs as a JSON response
-        return jsonify({
-            "perception": result,
-            "working_memory": wm_logs,
-            "long_term_memory": ltm_logs
-        })
+            job = jobs.submit([
+                ("transcribing", stt_pool, functools.partial(perception.process_audio_bytes, audio)),
+                ("analyzing", nlp_pool, analyze_transcription),
+                ("storing", memory_pool, functools.partial(remember, user_id, session_id)),
+            ], trace)
+        except JobQueueFull as e:
+            return jsonify({"error": f"Server busy: {str(e)}"}), 503
+
+        # async=1: answer right away; the client polls GET /analyze/<job_id>
+        if request.values.get('async') == '1':
+            location = url_for('analyze_job', job_id=job.id)
+            return jsonify({"job_id": job.id, "status": job.status, "poll": location}), 202, {"Location": location}
+
+        if not job.wait(ANALYZE_TIMEOUT):
+            return jsonify({"error": "Analysis timed out", "job_id": job.id,
+                            "poll": url_for('analyze_job', job_id=job.id)}), 504
+        if job.error is not None:
+            return jsonify({"error": job.error}), 500
+
+        # Return the analysis results and one page of the memory logs as a JSON response
+        page, page_size = page_args()
+        response = {
+            "perception": job.result,
+            "working_memory": log_page(wm_logs, page, page_size),
+            "long_term_memory": log_page(ltm_logs, page, page_size)
+        }
+        if job.trace is not None:
+            response["trace"] = instrumentation.format_trace(job.trace)
+        return jsonify(response)
     except Exception as e:
         # Handle any exceptions and return an error message as a JSON response
         return jsonify({"error": str(e)}), 500
 
+# Define the route for polling an analysis job submitted with async=1
+@app.route('/analyze/<job_id>', methods=['GET'])
+def analyze_job(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown or expired job"}), 404
+    return jsonify(job.to_dict())
+
+# Streamed audio is analyzed chunk by chunk over a WebSocket (see streaming.py), served next
+# to the Flask app on WS_PORT
+WS_PORT = int(os.environ.get("WS_PORT", 8765))
+if SERVER:
+    streaming = StreamingServer(perception, store=remember,
+                                chunk_seconds=float(os.environ.get("STREAM_CHUNK_SECONDS", 2.0)))
+
+# Define a route reporting memory queue and store registry metrics
+@app.route('/memory_stats', methods=['GET'])
+def memory_stats():
+    return jsonify({"ingest": ingest.metrics(), "ltm_registry": ltm_registry.stats(),
+                    "wm_registry": wm_registry.stats(), "retrieval_cache": retrieval_cache.stats(),
+                    "jobs": jobs.stats()})
+
+# Define a route reporting per-stage latency histograms and counters
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    if request.args.get('format') == 'prometheus':
+        return Response(instrumentation.prometheus(), mimetype='text/plain; version=0.0.4')
+    return jsonify(instrumentation.snapshot())
+
+# Define a route reporting how a user's mood trended over a window
+@app.route('/mood_trend', methods=['GET'])
+def mood_trend():
+    """
+    Mood summary and per-bucket series of a user over the last `days` (default 30), or from
+    `since` to `until` (epoch seconds), at `resolution` "day" (default) or "hour". Answered
+    from the user's timeline rollups, without reading their memories.
+    """
+    user_id = request.args.get('user_id', 'default')
+    resolution = request.args.get('resolution', 'day')
+    if resolution not in RESOLUTIONS:
+        return jsonify({"error": f"resolution must be one of {', '.join(RESOLUTIONS)}"}), 400
+    until = request.args.get('until', time.time(), type=float)
+    since = request.args.get('since', until - request.args.get('days', 30, type=float) * 86400, type=float)
+    with timeline_registry.lease(user_id) as timeline:
+        try:
+            buckets = timeline.trend(since, until, resolution)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        summary = timeline.summary(since, until)
+    return jsonify({"user_id": user_id, "since": since, "until": until, "resolution": resolution,
+                    "summary": summary, "buckets": buckets})
+
+# Define a route for paging through the memory logs
+@app.route('/memory_logs', methods=['GET'])
+def memory_logs():
+    page, page_size = page_args()
+    return jsonify({
+        "working_memory": log_page(wm_logs, page, page_size),
+        "long_term_memory": log_page(ltm_logs, page, page_size)
+    })
+
 # Define a route to test the working memory
 @app.route('/test_wm', methods=['GET'])
 def test_wm():
     """
-    Test the working memory by storing and retrieving a value.
+    Test the working memory by storing and retrieving a value in a scratch session.
     """
-    wm.store({"test": "test"}, "1")
-    result = wm.retrieve("test")
-    wm.clear()
+    user_id = request.args.get('user_id', 'default')
+    with wm_registry.lease((user_id, "test_wm")) as wm:
+        wm.store({"test": "test"})
+        result = wm.retrieve("test")
+        wm.clear()
     return jsonify({"result": result})
 
 # Define a route to test the long-term memory
@@ -96,12 +303,17 @@ def test_ltm():
     Test the long-term memory by storing, retrieving, and updating a value.
     """
     user_id = request.args.get('user_id', 'default')
-    ltm = LongTermMemory(user_id=user_id)
-    ltm.store("test", "1")
-    result = ltm.retrieve("test")
-    ltm.update("1", "test2")
-    result2 = ltm.retrieve("test2")
+    with ltm_registry.lease(user_id) as ltm:
+        ltm.store("test", "1")
+        result = ltm.retrieve("test")
+        ltm.update("1", "test2")
+        result2 = ltm.retrieve("test2")
     return jsonify({"result": result, "result2": result2})
 
 if __name__ == '__main__':
-    app.run(debug=True)
+    # The reloader runs this block in a child process too; serve WebSockets from that one only
+    if os.environ.get("FLASK_DEBUG") != "1" or os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        streaming.start(os.environ.get("HOST", "127.0.0.1"), WS_PORT)
+    # Threaded, so a request waiting on its job doesn't hold up others; FLASK_DEBUG=1 for development
+    app.run(host=os.environ.get("HOST", "127.0.0.1"), port=int(os.environ.get("PORT", 5000)),
+            debug=os.environ.get("FLASK_DEBUG") == "1", threaded=True)
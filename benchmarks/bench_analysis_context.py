@@ -0,0 +1,53 @@
+# benchmarks/bench_analysis_context.py
+"""
+Per-utterance CPU cost of tone + NLU with and without a shared AnalysisContext.
+
+"separate" gives every stage its own context, which reproduces the old behaviour of
+tokenizing four times, tagging twice and building TextBlob twice per transcript.
+"shared" is what PerceptionModule.process_text and /analyze do now. Run from the
+repository root:
+
+    python -m benchmarks.bench_analysis_context
+"""
+import time
+
+from perception.analysis import AnalysisContext
+from perception.tone.tone_sentiment_live import analyze_tone, detect_emotions
+from perception.nlu.nlu_live import get_entities, get_roles
+
+TRANSCRIPTS = [
+    "I am feeling happy today.",
+    "I don't know why I feel so anxious when my manager Sarah calls me into meetings at work.",
+    "Honestly I was not sad, I was taken aback and a little angry that nobody in London listened.",
+    "Why does it always feel like everything goes wrong on Mondays?",
+] * 5
+
+def separate(text):
+    # analyze_tone used to tokenize and build TextBlob once more inside detect_emotions
+    analyze_tone(text, ctx=AnalysisContext(text))
+    detect_emotions(text, AnalysisContext(text))
+    return get_entities(text, AnalysisContext(text)), get_roles(text, AnalysisContext(text))
+
+def shared(text):
+    ctx = AnalysisContext(text)
+    analyze_tone(text, ctx=ctx)
+    return get_entities(text, ctx), get_roles(text, ctx)
+
+def cpu_ms_per_utterance(fn, rounds=20):
+    start = time.process_time()
+    for _ in range(rounds):
+        for text in TRANSCRIPTS:
+            fn(text)
+    return (time.process_time() - start) / (rounds * len(TRANSCRIPTS)) * 1000.0
+
+def main():
+    # Warm up lazily loaded models so both runs measure steady-state cost
+    shared(TRANSCRIPTS[0])
+    before = cpu_ms_per_utterance(separate)
+    after = cpu_ms_per_utterance(shared)
+    print(f"separate contexts: {before:.3f} ms CPU/utterance")
+    print(f"shared context:    {after:.3f} ms CPU/utterance")
+    print(f"saving:            {before - after:.3f} ms ({(1 - after / before) * 100:.1f}%)")
+
+if __name__ == "__main__":
+    main()
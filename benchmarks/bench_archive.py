@@ -0,0 +1,77 @@
+# benchmarks/bench_archive.py
+"""
+Export/import throughput and peak Python memory of the paginated archive versus get_all().
+
+For each store size, fills a long-term memory, then measures with tracemalloc: get_all() (the
+whole collection in one call), a paginated export to a gzip JSONL archive, and importing that
+archive into a fresh store. Peak memory of the archive paths should not grow with the store.
+Uses an offline hash embedding; stores are created in a temporary directory. Run from the
+repository root:
+
+    python -m benchmarks.bench_archive [size ...]
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from memory.archive import export_users, import_lines, open_archive
+from memory.long_term_memory import LongTermMemory
+from benchmarks.embeddings import HashEmbeddingFunction
+
+def measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak / 2 ** 20
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10000, 40000]
+    os.chdir(tempfile.mkdtemp(prefix="archive_bench_"))
+    embedding = HashEmbeddingFunction()
+    for size in sizes:
+        user_id = f"bench{size}"
+        ltm = LongTermMemory(user_id)
+        for start in range(0, size, 1000):
+            docs = [f"memory {i} about work and sleep and my family" for i in range(start, min(start + 1000, size))]
+            ltm.put_many([str(i + 1) for i in range(start, start + len(docs))], docs,
+                         [{"timestamp": float(i), "mood": "neutral"} for i in range(start, start + len(docs))],
+                         embedding(docs))
+        ltm.close()
+
+        def get_all():
+            ltm = LongTermMemory(user_id)
+            count = len(ltm.get_all()["ids"])
+            ltm.close()
+            return count
+
+        def export():
+            with open_archive(f"{user_id}.jsonl.gz", "w") as out:
+                return export_users([user_id], out)
+
+        def restore():
+            with open_archive(f"{user_id}.jsonl.gz") as lines:
+                return import_lines(lines, user_id=f"{user_id}_restored")[f"{user_id}_restored"]
+
+        try:
+            _, all_s, all_mb = measure(get_all)
+            all_line = f"{all_s:6.2f} s  peak {all_mb:7.1f} MB"
+        except Exception as e:
+            # Large collections can exceed SQLite's variable limit in a single get()
+            tracemalloc.stop()
+            all_line = f"failed ({e})"
+        exported, export_s, export_mb = measure(export)
+        imported, import_s, import_mb = measure(restore)
+        assert exported == imported == size
+        archive_mb = os.path.getsize(f"{user_id}.jsonl.gz") / 2 ** 20
+        print(f"{size:7d} memories  archive {archive_mb:6.1f} MB")
+        print(f"  get_all(): {all_line}")
+        print(f"  export:    {export_s:6.2f} s  peak {export_mb:7.1f} MB  {size / export_s:8.0f} memories/s")
+        print(f"  import:    {import_s:6.2f} s  peak {import_mb:7.1f} MB  {size / import_s:8.0f} memories/s")
+
+if __name__ == "__main__":
+    main()
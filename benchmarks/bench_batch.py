@@ -0,0 +1,45 @@
+# benchmarks/bench_batch.py
+"""
+Backfill throughput of nlu_process_batch versus per-utterance calls.
+
+Checks that the batched results match the single-call path, then reports utterances/sec
+for increasing worker counts. Run from the repository root:
+
+    python -m benchmarks.bench_batch [n_utterances]
+"""
+import os
+import sys
+import time
+
+from perception.analysis import AnalysisContext
+from perception.tone.tone_sentiment_live import analyze_tone
+from perception.nlu.nlu_live import nlu_process, nlu_process_batch
+from benchmarks.bench_analysis_context import TRANSCRIPTS
+
+def single(texts):
+    results = []
+    for text in texts:
+        ctx = AnalysisContext(text)
+        results.append(nlu_process(text, analyze_tone(text, ctx=ctx), ctx))
+    return results
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    texts = [TRANSCRIPTS[i % len(TRANSCRIPTS)] for i in range(n)]
+
+    start = time.perf_counter()
+    expected = single(texts)
+    elapsed = time.perf_counter() - start
+    print(f"single calls:      {n / elapsed:8.1f} utt/s")
+
+    workers = 1
+    while workers <= (os.cpu_count() or 1):
+        start = time.perf_counter()
+        results = list(nlu_process_batch(texts, workers=workers))
+        elapsed = time.perf_counter() - start
+        assert results == expected, "batched results differ from the single-call path"
+        print(f"batch, {workers:2d} workers: {n / elapsed:8.1f} utt/s")
+        workers *= 2
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+# benchmarks/bench_cold_start.py
+"""
+Cold-start time of `import app` in a fresh interpreter.
+
+Run once on each checkout to compare, e.g. before and after a change:
+
+    python -m benchmarks.bench_cold_start [repo_dir] [runs]
+"""
+import statistics
+import subprocess
+import sys
+import time
+
+def cold_import(repo_dir, module="app"):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", f"import {module}"], cwd=repo_dir, check=True)
+    return time.perf_counter() - start
+
+def main():
+    repo_dir = sys.argv[1] if len(sys.argv) > 1 else "."
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    baseline = statistics.median(cold_import(repo_dir, "sys") for _ in range(runs))
+    timings = [cold_import(repo_dir) for _ in range(runs)]
+    print(f"interpreter start: {baseline * 1000:8.1f} ms (median of {runs})")
+    print(f"import app:        {statistics.median(timings) * 1000:8.1f} ms median, "
+          f"{min(timings) * 1000:.1f} ms min, {max(timings) * 1000:.1f} ms max")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# benchmarks/bench_emotion_matcher.py
+"""
+Per-utterance latency of emotion keyword matching on long transcripts.
+
+Compares the legacy per-keyword scan (``word in tokens`` + ``tokens.index``) with the
+precompiled EmotionMatcher while the lexicon grows. Run from the repository root:
+
+    python -m benchmarks.bench_emotion_matcher
+"""
+import random
+import time
+
+from perception.tone.tone_sentiment_live import EmotionMatcher, emotion_lexicon, negations
+
+def legacy_scan(tokens, lexicon):
+    # The loop detect_emotions used before the matcher was compiled
+    detected = set()
+    for emotion, keywords in lexicon.items():
+        for word in keywords:
+            if word in tokens:
+                word_index = tokens.index(word)
+                window = tokens[max(0, word_index - 3):word_index]
+                detected.add((emotion, any(neg in window for neg in negations)))
+    return detected
+
+def grow_lexicon(size):
+    """
+    Pad the real lexicon with synthetic keywords until it holds `size` entries.
+    """
+    lexicon = {emotion: list(words) for emotion, words in emotion_lexicon.items()}
+    emotions = list(lexicon)
+    total = sum(len(words) for words in lexicon.values())
+    for i in range(max(0, size - total)):
+        lexicon[emotions[i % len(emotions)]].append(f"synthetic{i}")
+    return lexicon
+
+def make_transcript(n_tokens, seed=0):
+    rng = random.Random(seed)
+    vocab = ["i", "feel", "really", "not", "today", "and", "the", "was", "so", "my", "work", "family"]
+    keywords = [w for words in emotion_lexicon.values() for w in words if " " not in w]
+    tokens = []
+    while len(tokens) < n_tokens:
+        tokens.append(rng.choice(keywords) if rng.random() < 0.05 else rng.choice(vocab))
+    return tokens
+
+def timeit(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000.0
+
+def main():
+    print(f"{'lexicon':>8} {'tokens':>7} {'legacy ms':>10} {'matcher ms':>11}")
+    for size in (150, 1500, 15000):
+        lexicon = grow_lexicon(size)
+        matcher = EmotionMatcher(lexicon)
+        for n_tokens in (200, 2000):
+            tokens = make_transcript(n_tokens)
+            repeat = 5 if size * n_tokens > 1_000_000 else 50
+            legacy = timeit(lambda: legacy_scan(tokens, lexicon), repeat)
+            compiled = timeit(lambda: matcher.find(tokens), 200)
+            print(f"{size:>8} {n_tokens:>7} {legacy:>10.3f} {compiled:>11.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,350 @@
+# benchmarks/bench_end_to_end.py
+"""
+End-to-end replay benchmark: multi-user sessions (WAV + transcript per utterance) replayed
+through IntegratedSystem and through POST /analyze, reported as JSON for comparing commits.
+
+For every (concurrency, history) pair, sessions are replayed by `concurrency` client threads,
+each user's utterances in order, in two phases:
+
+- "system": per utterance, PerceptionModule.process_audio_bytes (stub STT + prosody), then
+  IntegratedSystem.process_input and get_context, against memories pre-filled with `history`
+  memories per store.
+- "app": per utterance, a synchronous POST /analyze through the Flask test client, with
+  fresh stores per run and `history` memories pre-filled in each user's long-term memory.
+
+Transcription is a stub returning each WAV's own transcript after --stt-seconds, and memories
+use the offline hash embedding, so only this code is measured. Each phase reports throughput
+and latency percentiles per stage and per utterance ("overall"), plus the instrumentation
+histograms of the internal spans; the report ends with peak RSS. Without --sessions,
+synthetic sessions are generated (and kept with --save). Stores are created in temporary
+directories. Run from the repository root:
+
+    python -m benchmarks.bench_end_to_end [--users 8] [--utterances 10] [--concurrency 1,8]
+        [--history 0,1000] [--stt-seconds 0.2] [--sessions DIR] [--save DIR] [--out report.json]
+        [--compare baseline.json]
+
+Session directories hold one subdirectory per user with <name>.wav (16 kHz mono 16-bit PCM)
+and <name>.txt pairs, replayed in name order.
+"""
+import argparse
+import glob
+import hashlib
+import io
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import instrumentation
+from perception.stt.audio import encode_wav
+from perception.stt.backends import STTBackend, set_default_backend
+from perception.stt.pitch import extract_prosody
+from memory.records import MemoryRecord
+from benchmarks.embeddings import HashEmbeddingFunction
+
+SR = 16000
+PEOPLE = ("my sister", "my manager", "my partner", "an old friend", "my father")
+TOPICS = ("work", "sleep", "exams", "money", "the move", "my health")
+FEELINGS = ("anxious", "hopeful", "tired", "angry", "calm", "sad", "relieved")
+
+class ReplayBackend(STTBackend):
+    """
+    Stub STT returning the transcript recorded for each WAV, after a simulated latency.
+    """
+    name = "replay"
+
+    def __init__(self, transcripts, latency=0.0):
+        self.transcripts = transcripts  # sha1 of the WAV bytes -> transcript
+        self.latency = latency
+
+    def transcribe(self, audio) -> str:
+        if self.latency:
+            time.sleep(self.latency)
+        data = audio if isinstance(audio, bytes) else np.asarray(audio).tobytes()
+        return self.transcripts.get(hashlib.sha1(data).hexdigest(), "")
+
+def synthetic_utterance(rng, seconds):
+    # Voiced speech-like audio: a wandering harmonic tone under a syllable envelope
+    t = np.arange(int(seconds * SR)) / SR
+    f0 = rng.uniform(100, 240) * (1 + 0.1 * np.sin(2 * np.pi * rng.uniform(1, 4) * t))
+    phase = 2 * np.pi * np.cumsum(f0) / SR
+    voiced = sum(np.sin(k * phase) / k for k in range(1, 6))
+    envelope = np.clip(np.sin(2 * np.pi * rng.uniform(3, 5) * t) + 0.3, 0, None)
+    return (np.clip(0.2 * voiced * envelope, -1, 1) * 32767).astype(np.int16)
+
+def synthetic_sessions(n_users, n_utterances, seed=0):
+    """
+    {user_id: [(wav bytes, transcript), ...]} with a few seconds of audio per utterance.
+    """
+    rng = np.random.default_rng(seed)
+    words = random.Random(seed)
+    sessions = {}
+    for u in range(n_users):
+        utterances = []
+        for _ in range(n_utterances):
+            transcript = (f"I talked with {words.choice(PEOPLE)} about {words.choice(TOPICS)} "
+                          f"and I feel {words.choice(FEELINGS)} about it.")
+            seconds = min(8.0, 0.3 * len(transcript.split()))
+            utterances.append((encode_wav(synthetic_utterance(rng, seconds), SR), transcript))
+        sessions[f"user{u}"] = utterances
+    return sessions
+
+def load_sessions(root):
+    sessions = {}
+    for user_dir in sorted(glob.glob(os.path.join(root, "*", ""))):
+        utterances = []
+        for wav in sorted(glob.glob(os.path.join(user_dir, "*.wav"))):
+            with open(wav, "rb") as f:
+                data = f.read()
+            with open(wav[:-4] + ".txt") as f:
+                utterances.append((data, f.read().strip()))
+        sessions[os.path.basename(os.path.dirname(user_dir))] = utterances
+    return sessions
+
+def save_sessions(sessions, root):
+    for user_id, utterances in sessions.items():
+        os.makedirs(os.path.join(root, user_id), exist_ok=True)
+        for i, (data, transcript) in enumerate(utterances):
+            with open(os.path.join(root, user_id, f"{i:04d}.wav"), "wb") as f:
+                f.write(data)
+            with open(os.path.join(root, user_id, f"{i:04d}.txt"), "w") as f:
+                f.write(transcript + "\n")
+
+def stats(latencies, errors, elapsed) -> dict:
+    # Throughput is completions per second of the phase; busy_s is the time spent in the stage
+    result = {"count": len(latencies), "errors": errors,
+              "throughput_per_s": len(latencies) / elapsed if elapsed else None,
+              "busy_s": float(sum(latencies))}
+    if latencies:
+        ms = np.asarray(latencies) * 1000
+        result.update({"mean_ms": float(ms.mean()), "p50_ms": float(np.percentile(ms, 50)),
+                       "p90_ms": float(np.percentile(ms, 90)), "p99_ms": float(np.percentile(ms, 99)),
+                       "max_ms": float(ms.max())})
+    return result
+
+def replay(sessions, concurrency, steps):
+    """
+    Run steps(user_id, wav, transcript, timings) over every utterance, each user's in order, on
+    `concurrency` threads; steps records (stage, seconds) into timings and may raise.
+    Returns per-stage and overall stats, and the first error.
+    """
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    first_error = []
+    lock = threading.Lock()
+
+    def run_session(user_id):
+        for wav, transcript in sessions[user_id]:
+            timings = []
+            start = time.perf_counter()
+            try:
+                steps(user_id, wav, transcript, timings)
+                failed = None
+            except Exception as e:
+                failed = e
+            total = time.perf_counter() - start
+            with lock:
+                for stage, seconds in timings:
+                    if seconds is None:
+                        errors[stage] += 1
+                    else:
+                        latencies[stage].append(seconds)
+                if failed is None:
+                    latencies["overall"].append(total)
+                else:
+                    errors["overall"] += 1
+                    if not first_error:
+                        first_error.append(f"{type(failed).__name__}: {failed}")
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as clients:
+        list(clients.map(run_session, sessions))
+    elapsed = time.perf_counter() - start
+    stages = {stage: stats(latencies[stage], errors[stage], elapsed)
+              for stage in sorted(set(latencies) | set(errors))}
+    return {"elapsed_s": elapsed, "stages": stages, "first_error": first_error[0] if first_error else None}
+
+def timed_step(timings, stage, fn, *args, **kwargs):
+    # A failed step is recorded with no duration and counted as an error of its stage
+    start = time.perf_counter()
+    try:
+        result = fn(*args, **kwargs)
+    except Exception:
+        timings.append((stage, None))
+        raise
+    timings.append((stage, time.perf_counter() - start))
+    return result
+
+def history_batches(n, seed=0):
+    # Past analyses over the last year as (ids, records) batches of up to 1000
+    rng = random.Random(seed)
+    now = time.time()
+    for start in range(0, n, 1000):
+        records = [MemoryRecord(f"Earlier I said {rng.choice(TOPICS)} makes me feel {rng.choice(FEELINGS)}.",
+                                polarity=rng.uniform(-1, 1), compound=rng.uniform(-1, 1),
+                                emotions=[rng.choice(("happy", "sad", "fear", "neutral"))],
+                                timestamp=now - rng.uniform(0, 365 * 86400))
+                   for _ in range(min(1000, n - start))]
+        yield [f"h{start + i}" for i in range(len(records))], records
+
+def fill_history(system, n, seed=0):
+    # Past analyses, written straight to the stores in batches
+    for ids, records in history_batches(n, seed):
+        system.long_term_memory.collection.add(ids=ids, documents=[r.document for r in records],
+                                               metadatas=[r.to_metadata() for r in records])
+    for record in range(min(n, system.working_memory.capacity)):
+        system.working_memory.store({"transcript": f"Earlier today I mentioned {TOPICS[record % len(TOPICS)]}."})
+
+def run_system(sessions, concurrency, history, backend, embedding):
+    from integration import IntegratedSystem
+    os.chdir(tempfile.mkdtemp(prefix="e2e_system_"))
+    system = IntegratedSystem(backend, embedding_function=embedding)
+    fill_history(system, history)
+    query = {transcript: next((t for t in TOPICS if t in transcript), "feel")
+             for utterances in sessions.values() for _, transcript in utterances}
+
+    def steps(user_id, wav, transcript, timings):
+        text, _ = timed_step(timings, "stt", system.perception.process_audio_bytes, wav)
+        timed_step(timings, "process_input", system.process_input, text=text)
+        timed_step(timings, "get_context", system.get_context, query[transcript])
+
+    try:
+        return replay(sessions, concurrency, steps)
+    finally:
+        system.close()
+
+def fill_app_history(app_module, users, n, seed=0):
+    # Past analyses in each user's long-term memory, through the app's own store registry
+    for user_id in users:
+        with app_module.ltm_registry.lease(user_id) as ltm:
+            for ids, records in history_batches(n, seed):
+                ltm.put_many(ids, [r.document for r in records], [r.to_metadata() for r in records])
+
+def run_app(sessions, concurrency, history, app_module):
+    # The app opens stores relative to the working directory: close the previous run's and
+    # start from fresh ones holding only the history
+    for registry in (app_module.wm_registry, app_module.ltm_registry, app_module.timeline_registry):
+        registry.close_all()
+    os.chdir(tempfile.mkdtemp(prefix="e2e_app_"))
+    fill_app_history(app_module, sessions, history)
+    local = threading.local()
+
+    def analyze(user_id, wav):
+        if not hasattr(local, "client"):
+            local.client = app_module.app.test_client()
+        response = local.client.post("/analyze", data={"user_id": user_id, "audio": (io.BytesIO(wav), "utterance.wav")})
+        if response.status_code != 200:
+            raise RuntimeError(f"HTTP {response.status_code}: {response.get_json().get('error')}")
+
+    def steps(user_id, wav, transcript, timings):
+        timed_step(timings, "analyze", analyze, user_id, wav)
+
+    return replay(sessions, concurrency, steps)
+
+def peak_rss_mb() -> dict:
+    # ru_maxrss is in KB on Linux (bytes on macOS); children covers the NLP process pool
+    scale = 1 / (1024 * 1024) if sys.platform == "darwin" else 1 / 1024
+    return {"self": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale,
+            "children": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale}
+
+def commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+def compare(report, baseline):
+    # p50 and throughput of each stage relative to the baseline report
+    print(f"{'run':24s} {'stage':14s} {'p50 ms':>10s} {'base':>10s} {'ratio':>6s} {'tput':>8s} {'base':>8s}", file=sys.stderr)
+    for key, run in report["runs"].items():
+        for phase, result in run.items():
+            base = baseline.get("runs", {}).get(key, {}).get(phase)
+            if base is None:
+                continue
+            for stage, now in result["stages"].items():
+                before = base["stages"].get(stage, {})
+                if "p50_ms" not in now or "p50_ms" not in before:
+                    continue
+                print(f"{key + ' ' + phase:24s} {stage:14s} {now['p50_ms']:10.1f} {before['p50_ms']:10.1f} "
+                      f"{now['p50_ms'] / before['p50_ms']:6.2f} {now['throughput_per_s']:8.1f} "
+                      f"{before['throughput_per_s']:8.1f}", file=sys.stderr)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--users", type=int, default=8, help="synthetic users")
+    parser.add_argument("--utterances", type=int, default=10, help="synthetic utterances per user")
+    parser.add_argument("--concurrency", default="1,8", help="comma-separated client thread counts")
+    parser.add_argument("--history", default="0,1000", help="comma-separated memories per store before replay")
+    parser.add_argument("--stt-seconds", type=float, default=0.2, help="stub transcription latency")
+    parser.add_argument("--phases", default="system,app", help="phases to run")
+    parser.add_argument("--sessions", help="directory of recorded sessions to replay")
+    parser.add_argument("--save", help="write the synthetic sessions here for later replays")
+    parser.add_argument("--out", help="write the JSON report here instead of stdout")
+    parser.add_argument("--compare", help="baseline JSON report to compare against")
+    args = parser.parse_args()
+    concurrencies = [int(c) for c in args.concurrency.split(",")]
+    histories = [int(h) for h in args.history.split(",")]
+    phases = args.phases.split(",")
+    root = os.getcwd()
+
+    sessions = load_sessions(args.sessions) if args.sessions else synthetic_sessions(args.users, args.utterances)
+    if args.save:
+        save_sessions(sessions, args.save)
+    backend = ReplayBackend({hashlib.sha1(wav).hexdigest(): transcript
+                             for utterances in sessions.values() for wav, transcript in utterances},
+                            latency=args.stt_seconds)
+    embedding = HashEmbeddingFunction()
+
+    app_module = None
+    if "app" in phases:
+        # The app resolves the default backend on first use
+        set_default_backend(backend)
+        os.chdir(tempfile.mkdtemp(prefix="e2e_app_"))
+        import app as app_module
+    # librosa compiles its pitch tracker on first use; keep that out of the first run
+    extract_prosody(np.zeros(SR // 2, dtype=np.int16))
+    instrumentation.enable()
+
+    report = {"commit": commit(), "created": time.time(),
+              "config": {"users": len(sessions), "utterances": sum(len(u) for u in sessions.values()),
+                         "concurrency": concurrencies, "history": histories,
+                         "stt_seconds": args.stt_seconds, "phases": phases,
+                         "sessions": args.sessions or "synthetic"},
+              "runs": {}}
+    for concurrency in concurrencies:
+        for history in histories:
+            run = {}
+            if "system" in phases:
+                instrumentation.reset()
+                run["system"] = run_system(sessions, concurrency, history, backend, embedding)
+                run["system"]["spans"] = instrumentation.snapshot()["histograms"]
+            if app_module is not None:
+                instrumentation.reset()
+                run["app"] = run_app(sessions, concurrency, history, app_module)
+                run["app"]["spans"] = instrumentation.snapshot()["histograms"]
+            report["runs"][f"c{concurrency}_h{history}"] = run
+    report["peak_rss_mb"] = peak_rss_mb()
+
+    os.chdir(root)
+    output = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+
+if __name__ == "__main__":
+    main()
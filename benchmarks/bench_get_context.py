@@ -0,0 +1,74 @@
+# benchmarks/bench_get_context.py
+"""
+Context lookup latency: querying working and long-term memory one after the other versus
+fanning out to them in parallel with gather_context.
+
+The hash embedding sleeps for embed_ms per call to stand in for the sentence-transformer
+model, so each source costs roughly one model call plus its vector search. With several
+long-term shards (n_ltm > 1), sequential latency grows with the number of sources while
+parallel latency stays near the slowest one. Stores are created in a temporary directory.
+Run from the repository root:
+
+    python -m benchmarks.bench_get_context [n_lookups] [n_ltm] [embed_ms]
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from memory.context import gather_context, merge_results
+from memory.long_term_memory import LongTermMemory
+from memory.working_memory import WorkingMemory
+from benchmarks.embeddings import HashEmbeddingFunction
+from benchmarks.bench_retrieval_cache import TOPICS, query_pool
+
+def sequential(sources, query, n_results):
+    # What get_context used to do: one retrieve after the other, then merge
+    return merge_results({name: memory.retrieve(query, n_results) for name, memory in sources.items()}, n_results)
+
+def summary(timings):
+    timings = sorted(timings)
+    return (statistics.mean(timings) * 1000, timings[len(timings) // 2] * 1000,
+            timings[int(len(timings) * 0.99)] * 1000)
+
+def main():
+    n_lookups = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    n_ltm = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    embed_ms = float(sys.argv[3]) if len(sys.argv) > 3 else 8.0
+    os.chdir(tempfile.mkdtemp(prefix="get_context_bench_"))
+    embedding = HashEmbeddingFunction(latency=embed_ms / 1000.0)
+
+    sources = {"working_memory": WorkingMemory("bench_context_wm", embedding, session_id="bench")}
+    for i in range(50):
+        sources["working_memory"].store({"transcript": f"just now I mentioned {TOPICS[i % len(TOPICS)]}"})
+    for shard in range(n_ltm):
+        ltm = LongTermMemory(f"bench_context_{shard}", embedding_function=embedding)
+        for start in range(0, 5000, 500):
+            ltm.collection.add(ids=[str(i) for i in range(start, start + 500)],
+                               documents=[f"memory {i} about {TOPICS[i % len(TOPICS)]}" for i in range(start, start + 500)])
+        sources[f"long_term_memory_{shard}"] = ltm
+
+    queries = [query_pool()[i % len(query_pool())] for i in range(n_lookups)]
+    executor = ThreadPoolExecutor(max_workers=len(sources), thread_name_prefix="context")
+    timings = {"sequential": [], "parallel": []}
+    missing = 0
+    for query in queries:
+        start = time.perf_counter()
+        sequential(sources, query, 10)
+        timings["sequential"].append(time.perf_counter() - start)
+        start = time.perf_counter()
+        _, left_out = gather_context(sources, query, 10, deadline=1.0, executor=executor)
+        timings["parallel"].append(time.perf_counter() - start)
+        missing += len(left_out)
+    executor.shutdown()
+
+    print(f"{n_lookups} lookups over {len(sources)} sources, embedding {embed_ms} ms")
+    for name, samples in timings.items():
+        mean, p50, p99 = summary(samples)
+        print(f"{name:10s} mean {mean:7.3f} ms  p50 {p50:7.3f} ms  p99 {p99:7.3f} ms")
+    print(f"sources past the deadline: {missing}")
+
+if __name__ == "__main__":
+    main()
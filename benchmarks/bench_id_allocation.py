@@ -0,0 +1,61 @@
+# benchmarks/bench_id_allocation.py
+"""
+Insert latency as a memory store grows, with the old `len(collection.get()['ids']) + 1`
+id scheme versus the IdAllocator now used by WorkingMemory and LongTermMemory.
+
+Uses an offline hash embedding so the cost measured is the store, not the model. Run from
+the repository root:
+
+    python -m benchmarks.bench_id_allocation [max_memories]
+"""
+import sys
+import time
+
+from memory.working_memory import WorkingMemory
+from benchmarks.embeddings import HashEmbeddingFunction
+
+def legacy_store(memory, text):
+    id = str(len(memory.collection.get()['ids']) + 1)
+    memory.collection.add(documents=[text], ids=[id])
+
+def fill(memory, start, stop, batch=1000):
+    # Bulk-load filler documents so the probes can reach large sizes quickly
+    for first in range(start, stop, batch):
+        count = min(batch, stop - first)
+        memory.collection.add(documents=[f"memory number {first + i} about feeling calm" for i in range(count)],
+                              ids=[memory.ids.allocate() for _ in range(count)])
+
+def run(store, memory, checkpoints, probe=20):
+    """
+    Grow the store to each checkpoint and report the mean latency of the next `probe` inserts.
+    """
+    results = {}
+    count = 0
+    for checkpoint in checkpoints:
+        fill(memory, count, checkpoint)
+        count = max(count, checkpoint)
+        start = time.perf_counter()
+        try:
+            for _ in range(probe):
+                store(memory, f"memory number {count} about feeling calm")
+                count += 1
+        except Exception as e:
+            # The legacy full-collection get() stops working on large stores
+            results[checkpoint] = f"failed: {type(e).__name__}"
+            break
+        results[checkpoint] = (time.perf_counter() - start) / probe * 1000.0
+    return results
+
+def main():
+    limit = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    checkpoints = [n for n in (0, 1_000, 10_000, 100_000) if n <= limit]
+    embedding = HashEmbeddingFunction()
+    legacy = run(legacy_store, WorkingMemory("bench_legacy", embedding), checkpoints)
+    allocated = run(lambda m, text: m.store(text), WorkingMemory("bench_allocator", embedding), checkpoints)
+    print(f"{'size':>8} {'legacy ms/insert':>17} {'allocator ms/insert':>20}")
+    for n in checkpoints:
+        old = legacy.get(n, "-")
+        print(f"{n:>8} {old if isinstance(old, str) else f'{old:.3f}':>17} {allocated[n]:>20.3f}")
+
+if __name__ == "__main__":
+    main()
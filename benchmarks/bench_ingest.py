@@ -0,0 +1,45 @@
+# benchmarks/bench_ingest.py
+"""
+Memory store throughput with synchronous per-call adds versus the write-behind IngestionQueue.
+
+Reports the time the caller spends in store() (what the HTTP response waits for), the total
+time until everything is durable, and the queue metrics. Uses an offline hash embedding.
+Run from the repository root:
+
+    python -m benchmarks.bench_ingest [n_stores]
+"""
+import sys
+import time
+
+from memory.ingest import IngestionQueue
+from memory.working_memory import WorkingMemory
+from benchmarks.embeddings import HashEmbeddingFunction
+
+def run(memory, n, flush):
+    on_path = 0.0
+    start = time.perf_counter()
+    for i in range(n):
+        t = time.perf_counter()
+        memory.store({"transcript": f"utterance {i} about work stress", "emotions": ["fear"]})
+        on_path += time.perf_counter() - t
+    flush()
+    total = time.perf_counter() - start
+    return on_path / n * 1000.0, n / total
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    embedding = HashEmbeddingFunction()
+    sync_latency, sync_rate = run(WorkingMemory("bench_sync", embedding), n, lambda: None)
+
+    ingest = IngestionQueue()
+    queued = WorkingMemory("bench_queued", embedding, ingest=ingest)
+    queue_latency, queue_rate = run(queued, n, queued.flush)
+    ingest.close()
+    assert queued.collection.count() == n
+
+    print(f"per-call add:    {sync_latency:7.3f} ms in store(), {sync_rate:8.1f} stores/s durable")
+    print(f"ingestion queue: {queue_latency:7.3f} ms in store(), {queue_rate:8.1f} stores/s durable")
+    print(f"queue metrics:   {ingest.metrics()}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# benchmarks/bench_ltm_registry.py
+"""
+Per-request cost of getting a user's long-term memory store, with and without the registry.
+
+Simulates /analyze traffic from many distinct users with a skewed (Zipf-like) access
+pattern. "direct" opens LongTermMemory per request as /analyze used to; "registry" borrows
+the handle from a MemoryRegistry. Stores are created in a temporary directory. Run from the
+repository root:
+
+    python -m benchmarks.bench_ltm_registry [n_users] [n_requests] [capacity]
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from memory.long_term_memory import LongTermMemory
+from memory.registry import MemoryRegistry
+
+def request_stream(n_users, n_requests, seed=0):
+    rng = random.Random(seed)
+    weights = [1.0 / (rank + 1) for rank in range(n_users)]
+    return [f"user{i}" for i in rng.choices(range(n_users), weights=weights, k=n_requests)]
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return (statistics.mean(samples) * 1000, samples[len(samples) // 2] * 1000,
+            samples[int(len(samples) * 0.99)] * 1000)
+
+def run_direct(users):
+    timings = []
+    for user_id in users:
+        start = time.perf_counter()
+        ltm = LongTermMemory(user_id=user_id)
+        ltm.collection.count()
+        timings.append(time.perf_counter() - start)
+        ltm.close()
+    return timings
+
+def run_registry(users, capacity):
+    registry = MemoryRegistry(capacity=capacity)
+    timings = []
+    for user_id in users:
+        start = time.perf_counter()
+        with registry.lease(user_id) as ltm:
+            ltm.collection.count()
+        timings.append(time.perf_counter() - start)
+    registry.close_all()
+    return timings, registry.stats()
+
+def main():
+    n_users = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    n_requests = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    capacity = int(sys.argv[3]) if len(sys.argv) > 3 else 256
+    users = request_stream(n_users, n_requests)
+    os.chdir(tempfile.mkdtemp(prefix="ltm_registry_bench_"))
+
+    # Create every store once so both runs measure opening existing stores
+    for user_id in set(users):
+        LongTermMemory(user_id=user_id).close()
+
+    direct = percentiles(run_direct(users))
+    timings, stats = run_registry(users, capacity)
+    cached = percentiles(timings)
+    print(f"{n_requests} requests over {len(set(users))} distinct users, registry capacity {capacity}")
+    print(f"direct:   mean {direct[0]:7.3f} ms  p50 {direct[1]:7.3f} ms  p99 {direct[2]:7.3f} ms")
+    print(f"registry: mean {cached[0]:7.3f} ms  p50 {cached[1]:7.3f} ms  p99 {cached[2]:7.3f} ms  {stats}")
+
+if __name__ == "__main__":
+    main()
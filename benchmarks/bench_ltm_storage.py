@@ -0,0 +1,79 @@
+# benchmarks/bench_ltm_storage.py
+"""
+Scaling of long-term memory storage modes with many users: one store directory per user
+("directory") versus one multi-tenant store with hashed shard collections ("shared").
+
+For each mode, every user's store is opened cold, gets a few memories and answers a query,
+then is closed. A second pass reopens a sample of users to measure warm-process opens.
+Reports per-operation latency, and files and bytes on disk. Uses an offline hash
+embedding; stores are created in a temporary directory. Run from the repository root:
+
+    python -m benchmarks.bench_ltm_storage [n_users] [memories_per_user] [shards]
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from memory.long_term_memory import LongTermMemory
+from benchmarks.embeddings import HashEmbeddingFunction
+
+def summary(samples):
+    samples = sorted(samples)
+    return f"mean {statistics.mean(samples) * 1000:7.2f} ms  p99 {samples[int(len(samples) * 0.99)] * 1000:7.2f} ms"
+
+def disk(root):
+    files = size = 0
+    for path, _, names in os.walk(root):
+        for name in names:
+            files += 1
+            size += os.path.getsize(os.path.join(path, name))
+    return files, size / 2 ** 20
+
+def run(mode, n_users, per_user, shards, embedding):
+    root = tempfile.mkdtemp(prefix=f"ltm_storage_{mode}_")
+    os.chdir(root)
+    options = {"shared": True, "shards": shards} if mode == "shared" else {}
+    timings = {"open": [], "store": [], "query": [], "reopen": []}
+    start = time.perf_counter()
+    for u in range(n_users):
+        user_id = f"user{u}"
+        t = time.perf_counter()
+        ltm = LongTermMemory(user_id, embedding_function=embedding, **options)
+        timings["open"].append(time.perf_counter() - t)
+        for i in range(per_user):
+            t = time.perf_counter()
+            ltm.store({"transcript": f"{user_id} talked about work and sleep, day {i}"})
+            timings["store"].append(time.perf_counter() - t)
+        t = time.perf_counter()
+        results = ltm.retrieve("work and sleep", n_results=3)
+        timings["query"].append(time.perf_counter() - t)
+        # Tenant isolation: only this user's memories come back
+        assert all(document.startswith(user_id + " ") for document in results["documents"][0])
+        ltm.close()
+    total = time.perf_counter() - start
+
+    for u in random.Random(0).sample(range(n_users), min(n_users, 500)):
+        t = time.perf_counter()
+        ltm = LongTermMemory(f"user{u}", embedding_function=embedding, **options)
+        ltm.collection.count()
+        timings["reopen"].append(time.perf_counter() - t)
+        ltm.close()
+
+    files, megabytes = disk(root)
+    print(f"{mode}: {n_users} users x {per_user} memories in {total:.1f} s; {files} files, {megabytes:.1f} MB on disk")
+    for name, samples in timings.items():
+        print(f"  {name:7s} {summary(samples)}")
+
+def main():
+    n_users = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    per_user = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    shards = int(sys.argv[3]) if len(sys.argv) > 3 else 16
+    embedding = HashEmbeddingFunction()
+    for mode in ("shared", "directory"):
+        run(mode, n_users, per_user, shards, embedding)
+
+if __name__ == "__main__":
+    main()
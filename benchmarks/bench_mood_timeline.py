@@ -0,0 +1,83 @@
+# benchmarks/bench_mood_timeline.py
+"""
+Mood trend queries ("last 30 days, per day") from the user's memories versus from their
+MoodTimeline, over growing histories.
+
+The memory path is what answering the question took before: get_all() on the long-term
+store, then averaging sentiment, emotions and pitch per day. The timeline path is summary()
+plus trend(). Histories span a year of analyses. Uses an offline hash embedding and a
+temporary directory. Run from the repository root:
+
+    python -m benchmarks.bench_mood_timeline [max_memories]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+from memory.long_term_memory import LongTermMemory
+from memory.records import MemoryRecord
+from memory.timeline import MoodTimeline
+from benchmarks.embeddings import HashEmbeddingFunction
+from benchmarks.bench_records import synthetic_nlu
+
+def recompute(memory, since, until):
+    # Everything is read back, then windowed and aggregated in Python
+    all_memories = memory.get_all()
+    days = defaultdict(list)
+    for document, metadata in zip(all_memories["documents"], all_memories["metadatas"]):
+        record = MemoryRecord.from_chroma(document, metadata)
+        if since <= record.timestamp < until:
+            days[int(record.timestamp // 86400)].append(record)
+    return {day: (len(records), sum(r.polarity for r in records) / len(records)) for day, records in days.items()}
+
+def timed_ms(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) * 1000 / repeat
+
+def main():
+    largest = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    os.chdir(tempfile.mkdtemp(prefix="timeline_bench_"))
+    rng = random.Random(0)
+    now = time.time()
+    embedding = HashEmbeddingFunction()
+    sizes = [n for n in (1000, 5000, 20000, 100000, 500000) if n <= largest]
+
+    print(f"{'memories':>9s} {'memories ms':>12s} {'timeline ms':>12s} {'append us':>10s} {'open ms':>8s}")
+    for n in sizes:
+        analyses = [(synthetic_nlu(rng, i), now - 365 * 86400 * (1 - i / n)) for i in range(n)]
+        for nlu, _ in analyses:
+            nlu["pitch"] = rng.choice([None, rng.uniform(90, 250)])
+        since, until = now - 30 * 86400, now
+
+        timeline = MoodTimeline(f"user{n}")
+        start = time.perf_counter()
+        for nlu, timestamp in analyses:
+            timeline.append(nlu, timestamp=timestamp)
+        append_us = (time.perf_counter() - start) * 1e6 / n
+        timeline_ms = timed_ms(lambda: (timeline.summary(since, until), timeline.trend(since, until)), 100)
+        timeline.close()
+        start = time.perf_counter()
+        MoodTimeline(f"user{n}").close()
+        open_ms = (time.perf_counter() - start) * 1000
+
+        # Reading everything back only fits memory for the smaller histories
+        memory_ms = float("nan")
+        if n <= 20000:
+            memory = LongTermMemory(f"user{n}", embedding_function=embedding)
+            for start in range(0, n, 1000):
+                batch = analyses[start:start + 1000]
+                records = [MemoryRecord.from_knowledge(nlu, timestamp=timestamp) for nlu, timestamp in batch]
+                memory.collection.add(ids=[str(start + i) for i in range(len(batch))],
+                                      documents=[r.document for r in records],
+                                      metadatas=[r.to_metadata() for r in records])
+            memory_ms = timed_ms(lambda: recompute(memory, since, until), 3)
+            memory.close()
+        print(f"{n:9d} {memory_ms:12.1f} {timeline_ms:12.3f} {append_us:10.1f} {open_ms:8.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# benchmarks/bench_pitch.py
+"""
+Pitch extraction cost on 5s / 60s / 10min clips.
+
+"legacy" is the old path: write the WAV, reload it with librosa and pick the strongest bin
+frame by frame in Python. "prosody" is extract_prosody on the in-memory int16 buffer.
+Run from the repository root:
+
+    python -m benchmarks.bench_pitch
+"""
+import os
+import tempfile
+import time
+import wave
+
+import librosa
+import numpy as np
+
+from perception.stt.pitch import SAMPLE_RATE, extract_prosody
+
+def synthetic_clip(seconds, seed=0):
+    """
+    Gliding 120-220 Hz tone with pauses and noise, as int16 like record_audio returns.
+    """
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    f0 = 170 + 50 * np.sin(2 * np.pi * 0.2 * t)
+    voice = np.sin(2 * np.pi * np.cumsum(f0) / SAMPLE_RATE) * (np.sin(2 * np.pi * 0.3 * t) > -0.3)
+    signal = 0.5 * voice + 0.02 * rng.standard_normal(t.size)
+    return (signal * 32767).astype(np.int16).reshape(-1, 1)
+
+def legacy_pitch(audio):
+    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as f:
+        filename = f.name
+    try:
+        with wave.open(filename, "wb") as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(SAMPLE_RATE)
+            wf.writeframes(audio.tobytes())
+        y, sr = librosa.load(filename, sr=SAMPLE_RATE)
+        pitches, magnitudes = librosa.piptrack(y=y, sr=sr)
+        values = []
+        for i in range(pitches.shape[1]):
+            pitch = pitches[magnitudes[:, i].argmax(), i]
+            if pitch > 0:
+                values.append(pitch)
+        return float(np.mean(values)) if values else None
+    finally:
+        os.unlink(filename)
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main():
+    extract_prosody(synthetic_clip(1))  # JIT/warm librosa once
+    print(f"{'clip':>6} {'legacy ms':>10} {'prosody ms':>11} {'mean Hz':>8} {'voiced':>7}")
+    for label, seconds, repeat in (("5s", 5, 5), ("60s", 60, 3), ("10min", 600, 1)):
+        audio = synthetic_clip(seconds)
+        legacy, legacy_mean = best_of(lambda: legacy_pitch(audio), repeat)
+        fast, prosody = best_of(lambda: extract_prosody(audio), repeat)
+        assert abs(legacy_mean - prosody["mean"]) < 1.0, "prosody mean differs from the legacy path"
+        print(f"{label:>6} {legacy * 1000:>10.1f} {fast * 1000:>11.1f} "
+              f"{prosody['mean']:>8.1f} {prosody['voiced_ratio']:>7.2f}")
+
+if __name__ == "__main__":
+    main()
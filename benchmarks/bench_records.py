@@ -0,0 +1,77 @@
+# benchmarks/bench_records.py
+"""
+Stored size and filtered-query latency of legacy `str(nlu_output)` documents versus
+MemoryRecords (transcript document + metadata).
+
+The filtered query is "negative-mood memories from the last 7 days". Legacy stores have to
+fetch and parse every document (and have no timestamps at all); record stores push the
+filter down to Chroma. Uses an offline hash embedding and a temporary directory. Run from
+the repository root:
+
+    python -m benchmarks.bench_records [n_memories]
+"""
+import ast
+import os
+import random
+import sys
+import tempfile
+import time
+
+from memory.long_term_memory import LongTermMemory
+from benchmarks.embeddings import HashEmbeddingFunction
+
+def synthetic_nlu(rng, i):
+    polarity = rng.uniform(-1, 1)
+    transcript = f"Session note {i}: I talked about my {rng.choice(['job', 'sister', 'sleep', 'exams'])} " \
+                 f"and felt {rng.choice(['tired', 'hopeful', 'angry', 'calm', 'worried'])}."
+    return {
+        "transcript": transcript,
+        "sentiment": {"polarity": polarity, "subjectivity": rng.random(), "compound_score": polarity * 0.9},
+        "emotions": rng.sample(["happy", "sad", "angry", "fear"], 2),
+        "entities": [{"entity": "Sarah", "type": "PERSON"}],
+        "semantic_roles": [{"word": word, "role": "entity"} for word in transcript.split()[:6]],
+    }
+
+def dir_size(path):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    rng = random.Random(0)
+    now = time.time()
+    memories = [(synthetic_nlu(rng, i), now - rng.uniform(0, 60) * 86400) for i in range(n)]
+    os.chdir(tempfile.mkdtemp(prefix="records_bench_"))
+    embedding = HashEmbeddingFunction()
+
+    legacy = LongTermMemory("legacy", embedding_function=embedding)
+    records = LongTermMemory("records", embedding_function=embedding)
+    for start in range(0, n, 500):
+        batch = memories[start:start + 500]
+        ids = [str(start + i) for i in range(len(batch))]
+        legacy.collection.add(ids=ids, documents=[str(nlu) for nlu, _ in batch])
+        for (nlu, timestamp), doc_id in zip(batch, ids):
+            records.store(nlu, doc_id, timestamp=timestamp)
+
+    legacy_docs = sum(len(doc) for doc in legacy.collection.get(include=["documents"])["documents"])
+    record_docs = sum(len(doc) for doc in records.collection.get(include=["documents"])["documents"])
+
+    start = time.perf_counter()
+    parsed = (ast.literal_eval(doc) for doc in legacy.collection.get(include=["documents"])["documents"])
+    legacy_hits = [nlu for nlu in parsed if nlu["sentiment"]["polarity"] < 0]
+    legacy_ms = (time.perf_counter() - start) * 1000.0
+
+    start = time.perf_counter()
+    record_hits = records.find(mood="negative", since=now - 7 * 86400)
+    record_ms = (time.perf_counter() - start) * 1000.0
+    legacy.close()
+    records.close()
+
+    print(f"{n} memories")
+    print(f"embedded text: legacy {legacy_docs / n:7.1f} chars/memory, records {record_docs / n:7.1f} chars/memory")
+    print(f"store on disk: legacy {dir_size('long_term_memory_db_legacy') / 1e6:7.2f} MB, "
+          f"records {dir_size('long_term_memory_db_records') / 1e6:7.2f} MB")
+    print(f"negative, last 7 days: legacy scan+parse {legacy_ms:8.1f} ms ({len(legacy_hits)} hits, no time filter possible), "
+          f"records where-filter {record_ms:8.1f} ms ({len(record_hits['ids'])} hits)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# benchmarks/bench_retrieval_cache.py
+"""
+get_context-style lookups (working memory + long-term memory) with and without the RetrievalCache.
+
+A session repeatedly looks up context for a small, skewed (Zipf-like) pool of queries,
+sometimes with different casing or spacing, while new utterances keep being stored, so some
+cached results are invalidated. The hash embedding sleeps for embed_ms per call to stand in for
+the sentence-transformer model. Stores are created in a temporary directory. Run from the
+repository root:
+
+    python -m benchmarks.bench_retrieval_cache [n_lookups] [write_ratio] [embed_ms]
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from memory.cache import RetrievalCache
+from memory.long_term_memory import LongTermMemory
+from memory.working_memory import WorkingMemory
+from benchmarks.embeddings import HashEmbeddingFunction
+
+TOPICS = ["work", "sleep", "my sister", "money", "the exam", "my dog", "feeling alone", "the move",
+          "my boss", "therapy", "running", "the holidays", "my health", "friends", "the future"]
+
+def query_pool():
+    return [f"{prefix} {topic}" for topic in TOPICS
+            for prefix in ("how do I feel about", "what did I say about", "anything on")]
+
+def workload(n_lookups, write_ratio, seed=0):
+    rng = random.Random(seed)
+    pool = query_pool()
+    weights = [1.0 / (rank + 1) for rank in range(len(pool))]
+    ops = []
+    for i in range(n_lookups):
+        if rng.random() < write_ratio:
+            ops.append(("store", f"today I talked about {rng.choice(TOPICS)} again"))
+        query = rng.choices(pool, weights=weights)[0]
+        # Same lookup, typed differently
+        if rng.random() < 0.2:
+            query = "  " + query.upper() + " "
+        ops.append(("lookup", query))
+    return ops
+
+def run(ops, embedding, cache):
+    wm = WorkingMemory("bench_cache_wm", embedding, session_id=f"bench{id(cache)}", cache=cache)
+    ltm = LongTermMemory("bench_cache", embedding_function=embedding, cache=cache)
+    timings = []
+    for op, text in ops:
+        if op == "store":
+            wm.store({"transcript": text})
+            ltm.store({"transcript": text})
+            continue
+        start = time.perf_counter()
+        wm.retrieve(text)
+        ltm.retrieve(text)
+        timings.append(time.perf_counter() - start)
+    wm.close()
+    ltm.close()
+    return timings
+
+def summary(timings):
+    timings = sorted(timings)
+    return (statistics.mean(timings) * 1000, timings[len(timings) // 2] * 1000,
+            timings[int(len(timings) * 0.99)] * 1000)
+
+def main():
+    n_lookups = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    write_ratio = float(sys.argv[2]) if len(sys.argv) > 2 else 0.05
+    embed_ms = float(sys.argv[3]) if len(sys.argv) > 3 else 8.0
+    os.chdir(tempfile.mkdtemp(prefix="retrieval_cache_bench_"))
+    embedding = HashEmbeddingFunction(latency=embed_ms / 1000.0)
+
+    # Give long-term memory some history to search
+    ltm = LongTermMemory("bench_cache", embedding_function=HashEmbeddingFunction())
+    for start in range(0, 5000, 500):
+        ltm.collection.add(ids=[str(i) for i in range(start, start + 500)],
+                           documents=[f"memory {i} about {TOPICS[i % len(TOPICS)]}" for i in range(start, start + 500)])
+    ltm.close()
+
+    ops = workload(n_lookups, write_ratio)
+    uncached = summary(run(ops, embedding, None))
+    cache = RetrievalCache()
+    cached = summary(run(ops, embedding, cache))
+    print(f"{n_lookups} lookups, {len(query_pool())} distinct queries, write ratio {write_ratio}, "
+          f"embedding {embed_ms} ms")
+    print(f"uncached: mean {uncached[0]:7.3f} ms  p50 {uncached[1]:7.3f} ms  p99 {uncached[2]:7.3f} ms")
+    print(f"cached:   mean {cached[0]:7.3f} ms  p50 {cached[1]:7.3f} ms  p99 {cached[2]:7.3f} ms")
+    print(f"cache:    {cache.stats()}")
+
+if __name__ == "__main__":
+    main()
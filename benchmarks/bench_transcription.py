@@ -0,0 +1,66 @@
+# benchmarks/bench_transcription.py
+"""
+Transcription latency and concurrency against the local mock AssemblyAI server.
+
+"legacy" replays the old blocking client: requests with a new connection per call and a
+fixed 1s poll, one utterance after another. "async" is AsyncTranscriptionClient with pooled
+connections, backoff polling and concurrent uploads. Run from the repository root:
+
+    python -m benchmarks.bench_transcription [n_utterances] [processing_seconds]
+"""
+import asyncio
+import sys
+import time
+
+import requests
+
+from perception.stt.transcription import AsyncTranscriptionClient
+from benchmarks.mock_assemblyai import start_mock_server
+
+PORT = 8099
+BASE_URL = f"http://127.0.0.1:{PORT}/v2"
+AUDIO = b"\0" * 160000  # 5s of 16 kHz int16 silence
+
+def legacy_transcribe(data):
+    response = requests.post(f"{BASE_URL}/upload", data=data)
+    upload_url = response.json()["upload_url"]
+    response = requests.post(f"{BASE_URL}/transcript", json={"audio_url": upload_url})
+    transcript_id = response.json()["id"]
+    while True:
+        result = requests.get(f"{BASE_URL}/transcript/{transcript_id}").json()
+        if result["status"] == "completed":
+            return result["text"]
+        time.sleep(1)
+
+async def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    processing = float(sys.argv[2]) if len(sys.argv) > 2 else 0.6
+    runner, app = await start_mock_server(PORT, processing)
+    try:
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        for _ in range(n):
+            await loop.run_in_executor(None, legacy_transcribe, AUDIO)
+        legacy = time.perf_counter() - start
+        legacy_polls = app["stats"]["polls"]
+
+        app["stats"]["polls"] = 0
+        async with AsyncTranscriptionClient("mock", base_url=BASE_URL) as client:
+            start = time.perf_counter()
+            await client.transcribe(AUDIO)
+            single = time.perf_counter() - start
+            app["stats"]["polls"] = 0
+            start = time.perf_counter()
+            await client.transcribe_many([AUDIO] * n)
+            concurrent = time.perf_counter() - start
+    finally:
+        await runner.cleanup()
+
+    print(f"server processing time:  {processing * 1000:.0f} ms")
+    print(f"legacy, sequential:      {legacy / n * 1000:8.1f} ms/utterance, {n / legacy:6.2f} utt/s, {legacy_polls / n:.1f} polls/utt")
+    print(f"async, single:           {single * 1000:8.1f} ms")
+    print(f"async, {n} concurrent:   {concurrent * 1000:8.1f} ms total, {n / concurrent:6.2f} utt/s, "
+          f"{app['stats']['polls'] / n:.1f} polls/utt")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,130 @@
+# benchmarks/bench_vad.py
+"""
+Voice-activity gating versus fixed 5 s windows on recorded (or synthetic) sessions.
+
+Each session is fed to the utterance segmenter in 100 ms blocks, as the microphone would
+deliver it, and compared with cutting it into fixed windows. Reports the fraction of audio
+skipped, STT calls and audio sent, speech kept (recall), and the time from the end of each
+utterance until its transcript is back. Transcription is modeled as stt_base seconds per call
+(upload plus polling) plus stt_rate seconds per second of audio, on one worker as in
+start_stt. Without WAV files, synthetic sessions of voiced speech turns separated by long
+pauses over background noise are generated, with known speech spans. Run from the
+repository root:
+
+    python -m benchmarks.bench_vad [--stt-base 1.5] [--stt-rate 0.3] [file.wav ...]
+"""
+import argparse
+import os
+import statistics
+import time
+
+import numpy as np
+
+from perception.stt.audio import as_samples
+from perception.stt.vad import UtteranceSegmenter
+
+SR = 16000
+BLOCK = SR // 10
+WINDOW = 5 * SR
+
+def synthetic_session(seconds=300.0, seed=0):
+    """
+    Speech turns of 1-6 s separated by 1-10 s pauses; returns int16 samples and speech spans.
+    """
+    rng = np.random.default_rng(seed)
+    parts, spans, position = [], [], 0
+    while position < seconds * SR:
+        pause = int(rng.uniform(1, 10) * SR)
+        turn = int(rng.uniform(1, 6) * SR)
+        t = np.arange(turn) / SR
+        f0 = rng.uniform(100, 240) * (1 + 0.1 * np.sin(2 * np.pi * rng.uniform(1, 4) * t))
+        phase = 2 * np.pi * np.cumsum(f0) / SR
+        voiced = sum(np.sin(k * phase) / k for k in range(1, 8))
+        syllables = np.clip(np.sin(2 * np.pi * rng.uniform(3, 5) * t) + 0.3, 0, None)
+        parts += [np.zeros(pause), 0.15 * voiced * syllables]
+        spans.append((position + pause, position + pause + turn))
+        position += pause + turn
+    audio = np.concatenate(parts) + rng.normal(0, 0.003, position)
+    return (np.clip(audio, -1, 1) * 32767).astype(np.int16), spans
+
+def stt_seconds(samples, base, rate):
+    return base + rate * samples / SR
+
+def transcribe_queue(chunks, base, rate):
+    """
+    Finish time of each (ready_at_sample, n_samples) chunk on one sequential STT worker.
+    """
+    free, done = 0.0, []
+    for ready, size in chunks:
+        free = max(free, ready / SR) + stt_seconds(size, base, rate)
+        done.append(free)
+    return done
+
+def fixed_windows(samples, base, rate):
+    # Every window goes out when it is full, silent or not; the tail when the stream ends
+    chunks = [(min(start + WINDOW, samples.size), min(WINDOW, samples.size - start))
+              for start in range(0, samples.size, WINDOW)]
+    spans = [(start, start + size) for (_, size), start in zip(chunks, range(0, samples.size, WINDOW))]
+    return chunks, spans, transcribe_queue(chunks, base, rate)
+
+def vad_utterances(samples, base, rate):
+    # Every span is scored, however long the session
+    segmenter = UtteranceSegmenter(max_segments=None)
+    chunks = []
+    for start in range(0, samples.size, BLOCK):
+        end = min(start + BLOCK, samples.size)
+        # An utterance is ready when the block that ended it has been captured
+        chunks += [(end, utterance.size) for utterance in segmenter.push(samples[start:end])]
+    chunks += [(samples.size, utterance.size) for utterance in segmenter.flush()]
+    return chunks, segmenter.segments, transcribe_queue(chunks, base, rate)
+
+def evaluate(samples, speech, mode, base, rate):
+    chunks, spans, done = mode(samples, base, rate)
+    sent = sum(size for _, size in chunks)
+    kept = sum(max(0, min(end, s_end) - max(start, s_start))
+               for s_start, s_end in speech for start, end in spans)
+    # Latency of each utterance: until the chunk holding its last sample is transcribed
+    latencies = []
+    for _, s_end in speech:
+        for (start, end), finished in zip(spans, done):
+            if start < s_end <= end:
+                latencies.append(finished - s_end / SR)
+                break
+    return {"stt_calls": len(chunks), "audio_sent_s": sent / SR,
+            "skipped": 1 - sent / samples.size,
+            "speech_kept": kept / max(1, sum(end - start for start, end in speech)),
+            "stt_busy_s": sum(stt_seconds(size, base, rate) for _, size in chunks),
+            "latency_mean_s": statistics.mean(latencies) if latencies else None,
+            "latency_p50_s": statistics.median(latencies) if latencies else None}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("files", nargs="*", help="16 kHz mono 16-bit PCM WAV recordings")
+    parser.add_argument("--stt-base", type=float, default=1.5, help="modeled seconds per STT call")
+    parser.add_argument("--stt-rate", type=float, default=0.3, help="modeled STT seconds per audio second")
+    args = parser.parse_args()
+
+    sessions = []
+    for path in args.files:
+        samples, sr = as_samples(path)
+        assert sr == SR, f"{path}: expected {SR} Hz"
+        sessions.append((os.path.basename(path), samples.reshape(-1), None))
+    if not sessions:
+        sessions = [(f"synthetic{seed}", *synthetic_session(seed=seed)) for seed in range(3)]
+
+    for name, samples, speech in sessions:
+        start = time.perf_counter()
+        UtteranceSegmenter().push(samples)
+        vad_ms = (time.perf_counter() - start) * 1000 / (samples.size / SR)
+        # Recordings have no labels; score them against the detected utterances
+        speech = speech or vad_utterances(samples, args.stt_base, args.stt_rate)[1]
+        print(f"{name}: {samples.size / SR:.0f} s, {len(speech)} utterances, VAD {vad_ms:.2f} ms per audio second")
+        for label, mode in (("fixed 5s", fixed_windows), ("vad", vad_utterances)):
+            r = evaluate(samples, speech, mode, args.stt_base, args.stt_rate)
+            print(f"  {label:8s} skipped {r['skipped']:6.1%}  calls {r['stt_calls']:4d}  "
+                  f"sent {r['audio_sent_s']:6.1f} s  speech kept {r['speech_kept']:6.1%}  "
+                  f"STT busy {r['stt_busy_s']:6.1f} s  latency mean {r['latency_mean_s']:5.2f} s "
+                  f"p50 {r['latency_p50_s']:5.2f} s")
+
+if __name__ == "__main__":
+    main()
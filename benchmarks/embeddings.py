@@ -0,0 +1,43 @@
+# benchmarks/embeddings.py
+"""
+Cheap deterministic embedding function so memory benchmarks run offline and measure the
+store itself rather than the embedding model.
+"""
+import hashlib
+import time
+
+import numpy as np
+from chromadb import Documents, EmbeddingFunction, Embeddings
+
+class HashEmbeddingFunction(EmbeddingFunction):
+    """
+    Bag-of-words feature hashing into a fixed-size, L2-normalized vector.
+    """
+    def __init__(self, dim=64, latency=0.0):
+        self.dim = dim
+        # Simulated model time per call, for benchmarks where embedding cost matters
+        self.latency = latency
+
+    def __call__(self, input: Documents) -> Embeddings:
+        if self.latency:
+            time.sleep(self.latency)
+        vectors = []
+        for text in input:
+            vector = np.zeros(self.dim, dtype=np.float32)
+            for word in text.lower().split():
+                digest = hashlib.blake2b(word.encode(), digest_size=8).digest()
+                vector[int.from_bytes(digest[:4], "little") % self.dim] += 1.0 if digest[4] & 1 else -1.0
+            norm = np.linalg.norm(vector)
+            vectors.append(vector / norm if norm else vector)
+        return vectors
+
+    @staticmethod
+    def name() -> str:
+        return "hash_embedding"
+
+    def get_config(self):
+        return {"dim": self.dim, "latency": self.latency}
+
+    @staticmethod
+    def build_from_config(config):
+        return HashEmbeddingFunction(config.get("dim", 64), config.get("latency", 0.0))
@@ -0,0 +1,112 @@
+# benchmarks/load_test_analyze.py
+"""
+Load test for POST /analyze: concurrent clients upload a short WAV and wait for the analysis,
+reporting p50/p99 latency and requests per second.
+
+"sync" posts and waits for the response; "job" posts with async=1 and polls
+GET /analyze/<job_id> until the job is done. Without a URL, the app is served in-process by
+werkzeug's threaded server with the fake STT backend sleeping stt_seconds per upload (standing
+in for the remote transcription round trip); worker pools follow the STT_WORKERS,
+NLP_WORKERS and MEMORY_WORKERS settings. Stores are created in a temporary directory. Run
+from the repository root:
+
+    python -m benchmarks.load_test_analyze [n_requests] [concurrency] [stt_seconds] [url]
+"""
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+
+from perception.stt.audio import encode_wav
+
+MODES = ("sync", "job")
+
+def sample_upload(seconds=2.0, sr=16000):
+    t = np.arange(int(seconds * sr)) / sr
+    return encode_wav((0.3 * np.sin(2 * np.pi * 180 * t) * 32767).astype(np.int16), sr)
+
+def start_server(stt_seconds):
+    from werkzeug.serving import WSGIRequestHandler, make_server
+    from perception.stt.backends import FakeBackend, set_default_backend
+    set_default_backend(FakeBackend(("I feel anxious about work but hopeful about my family.",
+                                     "I slept badly and I am tired today."), latency=stt_seconds))
+    import app as app_module
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+    server = make_server("127.0.0.1", 0, app_module.app, threaded=True, request_handler=QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+def analyze(session, url, mode, audio, user_id):
+    data = {"user_id": user_id}
+    if mode == "job":
+        data["async"] = "1"
+    response = session.post(f"{url}/analyze", data=data, files={"audio": ("sample.wav", audio, "audio/wav")})
+    if mode == "sync":
+        return response.status_code == 200
+    if response.status_code != 202:
+        return False
+    poll = url + response.json()["poll"]
+    while True:
+        job = session.get(poll).json()
+        if job["status"] in ("done", "failed"):
+            return job["status"] == "done"
+        time.sleep(0.02)
+
+def run(url, mode, n_requests, concurrency, audio):
+    local = threading.local()
+
+    def one(i):
+        # One keep-alive connection per client thread
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+        start = time.perf_counter()
+        ok = analyze(local.session, url, mode, audio, f"load{i % 50}")
+        return time.perf_counter() - start, ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as clients:
+        results = list(clients.map(one, range(n_requests)))
+    elapsed = time.perf_counter() - start
+    return [latency for latency, ok in results if ok], sum(1 for _, ok in results if not ok), elapsed
+
+def report(mode, latencies, errors, elapsed):
+    if not latencies:
+        print(f"{mode:5s} all {errors} requests failed")
+        return
+    latencies = sorted(latencies)
+    print(f"{mode:5s} {len(latencies) / elapsed:7.1f} req/s  "
+          f"p50 {statistics.median(latencies) * 1000:8.1f} ms  "
+          f"p99 {latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000:8.1f} ms  "
+          f"errors {errors}")
+
+def main():
+    n_requests = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+    stt_seconds = float(sys.argv[3]) if len(sys.argv) > 3 else 0.5
+    url = sys.argv[4] if len(sys.argv) > 4 else None
+    server = None
+    if url is None:
+        os.chdir(tempfile.mkdtemp(prefix="load_test_"))
+        server, url = start_server(stt_seconds)
+    audio = sample_upload()
+    print(f"{n_requests} requests, {concurrency} concurrent clients against {url}")
+    try:
+        # Warm up the worker pools and memory stores before measuring
+        run(url, "sync", min(concurrency, n_requests), concurrency, audio)
+        for mode in MODES:
+            report(mode, *run(url, mode, n_requests, concurrency, audio))
+    finally:
+        if server is not None:
+            server.shutdown()
+
+if __name__ == "__main__":
+    main()
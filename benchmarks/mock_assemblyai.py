@@ -0,0 +1,63 @@
+# benchmarks/mock_assemblyai.py
+"""
+Local stand-in for the AssemblyAI upload/transcript API, for offline benchmarks.
+
+Transcripts complete `processing_seconds` after they are requested. Run standalone with
+
+    python -m benchmarks.mock_assemblyai [port] [processing_seconds]
+
+or start it inside a benchmark with start_mock_server().
+"""
+import itertools
+import sys
+import time
+
+from aiohttp import web
+
+def make_app(processing_seconds=1.0):
+    uploads = {}
+    transcripts = {}
+    ids = itertools.count(1)
+    app = web.Application(client_max_size=100 * 1024 * 1024)
+    app["stats"] = {"uploads": 0, "polls": 0}
+
+    async def upload(request):
+        body = await request.read()
+        upload_id = str(next(ids))
+        uploads[upload_id] = len(body)
+        app["stats"]["uploads"] += 1
+        return web.json_response({"upload_url": f"mock://{upload_id}"})
+
+    async def create(request):
+        payload = await request.json()
+        transcript_id = str(next(ids))
+        size = uploads.get(payload["audio_url"].rsplit("/", 1)[-1], 0)
+        transcripts[transcript_id] = (time.monotonic() + processing_seconds, f"transcript of {size} bytes")
+        return web.json_response({"id": transcript_id, "status": "queued"})
+
+    async def status(request):
+        app["stats"]["polls"] += 1
+        ready_at, text = transcripts[request.match_info["id"]]
+        if time.monotonic() >= ready_at:
+            return web.json_response({"id": request.match_info["id"], "status": "completed", "text": text})
+        return web.json_response({"id": request.match_info["id"], "status": "processing"})
+
+    app.router.add_post("/v2/upload", upload)
+    app.router.add_post("/v2/transcript", create)
+    app.router.add_get("/v2/transcript/{id}", status)
+    return app
+
+async def start_mock_server(port=8099, processing_seconds=1.0):
+    """
+    Start the mock on localhost; returns (runner, app). Call `await runner.cleanup()` to stop.
+    """
+    app = make_app(processing_seconds)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+    return runner, app
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8099
+    delay = float(sys.argv[2]) if len(sys.argv) > 2 else 1.0
+    web.run_app(make_app(delay), host="127.0.0.1", port=port)
@@ -0,0 +1,99 @@
+# benchmarks/replay_ws_client.py
+"""
+Offline WebSocket client: replays WAV files to the streaming endpoint and measures
+time-to-first-event, i.e. from the first audio sent to the first analysis event received.
+
+Each file is replayed twice: "streamed" with the server's chunking, and "whole file" with one
+chunk as long as the file, which is what the upload-then-wait /analyze flow gives. Per event
+type, the time of its first arrival is reported. Without a URL, a StreamingServer is started
+in-process with the fake STT backend sleeping stt_seconds per chunk. Without WAV files, a
+synthetic 10 s recording is used. Run from the repository root:
+
+    python -m benchmarks.replay_ws_client [--url ws://host:8765] [--speed 1] [--stt-seconds 0.5] [file.wav ...]
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+import websockets
+
+from perception.stt.audio import as_samples, encode_wav
+
+EVENT_TYPES = ("prosody", "transcript", "tone", "entities", "stored", "error")
+
+def synthetic_wav(path, seconds=10.0, sr=16000):
+    # Voiced 180 Hz segments separated by short pauses, like speech
+    t = np.arange(int(seconds * sr)) / sr
+    samples = 0.3 * np.sin(2 * np.pi * 180 * t) * (np.sin(2 * np.pi * 0.4 * t) > -0.5)
+    with open(path, "wb") as f:
+        f.write(encode_wav((samples * 32767).astype(np.int16), sr))
+    return path
+
+async def replay(url, path, speed=1.0, block_seconds=0.1, whole_file=False):
+    """
+    Stream one WAV file and return the seconds from the first audio block to the first event of
+    each type, plus 'first' (any analysis event) and 'done'.
+    """
+    samples, sr = as_samples(path)
+    block = int(block_seconds * sr)
+    arrivals = {}
+    async with websockets.connect(url, max_size=None) as websocket:
+        start = {"type": "start", "user_id": "replay"}
+        if whole_file:
+            start["chunk_seconds"] = samples.size / sr
+        await websocket.send(json.dumps(start))
+        ready = json.loads(await websocket.recv())
+        assert ready["type"] == "ready", ready
+        began = time.perf_counter()
+
+        async def send():
+            for offset in range(0, samples.size, block):
+                await websocket.send(samples[offset:offset + block].astype("<i2").tobytes())
+                if speed:
+                    await asyncio.sleep(block_seconds / speed)
+            await websocket.send(json.dumps({"type": "stop"}))
+
+        sender = asyncio.create_task(send())
+        async for message in websocket:
+            event = json.loads(message)
+            elapsed = time.perf_counter() - began
+            if event["type"] == "done":
+                arrivals["done"] = elapsed
+                break
+            arrivals.setdefault("first", elapsed)
+            arrivals.setdefault(event["type"], elapsed)
+        await sender
+    return arrivals
+
+def start_local_server(stt_seconds):
+    from perception.perception import PerceptionModule
+    from perception.stt.backends import FakeBackend
+    from streaming import StreamingServer
+    server = StreamingServer(PerceptionModule(FakeBackend(("I feel anxious about work but hopeful.",),
+                                                          latency=stt_seconds)))
+    return f"ws://127.0.0.1:{server.start(port=0)}"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("files", nargs="*", help="16-bit PCM WAV files to replay")
+    parser.add_argument("--url", help="streaming endpoint; defaults to an in-process server")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed vs real time; 0 is as fast as possible")
+    parser.add_argument("--stt-seconds", type=float, default=0.5, help="fake transcription latency of the local server")
+    args = parser.parse_args()
+    url = args.url or start_local_server(args.stt_seconds)
+    files = args.files or [synthetic_wav(os.path.join(tempfile.mkdtemp(prefix="replay_"), "synthetic.wav"))]
+
+    for path in files:
+        print(f"{os.path.basename(path)} at {args.speed}x against {url}")
+        for label, whole_file in (("streamed", False), ("whole file", True)):
+            arrivals = asyncio.run(replay(url, path, args.speed, whole_file=whole_file))
+            timings = "  ".join(f"{name} {arrivals[name] * 1000:7.0f} ms"
+                                for name in ("first",) + EVENT_TYPES + ("done",) if name in arrivals)
+            print(f"  {label:10s} {timings}")
+
+if __name__ == "__main__":
+    main()
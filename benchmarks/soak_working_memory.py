@@ -0,0 +1,89 @@
+# benchmarks/soak_working_memory.py
+"""
+Soak test for session-scoped working memory: memory use should stay flat under sustained traffic.
+
+Simulates /analyze traffic from a rolling population of sessions through the same
+MemoryRegistry + bounded WorkingMemory setup app.py uses, and samples process RSS as it goes.
+"unbounded" stores everything in one WorkingMemory as app.py used to. Uses an offline hash
+embedding. Run from the repository root:
+
+    python -m benchmarks.soak_working_memory [bounded|unbounded] [n_stores] [n_sessions]
+"""
+import os
+import random
+import resource
+import sys
+import time
+
+from memory.ingest import IngestionQueue
+from memory.registry import MemoryRegistry
+from memory.working_memory import WorkingMemory
+from benchmarks.embeddings import HashEmbeddingFunction
+
+WORDS = "work family sleep anxious hopeful tired angry calm friend deadline money health".split()
+
+def rss_mb():
+    # Current RSS on Linux; elsewhere fall back to the peak, which still shows unbounded growth
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except OSError:
+        scale = 2 ** 20 if sys.platform == "darwin" else 2 ** 10
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+def utterance(rng, i):
+    polarity = rng.uniform(-1, 1)
+    return {"transcript": f"utterance {i} " + " ".join(rng.choices(WORDS, k=12)),
+            "emotions": [rng.choice(["happy", "sad", "fear", "neutral"])],
+            "sentiment": {"polarity": polarity, "subjectivity": 0.5, "compound_score": polarity}}
+
+def main():
+    mode = sys.argv[1] if len(sys.argv) > 1 else "bounded"
+    n_stores = int(sys.argv[2]) if len(sys.argv) > 2 else 50000
+    n_sessions = int(sys.argv[3]) if len(sys.argv) > 3 else 2000
+    rng = random.Random(0)
+    embedding = HashEmbeddingFunction()
+    ingest = IngestionQueue()
+    promoted = [0]
+
+    def promote(record):
+        # Count only, so the benchmark itself holds no records
+        promoted[0] += 1
+
+    if mode == "bounded":
+        registry = MemoryRegistry(
+            factory=lambda key: WorkingMemory("soak", embedding, ingest, session_id=key, capacity=50, ttl=600,
+                                              promote=promote),
+            capacity=64,
+        )
+    else:
+        shared = WorkingMemory("soak", embedding, ingest)
+
+    samples = []
+    start = time.perf_counter()
+    for i in range(n_stores):
+        # Sessions come and go: each one is active for a while, then never seen again
+        session = f"session{(i // 50 + rng.randrange(8)) % n_sessions}"
+        if mode == "bounded":
+            with registry.lease(session) as wm:
+                wm.store(utterance(rng, i))
+        else:
+            shared.store(utterance(rng, i), session_id=session)
+        if (i + 1) % (n_stores // 10) == 0:
+            samples.append(rss_mb())
+            print(f"{i + 1:8d} stores  rss {samples[-1]:8.1f} MB")
+    ingest.flush()
+    elapsed = time.perf_counter() - start
+
+    print(f"{mode}: {n_stores / elapsed:.1f} stores/s")
+    # Compare the second half with the first, after the registry and caches have warmed up
+    half = len(samples) // 2
+    print(f"rss growth over second half: {samples[-1] - samples[half - 1]:+.1f} MB")
+    if mode == "bounded":
+        print(f"registry: {registry.stats()}  promoted to LTM: {promoted[0]}")
+        registry.close_all()
+    ingest.close()
+    print(f"ingest: {ingest.metrics()}")
+
+if __name__ == "__main__":
+    main()
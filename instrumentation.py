@@ -0,0 +1,224 @@
+"""
+Per-stage latency instrumentation: spans feeding process-wide histograms and counters, and
+optional per-request traces.
+
+Disabled by default (METRICS_ENABLED=1 or enable() turns it on). While disabled and no trace
+is being collected, span() returns a shared no-op context manager and timed() functions call
+straight through, so instrumented code pays one flag check.
+
+    with span("tone"):
+        ...
+
+    @timed("nlu")
+    def nlu_process(...): ...
+
+    with tracing() as trace:   # records spans of this context even while disabled
+        ...
+"""
+import bisect
+import contextlib
+import contextvars
+import functools
+import os
+import threading
+import time
+
+# Histogram bucket upper bounds in seconds: 0.1 ms doubling up to about 105 s
+BUCKETS = tuple(0.0001 * 2 ** i for i in range(21))
+
+_enabled = os.environ.get("METRICS_ENABLED", "0") == "1"
+_tracers = 0  # traces being collected anywhere; spans stay live while > 0
+_trace = contextvars.ContextVar("trace", default=None)
+_lock = threading.Lock()
+_histograms = {}
+_counters = {}
+_started = time.time()
+_NOOP = contextlib.nullcontext()
+
+def enable(on=True):
+    global _enabled
+    _enabled = on
+
+def enabled() -> bool:
+    return _enabled
+
+class Histogram:
+    """
+    Latency distribution over fixed BUCKETS; callers hold the module lock.
+    """
+    __slots__ = ("counts", "count", "sum", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q) -> float:
+        """
+        Estimate of the q-quantile, interpolated inside its bucket.
+        """
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                low = BUCKETS[i - 1] if i else 0.0
+                high = BUCKETS[i] if i < len(BUCKETS) else self.max
+                return min(low + (high - low) * (rank - seen) / n, self.max)
+            seen += n
+        return self.max
+
+    def summary(self) -> dict:
+        if not self.count:
+            return {"count": 0}
+        return {"count": self.count,
+                "mean_ms": self.sum / self.count * 1000,
+                "p50_ms": self.quantile(0.5) * 1000,
+                "p90_ms": self.quantile(0.9) * 1000,
+                "p99_ms": self.quantile(0.99) * 1000,
+                "max_ms": self.max * 1000}
+
+def observe(name, seconds, start=None):
+    """
+    Record one duration for name, and add it to the current trace if one is collected.
+    """
+    trace = _trace.get()
+    if trace is not None:
+        trace.append((name, time.perf_counter() - seconds if start is None else start, seconds))
+    if _enabled:
+        with _lock:
+            histogram = _histograms.get(name)
+            if histogram is None:
+                histogram = _histograms[name] = Histogram()
+            histogram.observe(seconds)
+
+def count(name, n=1):
+    if _enabled:
+        with _lock:
+            _counters[name] = _counters.get(name, 0) + n
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        observe(self.name, time.perf_counter() - self.start, self.start)
+        if exc_type is not None:
+            count(f"{self.name}.errors")
+        return False
+
+def span(name):
+    """
+    Context manager timing a block as stage name.
+    """
+    if not _enabled and not _tracers:
+        return _NOOP
+    return _Span(name)
+
+def timed(name):
+    """
+    Decorator timing every call of a function as stage name.
+    """
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled and not _tracers:
+                return fn(*args, **kwargs)
+            with _Span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+@contextlib.contextmanager
+def tracing():
+    """
+    Collect the spans of the current context (this thread, or this asyncio task) into a list
+    of (name, start perf_counter, seconds) tuples.
+    """
+    global _tracers
+    trace = []
+    token = _trace.set(trace)
+    with _lock:
+        _tracers += 1
+    try:
+        yield trace
+    finally:
+        with _lock:
+            _tracers -= 1
+        _trace.reset(token)
+
+def call_traced(fn, *args):
+    """
+    Call fn(*args) while tracing it. Picklable, so work sent to a worker process can bring its
+    spans back; pass them to replay() in the parent.
+    Returns:
+        tuple: fn's result, its trace and the pid it ran in.
+    """
+    with tracing() as trace:
+        result = fn(*args)
+    return result, trace, os.getpid()
+
+def replay(trace):
+    """
+    Record spans collected elsewhere (e.g. in a worker process) in this process's histograms
+    and current trace.
+    """
+    for name, start, seconds in trace:
+        observe(name, seconds, start)
+
+def format_trace(trace, origin=None) -> list:
+    """
+    Trace tuples as JSON-ready dicts with start offsets (from origin, default the first span)
+    and durations in ms, in start order.
+    """
+    if not trace:
+        return []
+    origin = min(start for _, start, _ in trace) if origin is None else origin
+    return [{"span": name, "start_ms": round((start - origin) * 1000, 2), "ms": round(seconds * 1000, 2)}
+            for name, start, seconds in sorted(trace, key=lambda entry: entry[1])]
+
+def snapshot() -> dict:
+    with _lock:
+        return {"enabled": _enabled, "uptime_s": time.time() - _started,
+                "histograms": {name: h.summary() for name, h in sorted(_histograms.items())},
+                "counters": dict(sorted(_counters.items()))}
+
+def prometheus() -> str:
+    """
+    The histograms and counters in the Prometheus text exposition format.
+    """
+    lines = []
+    with _lock:
+        if _histograms:
+            lines += ["# HELP stage_seconds Pipeline stage latency.", "# TYPE stage_seconds histogram"]
+        for name, h in sorted(_histograms.items()):
+            cumulative = 0
+            for bound, n in zip(BUCKETS + (float("inf"),), h.counts):
+                cumulative += n
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                lines.append(f'stage_seconds_bucket{{stage="{name}",le="{le}"}} {cumulative}')
+            lines.append(f'stage_seconds_sum{{stage="{name}"}} {h.sum}')
+            lines.append(f'stage_seconds_count{{stage="{name}"}} {h.count}')
+        if _counters:
+            lines += ["# HELP events_total Pipeline event counts.", "# TYPE events_total counter"]
+        for name, n in sorted(_counters.items()):
+            lines.append(f'events_total{{event="{name}"}} {n}')
+    return "\n".join(lines) + "\n"
+
+def reset():
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
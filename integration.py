@@ -1,33 +1,87 @@
+import atexit
+from concurrent.futures import ThreadPoolExecutor
 from perception.perception import PerceptionModule
 from memory.working_memory import WorkingMemory
 from memory.long_term_memory import LongTermMemory
+from memory.ingest import IngestionQueue
+from memory.cache import RetrievalCache
+from memory.context import gather_context
+from memory.timeline import MoodTimeline
+from instrumentation import span
 
 class IntegratedSystem:
-    def __init__(self):
-        self.perception = PerceptionModule()
-        self.working_memory = WorkingMemory()
-        self.long_term_memory = LongTermMemory()
+    def __init__(self, stt_backend=None, embedding_function=None):
+        """
+        Args:
+            stt_backend (STTBackend, optional): Transcribes recorded audio. Defaults to the STT_BACKEND setting.
+            embedding_function (optional): ChromaDB embedding function of both memories. Defaults to ChromaDB's default model.
+        """
+        self.perception = PerceptionModule(stt_backend)
+        # Memory writes are batched off the request path; retrievals still see them
+        self.ingest = IngestionQueue()
+        # Repeated context lookups skip re-embedding the query and, between writes, the store
+        self.cache = RetrievalCache()
+        self.long_term_memory = LongTermMemory(embedding_function=embedding_function, ingest=self.ingest, cache=self.cache)
+        # Working memory stays small; everything is also kept long term as it is analyzed
+        self.working_memory = WorkingMemory(embedding_function=embedding_function, ingest=self.ingest, capacity=100, ttl=3600,
+                                            cache=self.cache)
+        # Every analysis is also added to the user's mood timeline for trend queries
+        self.timeline = MoodTimeline()
+        # Context lookups query every memory at once
+        self.executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="context")
+        # Queued memory writes are flushed even if the caller never closes the system
+        atexit.register(self.close)
+        self._closed = False
 
     def process_input(self, text=None, audio_duration=5):
-        if text:
-            nlu_output = self.perception.process_text(text)
-        else:
-            text = self.perception.process_audio(audio_duration)
-            nlu_output = self.perception.process_text(text)
+        with span("process_input"):
+            if text:
+                nlu_output = self.perception.process_text(text)
+            else:
+                text = self.perception.process_audio(audio_duration)
+                if not text:
+                    # Nothing was said
+                    return None
+                nlu_output = self.perception.process_text(text)
 
-        # Store in working memory
-        self.working_memory.store(nlu_output)
-
-        # Optionally, transfer important info to LTM
-        # For simplicity, store all for now
-        self.long_term_memory.store(nlu_output)
+            # Store in working memory and long-term memory
+            self.working_memory.store(nlu_output)
+            self.long_term_memory.store(nlu_output)
+            self.timeline.append(nlu_output)
 
         return nlu_output
 
-    def get_context(self, query):
-        wm_results = self.working_memory.retrieve(query)
-        ltm_results = self.long_term_memory.retrieve(query)
-        return {"working_memory": wm_results, "long_term_memory": ltm_results}
+    def close(self):
+        """
+        Writes any queued memories and releases the stores. Safe to call more than once.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        atexit.unregister(self.close)
+        self.executor.shutdown()
+        self.working_memory.close()
+        self.ingest.close()
+        self.long_term_memory.close()
+        self.timeline.close()
+
+    def get_context(self, query, n_results=10, deadline=1.0, **filters):
+        """
+        Retrieves context for a query from working and long-term memory in parallel.
+        Args:
+            query (str): The query to use.
+            n_results (int, optional): Length of the context list. Defaults to 10.
+            deadline (float, optional): Seconds to wait for the memories; late ones are skipped. Defaults to 1.0.
+            **filters: mood, emotion, since, until or session_id (see build_filter).
+        Returns:
+            list: Deduplicated memories ranked by similarity and recency (see merge_results).
+        """
+        sources = {"working_memory": self.working_memory, "long_term_memory": self.long_term_memory}
+        with span("context"):
+            context, missing = gather_context(sources, query, n_results, deadline, self.executor, **filters)
+        if missing:
+            print(f"⚠️ Context without {', '.join(missing)} (deadline {deadline}s)")
+        return context
 
 if __name__ == "__main__":
     system = IntegratedSystem()
@@ -36,3 +90,4 @@ if __name__ == "__main__":
     print("NLU Output:", output)
     context = system.get_context("happy")
     print("Context:", context)
+    system.close()
@@ -0,0 +1,157 @@
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+import instrumentation
+
+class JobQueueFull(Exception):
+    """
+    Raised by JobRunner.submit when too many jobs are already queued or running.
+    """
+
+class Job:
+    """
+    One submitted pipeline. status is 'queued', then the name of the running step, then
+    'done' or 'failed'; timings holds the seconds each finished step took, and trace (when
+    requested) the instrumentation spans of every step.
+    """
+    def __init__(self, job_id, trace=None):
+        self.id = job_id
+        self.trace = None if trace is None else list(trace)
+        self.started = time.perf_counter()
+        self.status = "queued"
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.finished = None
+        self.timings = {}
+        self._done = threading.Event()
+
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, timeout=None) -> bool:
+        """
+        Block until the job finishes or timeout seconds pass; returns whether it finished.
+        """
+        return self._done.wait(timeout)
+
+    def to_dict(self):
+        job = {"job_id": self.id, "status": self.status,
+               "timings_ms": {step: round(seconds * 1000, 1) for step, seconds in self.timings.items()}}
+        if self.status == "done":
+            job["result"] = self.result
+        elif self.status == "failed":
+            job["error"] = self.error
+        if self.trace is not None:
+            job["trace"] = instrumentation.format_trace(self.trace)
+        return job
+
+class JobRunner:
+    """
+    Runs jobs as chains of steps, each step on the executor suited to it (e.g. a thread pool
+    for network-bound transcription, a process pool for CPU-bound NLP), so a slow step only
+    occupies a worker of its own pool and never a request thread. Steps are chained with
+    future callbacks; no thread blocks waiting for the next one.
+
+    Jobs are kept in a thread-safe table: finished jobs stay pollable for ttl seconds, and at
+    most max_finished of them are kept.
+    """
+    def __init__(self, max_pending=1000, max_finished=10000, ttl=600.0):
+        self.max_pending = max_pending
+        self.max_finished = max_finished
+        self.ttl = ttl
+        self._jobs = {}  # job id -> Job
+        self._finished = OrderedDict()  # job id -> finish time, oldest first
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._counts = {"done": 0, "failed": 0, "rejected": 0}
+
+    def submit(self, steps, trace=None) -> Job:
+        """
+        Start a job.
+        Args:
+            steps (list): (name, executor, fn) tuples. The first fn is called without arguments,
+                each later one with the previous result; the last result is the job's result.
+                Steps run on process pools need picklable, module-level functions.
+            trace (list, optional): Spans already collected for the request (see
+                instrumentation); the spans of every step, also from worker processes, are added
+                to the job's copy. Defaults to None, no trace.
+        Raises:
+            JobQueueFull: When max_pending jobs are already queued or running.
+        """
+        with self._lock:
+            self._prune()
+            if self._pending >= self.max_pending:
+                self._counts["rejected"] += 1
+                raise JobQueueFull(f"{self._pending} jobs already pending")
+            job = Job(uuid.uuid4().hex, trace)
+            self._jobs[job.id] = job
+            self._pending += 1
+        self._run(job, steps, 0, ())
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job, steps, index, args):
+        if index == len(steps):
+            self._finish(job, result=args[0])
+            return
+        name, executor, fn = steps[index]
+        job.status = name
+        # Spans recorded in a worker process only reach this process's metrics if sent back
+        traced = job.trace is not None or instrumentation.enabled()
+        started = time.perf_counter()
+        try:
+            if traced:
+                future = executor.submit(instrumentation.call_traced, fn, *args)
+            else:
+                future = executor.submit(fn, *args)
+        except Exception as e:  # e.g. the executor was shut down
+            self._finish(job, error=f"{name}: {e}")
+            return
+
+        def step_done(future):
+            job.timings[name] = time.perf_counter() - started
+            instrumentation.observe(f"job.{name}", job.timings[name], started)
+            try:
+                result = future.result()
+            except Exception as e:
+                self._finish(job, error=f"{name}: {e}")
+                return
+            if traced:
+                result, spans, pid = result
+                if pid != os.getpid():
+                    instrumentation.replay(spans)
+                if job.trace is not None:
+                    job.trace.extend(spans)
+                    job.trace.append((f"job.{name}", started, job.timings[name]))
+            self._run(job, steps, index + 1, (result,))
+        future.add_done_callback(step_done)
+
+    def _finish(self, job, result=None, error=None):
+        job.result, job.error = result, error
+        job.finished = time.time()
+        job.status = "failed" if error is not None else "done"
+        with self._lock:
+            self._pending -= 1
+            self._counts[job.status] += 1
+            self._finished[job.id] = job.finished
+        job._done.set()
+
+    def _prune(self):
+        # Drop expired finished jobs, oldest first; caller holds the lock
+        cutoff = time.time() - self.ttl
+        while self._finished:
+            job_id, finished = next(iter(self._finished.items()))
+            if finished >= cutoff and len(self._finished) <= self.max_finished:
+                break
+            del self._finished[job_id]
+            del self._jobs[job_id]
+
+    def stats(self):
+        with self._lock:
+            return {"pending": self._pending, "tracked": len(self._jobs), **self._counts}
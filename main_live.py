@@ -2,23 +2,25 @@
 import asyncio, threading, sys
 
 # Import modules from subfolders
-from perception.stt.stt_live import start_stt, stop_stream
+from perception.stt import stt_live
+from perception.stt.stt_live import start_stt
 from perception.tone.tone_sentiment_live import analyze_tone
 from perception.nlu.nlu_live import nlu_process
+from perception.analysis import AnalysisContext
 
-def handle_text(text):
-    tone = analyze_tone(text)
-    result = nlu_process(text, tone)
+def handle_text(text, pitch=None):
+    ctx = AnalysisContext(text)
+    tone = analyze_tone(text, pitch, ctx)
+    result = nlu_process(text, tone, ctx)
     print("\n🗣️ Transcript:", text)
     print("🤖 AGI Response:", result)
 
 def listen_for_quit():
-    global stop_stream
     print("\nPress 'q' + Enter anytime to quit...\n")
     while True:
         key = sys.stdin.readline().strip().lower()
         if key == "q":
-            stop_stream = True
+            stt_live.stop_stream = True
             print("🛑 Stopping transcription...")
             break
 
@@ -26,4 +28,5 @@ if __name__ == "__main__":
     # background quit listener
     threading.Thread(target=listen_for_quit, daemon=True).start()
     # run STT loop
-    asyncio.run(start_stt(handle_text))
+    report = asyncio.run(start_stt(handle_text))
+    print("⏱️ Stage latency:", report)
@@ -0,0 +1,291 @@
+import base64
+import contextlib
+import functools
+import glob
+import gzip
+import json
+import os
+import shutil
+import sys
+import chromadb
+import numpy as np
+from .long_term_memory import LongTermMemory, SHARED_STORE_PATH, store_path
+
+# Version of the archive line format written by export_lines
+ARCHIVE_VERSION = 1
+
+STORE_PREFIX = "long_term_memory_db_"
+
+def encode_embedding(embedding) -> str:
+    """
+    Embeddings are archived as base64 little-endian float32, about a third of the size of JSON floats.
+    """
+    return base64.b64encode(np.asarray(embedding, dtype="<f4").tobytes()).decode("ascii")
+
+def decode_embedding(data):
+    return np.frombuffer(base64.b64decode(data), dtype="<f4")
+
+def open_archive(path, mode="r"):
+    """
+    Open an archive for text reading or writing; '.gz' paths are gzip-compressed and '-' is stdin/stdout.
+    """
+    if path == "-":
+        return contextlib.nullcontext(sys.stdin if mode == "r" else sys.stdout)
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+def list_users(root="."):
+    """
+    Users with a long-term memory store under root.
+    """
+    paths = glob.glob(os.path.join(root, STORE_PREFIX + "*"))
+    return sorted(os.path.basename(path)[len(STORE_PREFIX):] for path in paths
+                  if os.path.isdir(path) and not path.endswith((".compact", ".bak")))
+
+def export_lines(ltm, page_size=500, embeddings=True):
+    """
+    Stream one long-term memory as archive lines: a header for the store, then one line per memory.
+    At most one page of page_size memories is held at a time.
+    Args:
+        ltm (LongTermMemory): The memory to export.
+        page_size (int, optional): Memories per collection read. Defaults to 500.
+        embeddings (bool, optional): Include embeddings, so importing skips re-embedding. Defaults to True.
+    Yields:
+        str: JSON lines, newline-terminated.
+    """
+    yield json.dumps({"type": "store", "version": ARCHIVE_VERSION, "user_id": ltm.user_id,
+                      "collection": ltm.collection.name, "metadata": ltm.collection.metadata}) + "\n"
+    include = ("documents", "metadatas", "embeddings") if embeddings else ("documents", "metadatas")
+    for page in ltm.iter_all(page_size, include):
+        vectors = page.get("embeddings") if embeddings else None
+        for i, doc_id in enumerate(page["ids"]):
+            line = {"type": "memory", "id": doc_id, "document": page["documents"][i]}
+            if page["metadatas"][i]:
+                line["metadata"] = page["metadatas"][i]
+            if vectors is not None:
+                line["embedding"] = encode_embedding(vectors[i])
+            yield json.dumps(line) + "\n"
+
+def export_users(user_ids, out, page_size=500, embeddings=True, open_memory=None) -> int:
+    """
+    Write the archive of several users' long-term memories to a text stream.
+    Args:
+        user_ids (list): Users to export.
+        out: Writable text stream.
+        open_memory (callable, optional): user_id -> context manager yielding that user's
+            LongTermMemory (e.g. MemoryRegistry.lease). Defaults to opening and closing the store.
+    Returns:
+        int: Number of exported memories.
+    """
+    open_memory = open_memory or _open_store
+    count = 0
+    for user_id in user_ids:
+        with open_memory(user_id) as ltm:
+            lines = export_lines(ltm, page_size, embeddings)
+            out.write(next(lines))  # store header
+            for line in lines:
+                out.write(line)
+                count += 1
+    return count
+
+def import_lines(lines, open_memory=None, batch_size=500, user_id=None) -> dict:
+    """
+    Load archive lines back into long-term memory, in batches of batch_size.
+    Memories keep their ids (same-id memories are replaced), so re-importing is idempotent.
+    Args:
+        lines (iterable): Archive lines (str or bytes).
+        open_memory (callable, optional): As for export_users. Defaults to opening and closing the store.
+        batch_size (int, optional): Memories per collection write. Defaults to 500.
+        user_id (str, optional): Import everything into this user instead of the archived ones.
+    Returns:
+        dict: user_id -> number of imported memories.
+    """
+    open_memory = open_memory or _open_store
+    counts = {}
+    with contextlib.ExitStack() as stack:
+        ltm, batch = None, []
+        for raw in lines:
+            if not raw.strip():
+                continue
+            line = json.loads(raw)
+            if line["type"] == "store":
+                _write_batch(ltm, batch)
+                batch = []
+                # Release the previous store before opening the next one
+                stack.close()
+                target = user_id or line["user_id"]
+                ltm = stack.enter_context(open_memory(target))
+                _keep_high_water(ltm, line.get("metadata"))
+                counts.setdefault(target, 0)
+                continue
+            if ltm is None:
+                raise ValueError("archive memory line before any store header")
+            batch.append(line)
+            counts[ltm.user_id] += 1
+            if len(batch) >= batch_size:
+                _write_batch(ltm, batch)
+                batch = []
+        _write_batch(ltm, batch)
+    return counts
+
+def _write_batch(ltm, batch):
+    if not batch:
+        return
+    # Chroma needs all-or-nothing embeddings and metadatas per call
+    embeddings = None
+    if all("embedding" in line for line in batch):
+        embeddings = [decode_embedding(line["embedding"]) for line in batch]
+    metadatas = [line.get("metadata") for line in batch]
+    if not any(metadatas):
+        metadatas = None
+    ltm.put_many([line["id"] for line in batch], [line["document"] for line in batch], metadatas, embeddings)
+
+def _keep_high_water(ltm, metadata):
+    # Ids deleted before the export must stay unused in the new store too
+    next_id = (metadata or {}).get("next_id")
+    if next_id:
+        ltm.ids.advance_past([str(int(next_id) - 1)])
+
+@contextlib.contextmanager
+def _open_store(user_id, path=None, collection_name="long_term_memory", **options):
+    ltm = LongTermMemory(user_id, collection_name, path=path, **options)
+    try:
+        yield ltm
+    finally:
+        ltm.close()
+
+def _collection_names(path):
+    client = chromadb.PersistentClient(path=os.path.abspath(path))
+    try:
+        # Older ChromaDB releases list names, newer ones Collection objects
+        return [getattr(collection, "name", collection) for collection in client.list_collections()]
+    finally:
+        close = getattr(client, "close", None)
+        if close is not None:
+            close()
+
+def _disk_usage(path):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+def compact_store(user_id, page_size=500, **options):
+    """
+    Rewrite a user's store with only its live memories, dropping space left by deletes and
+    updates. Only run this while no process has the store open.
+    Args:
+        **options: LongTermMemory options of the store, e.g. its embedding_function.
+    Returns:
+        tuple: Bytes on disk before and after, and the number of memories copied.
+    """
+    path = store_path(user_id)
+    compacted = path + ".compact"
+    shutil.rmtree(compacted, ignore_errors=True)
+    before = _disk_usage(path)
+    count = 0
+    for name in _collection_names(path):
+        with _open_store(user_id, path, name, **options) as src, \
+                _open_store(user_id, compacted, name, **options) as dst:
+            for page in src.iter_all(page_size, ("documents", "metadatas", "embeddings")):
+                dst.put_many(page["ids"], page["documents"], page["metadatas"], page["embeddings"])
+                count += len(page["ids"])
+            _keep_high_water(dst, src.collection.metadata)
+    os.rename(path, path + ".bak")
+    os.rename(compacted, path)
+    shutil.rmtree(path + ".bak")
+    return before, _disk_usage(path), count
+
+def merge_store(src_path, user_id, page_size=500, **options) -> int:
+    """
+    Append every memory of another store directory (e.g. the legacy ./long_term_memory_db) to a
+    user's store. Merged memories get new ids, so they never collide with the user's own.
+    Args:
+        **options: LongTermMemory options of both stores, e.g. their embedding_function.
+    Returns:
+        int: Number of merged memories.
+    """
+    count = 0
+    for name in _collection_names(src_path):
+        with _open_store(None, src_path, name, **options) as src, \
+                _open_store(user_id, None, name, **options) as dst:
+            for page in src.iter_all(page_size, ("documents", "metadatas", "embeddings")):
+                ids = [dst.ids.allocate() for _ in page["ids"]]
+                dst.put_many(ids, page["documents"], page["metadatas"], page["embeddings"])
+                count += len(ids)
+    return count
+
+def migrate_to_shared(user_ids, shards=16, path=SHARED_STORE_PATH, page_size=500, **options) -> dict:
+    """
+    Copy per-directory user stores into the multi-tenant store, keeping each memory's id and
+    embedding. Re-running it is safe; the old directories are left in place.
+    Args:
+        **options: LongTermMemory options of the stores, e.g. their embedding_function.
+    Returns:
+        dict: user_id -> number of migrated memories.
+    """
+    counts = {}
+    for user_id in user_ids:
+        counts[user_id] = 0
+        for name in _collection_names(store_path(user_id)):
+            with _open_store(user_id, None, name, **options) as src, \
+                    _open_store(user_id, path, name, shared=True, shards=shards, **options) as dst:
+                for page in src.iter_all(page_size, ("documents", "metadatas", "embeddings")):
+                    dst.put_many(page["ids"], page["documents"], page["metadatas"], page["embeddings"])
+                    counts[user_id] += len(page["ids"])
+                _keep_high_water(dst, src.collection.metadata)
+    return counts
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(prog="python -m memory.archive",
+                                     description="Export, import, compact and merge long-term memory stores.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export = commands.add_parser("export", help="stream stores to a JSONL archive")
+    export.add_argument("-o", "--output", default="-", help="archive path ('.gz' compresses, '-' is stdout)")
+    export.add_argument("--user", action="append", help="user to export (repeatable); defaults to all")
+    export.add_argument("--no-embeddings", action="store_true", help="leave embeddings out; import re-embeds")
+    export.add_argument("--page-size", type=int, default=500)
+    export.add_argument("--shared", action="store_true", help="read from the shared store (needs --user)")
+    restore = commands.add_parser("import", help="load a JSONL archive into stores")
+    restore.add_argument("archive", help="archive path ('-' is stdin)")
+    restore.add_argument("--user", help="import everything into this user")
+    restore.add_argument("--batch-size", type=int, default=500)
+    restore.add_argument("--shared", action="store_true", help="write to the shared store")
+    compact = commands.add_parser("compact", help="rewrite stores without dead space (stop the app first)")
+    compact.add_argument("--user", action="append", help="user to compact (repeatable); defaults to all")
+    compact.add_argument("--page-size", type=int, default=500)
+    merge = commands.add_parser("merge", help="append another store directory to a user's store")
+    merge.add_argument("source", help="store directory, e.g. ./long_term_memory_db")
+    merge.add_argument("--into", required=True, help="user receiving the memories")
+    share = commands.add_parser("migrate-shared", help="copy per-user store directories into the shared store")
+    share.add_argument("--user", action="append", help="user to migrate (repeatable); defaults to all")
+    share.add_argument("--path", default=SHARED_STORE_PATH, help="shared store directory")
+    for command in (export, restore, share):
+        command.add_argument("--shards", type=int, default=16, help="shared store shards (must match LTM_SHARDS)")
+    args = parser.parse_args(argv)
+    open_memory = None
+    if getattr(args, "shared", False):
+        open_memory = functools.partial(_open_store, shared=True, shards=args.shards)
+
+    if args.command == "export":
+        if args.shared and not args.user:
+            parser.error("--shared export needs --user")
+        with open_archive(args.output, "w") as out:
+            count = export_users(args.user or list_users(), out, args.page_size, not args.no_embeddings, open_memory)
+        print(f"exported {count} memories", file=sys.stderr)
+    elif args.command == "import":
+        with open_archive(args.archive) as lines:
+            counts = import_lines(lines, open_memory, args.batch_size, args.user)
+        for user_id, count in counts.items():
+            print(f"{user_id}: imported {count} memories", file=sys.stderr)
+    elif args.command == "compact":
+        for user_id in args.user or list_users():
+            before, after, count = compact_store(user_id, args.page_size)
+            print(f"{user_id}: {count} memories, {before / 2 ** 20:.1f} MB -> {after / 2 ** 20:.1f} MB", file=sys.stderr)
+    elif args.command == "merge":
+        print(f"merged {merge_store(args.source, args.into)} memories into {args.into}", file=sys.stderr)
+    elif args.command == "migrate-shared":
+        counts = migrate_to_shared(args.user or list_users(), args.shards, args.path)
+        print(f"migrated {sum(counts.values())} memories of {len(counts)} users to {args.path}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
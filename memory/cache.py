@@ -0,0 +1,132 @@
+import copy
+import itertools
+import json
+import threading
+import weakref
+from collections import OrderedDict
+from instrumentation import span
+
+def normalize_query(text) -> str:
+    """
+    Cache key for a query: case-folded with whitespace collapsed, so trivially different
+    spellings of the same lookup share one embedding and one result.
+    """
+    return " ".join(str(text).split()).casefold()
+
+class RetrievalCache:
+    def __init__(self, max_embeddings=4096, max_results=1024):
+        """
+        Process-wide, thread-safe cache in front of memory retrieval, in two LRU layers:
+        query embeddings keyed by normalized query text, and query results keyed by
+        (scope, generation, query, n_results, filter). A scope is one memory (e.g. a user's
+        long-term store); every write to it bumps its generation, so results cached before the
+        write are never served again and age out of the LRU.
+        Args:
+            max_embeddings (int, optional): Query embeddings kept. Defaults to 4096.
+            max_results (int, optional): Query results kept. Defaults to 1024.
+        """
+        self.max_embeddings = max_embeddings
+        self.max_results = max_results
+        self._embeddings = OrderedDict()  # (embedding function token, query) -> embedding
+        # Token per live embedding function; unlike id(), never reused by a later object
+        self._functions = weakref.WeakKeyDictionary()
+        self._tokens = itertools.count()
+        self._results = OrderedDict()     # (scope, generation, query, n_results, filter) -> results
+        self._generations = {}            # scope -> generation
+        self._lock = threading.Lock()
+        self._default_embedding = None
+        self.embedding_hits = 0
+        self.embedding_misses = 0
+        self.result_hits = 0
+        self.result_misses = 0
+        self.invalidations = 0
+
+    def generation(self, scope) -> int:
+        with self._lock:
+            return self._generations.get(scope, 0)
+
+    def invalidate(self, scope):
+        """
+        Marks everything cached for a scope as stale; call after each write to it.
+        """
+        with self._lock:
+            self._generations[scope] = self._generations.get(scope, 0) + 1
+            self.invalidations += 1
+
+    def embed(self, embedding_function, query):
+        """
+        Embeds a query once per normalized text and embedding function. The query is embedded
+        as given; the normalized text is only the cache key.
+        Args:
+            embedding_function: The collection's embedding function, or None for ChromaDB's default model.
+            query (str): The query text.
+        """
+        if embedding_function is None:
+            embedding_function = self._default()
+        embed = getattr(embedding_function, "embed_query", embedding_function)
+        with self._lock:
+            try:
+                token = self._functions.get(embedding_function)
+                if token is None:
+                    token = self._functions[embedding_function] = next(self._tokens)
+            except TypeError:  # not weak-referenceable, so it cannot be keyed safely
+                token = None
+            key = (token, normalize_query(query))
+            embedding = self._embeddings.get(key) if token is not None else None
+            if embedding is not None:
+                self._embeddings.move_to_end(key)
+                self.embedding_hits += 1
+                return embedding
+            self.embedding_misses += 1
+        # Embed outside the lock; a concurrent miss on the same text just embeds it twice
+        with span("embed"):
+            embedding = embed(input=[str(query)])[0]
+        if token is None:
+            return embedding
+        with self._lock:
+            self._embeddings[key] = embedding
+            self._embeddings.move_to_end(key)
+            while len(self._embeddings) > self.max_embeddings:
+                self._embeddings.popitem(last=False)
+        return embedding
+
+    def query(self, scope, collection, embedding_function, query, n_results=10, where=None):
+        """
+        collection.query for one query text, served from the cache when the scope has not
+        been written to since the same query was last run.
+        Returns:
+            dict: The query results (a private copy the caller may modify).
+        """
+        # Read the generation before querying: a write that lands meanwhile makes this result stale
+        generation = self.generation(scope)
+        key = (scope, generation, normalize_query(query), n_results,
+               json.dumps(where, sort_keys=True) if where else None)
+        with self._lock:
+            results = self._results.get(key)
+            if results is not None:
+                self._results.move_to_end(key)
+                self.result_hits += 1
+                return copy.deepcopy(results)
+            self.result_misses += 1
+        embedding = self.embed(embedding_function, query)
+        results = collection.query(query_embeddings=[embedding], n_results=n_results, where=where)
+        with self._lock:
+            self._results[key] = copy.deepcopy(results)
+            while len(self._results) > self.max_results:
+                self._results.popitem(last=False)
+        return results
+
+    def _default(self):
+        with self._lock:
+            if self._default_embedding is None:
+                # Same model ChromaDB uses for collections created without an embedding function
+                from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
+                self._default_embedding = DefaultEmbeddingFunction()
+            return self._default_embedding
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"embedding_hits": self.embedding_hits, "embedding_misses": self.embedding_misses,
+                    "result_hits": self.result_hits, "result_misses": self.result_misses,
+                    "invalidations": self.invalidations,
+                    "embeddings": len(self._embeddings), "results": len(self._results)}
@@ -0,0 +1,79 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from .cache import normalize_query
+
+def score(distance, timestamp, now, recency_weight=0.3, half_life=7 * 86400):
+    """
+    Rank of one retrieved memory: its similarity to the query, discounted by age.
+    Similarity is 1 / (1 + distance). The recency part halves every half_life seconds;
+    memories without a timestamp (e.g. migrated ones) count as old.
+    """
+    similarity = 1.0 / (1.0 + max(distance, 0.0))
+    recency = 0.5 ** (max(now - timestamp, 0.0) / half_life) if timestamp else 0.0
+    return similarity * (1.0 - recency_weight + recency_weight * recency)
+
+def merge_results(results_by_source, n_results=10, now=None, recency_weight=0.3, half_life=7 * 86400):
+    """
+    Merge raw Chroma query results from several memories into one ranked context list.
+    The same utterance found in several memories (e.g. stored in both working and long-term
+    memory) appears once, with its best score and every source it came from.
+    Args:
+        results_by_source (dict): Source name -> collection.query result for one query text.
+        n_results (int, optional): Length of the merged list. Defaults to 10.
+        now (float, optional): Epoch seconds to measure age against. Defaults to now.
+    Returns:
+        list: Dicts with 'document', 'metadata', 'distance', 'score', 'source' (the best one)
+            and 'sources', highest score first.
+    """
+    now = time.time() if now is None else now
+    merged = {}
+    for source, results in results_by_source.items():
+        distances = results.get("distances") or [[]]
+        for document, metadata, distance in zip(results["documents"][0], results["metadatas"][0], distances[0]):
+            metadata = metadata or {}
+            item_score = score(distance, metadata.get("timestamp"), now, recency_weight, half_life)
+            key = normalize_query(document)
+            item = merged.get(key)
+            if item is None:
+                merged[key] = {"document": document, "metadata": metadata, "distance": distance,
+                               "score": item_score, "source": source, "sources": [source]}
+                continue
+            item["sources"].append(source)
+            if item_score > item["score"]:
+                item.update(metadata=metadata, distance=distance, score=item_score, source=source)
+    return sorted(merged.values(), key=lambda item: item["score"], reverse=True)[:n_results]
+
+def gather_context(sources, query, n_results=10, deadline=1.0, executor=None, **filters):
+    """
+    Query several memories in parallel and merge what comes back within the deadline.
+    Latency is that of the slowest source (capped by the deadline), not the sum of all sources.
+    Sources that miss the deadline or fail are left out of the result.
+    Args:
+        sources (dict): Source name -> memory with a retrieve(query, n_results, **filters) method.
+        query (str): The query text.
+        n_results (int, optional): Results per source and in the merged list. Defaults to 10.
+        deadline (float, optional): Seconds to wait for the sources. Defaults to 1.0.
+        executor (Executor, optional): Pool to run the queries on. Defaults to a pool for this call.
+        **filters: Passed to every retrieve (see build_filter).
+    Returns:
+        tuple: The merged context list (see merge_results) and the names of the sources left out.
+    """
+    own_executor = executor is None
+    if own_executor:
+        executor = ThreadPoolExecutor(max_workers=max(1, len(sources)), thread_name_prefix="context")
+    try:
+        futures = {executor.submit(memory.retrieve, query, n_results, **filters): name
+                   for name, memory in sources.items()}
+        done, _ = wait(futures, timeout=deadline)
+        results, missing = {}, []
+        for future, name in futures.items():
+            if future in done and future.exception() is None:
+                results[name] = future.result()
+            else:
+                missing.append(name)
+        return merge_results(results, n_results), missing
+    finally:
+        if own_executor:
+            # Don't wait for sources that missed the deadline
+            executor.shutdown(wait=False)
@@ -0,0 +1,57 @@
+import threading
+
+class IdAllocator:
+    def __init__(self, collection, persist=False, block_size=1000):
+        """
+        Monotonic, collision-free document ids for one collection.
+        The starting point is read once when the allocator is created: from the persisted
+        high-water mark if there is one, otherwise from the largest numeric id already stored.
+        Args:
+            collection: The ChromaDB collection the ids are for.
+            persist (bool, optional): Reserve ids in blocks and record the end of each block in the
+                collection metadata, so ids are never reused after a restart or a delete. Defaults to False.
+            block_size (int, optional): Ids reserved per metadata write. Defaults to 1000.
+        """
+        self.collection = collection
+        self.persist = persist
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        metadata = collection.metadata or {}
+        if persist and "next_id" in metadata:
+            self._next = int(metadata["next_id"])
+        else:
+            # One-off scan (ids only, no documents) for stores written before the allocator existed
+            ids = collection.get(include=[])['ids']
+            self._next = max((int(i) for i in ids if i.isdigit()), default=0) + 1
+        self._limit = self._next if persist else None
+
+    def allocate(self) -> str:
+        """
+        Returns the next unused id.
+        """
+        with self._lock:
+            if self._limit is not None and self._next >= self._limit:
+                self._limit = self._next + self.block_size
+                # Keep any other collection metadata when recording the new high-water mark
+                metadata = dict(self.collection.metadata or {})
+                metadata["next_id"] = self._limit
+                self.collection.modify(metadata=metadata)
+            id = self._next
+            self._next += 1
+            return str(id)
+
+    def advance_past(self, ids):
+        """
+        Make sure future ids come after the given ones, e.g. after importing documents with their
+        original ids. A persisted high-water mark is moved right away.
+        """
+        top = max((int(i) for i in ids if str(i).isdigit()), default=0) + 1
+        with self._lock:
+            if top <= self._next:
+                return
+            self._next = top
+            if self._limit is not None and self._limit < top:
+                self._limit = top + self.block_size
+                metadata = dict(self.collection.metadata or {})
+                metadata["next_id"] = self._limit
+                self.collection.modify(metadata=metadata)
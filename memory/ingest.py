@@ -0,0 +1,192 @@
+import atexit
+import queue
+import threading
+import time
+from collections import deque
+from instrumentation import count, observe
+
+class IngestionQueue:
+    def __init__(self, max_batch=64, max_delay=0.05, max_pending=10000):
+        """
+        Write-behind queue that coalesces memory stores into batched collection.add calls
+        on a background thread.
+        A batch is written once it holds max_batch documents or its oldest document has waited
+        max_delay seconds, whichever comes first. Everything still queued is written on close()
+        and at interpreter exit.
+        Args:
+            max_batch (int, optional): Largest batch per flush. Defaults to 64.
+            max_delay (float, optional): Longest time a document waits before being written. Defaults to 0.05.
+            max_pending (int, optional): Queue bound; store() only blocks when it is full. Defaults to 10000.
+        """
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._queue = queue.Queue(max_pending)
+        self._cond = threading.Condition()
+        self._enqueued = 0     # sequence number of the last queued document
+        self._written = 0      # sequence number up to which everything is written (or failed)
+        self._pending = {}     # id(collection) -> documents queued but not yet written
+        self._flush_requested = threading.Event()
+        self._closed = False
+        self._metrics = {"batches": 0, "documents": 0, "errors": 0, "last_error": None,
+                         "failed_documents": 0, "flush_ms_total": 0.0, "flush_ms_max": 0.0}
+        # (collection name, doc id, error) of the most recent documents that could not be written
+        self._failures = deque(maxlen=100)
+        self._thread = threading.Thread(target=self._run, name="memory-ingest", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def put(self, collection, doc_id, document, metadata=None):
+        """
+        Queue one document for collection.add; returns without waiting for the write.
+        """
+        if self._closed:
+            raise RuntimeError("IngestionQueue is closed")
+        with self._cond:
+            self._enqueued += 1
+            seq = self._enqueued
+            self._pending[id(collection)] = self._pending.get(id(collection), 0) + 1
+        self._queue.put((seq, collection, doc_id, document, metadata))
+
+    def pending(self, collection=None) -> int:
+        with self._cond:
+            if collection is None:
+                return self._enqueued - self._written
+            return self._pending.get(id(collection), 0)
+
+    def flush(self, collection=None, timeout=None) -> bool:
+        """
+        Wait until every document queued before this call is written.
+        With a collection, returns at once if nothing is pending for it (read-your-writes
+        for retrievals without paying for other users' writes).
+        Returns False if the timeout expired first.
+        """
+        with self._cond:
+            if collection is not None and not self._pending.get(id(collection)):
+                return True
+            target = self._enqueued
+            if self._written >= target:
+                return True
+            self._flush_requested.set()
+            return self._cond.wait_for(lambda: self._written >= target, timeout)
+
+    def close(self):
+        """
+        Write everything still queued and stop the background thread.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+
+    def failures(self) -> list:
+        """
+        The most recent documents that could not be written, as (collection name, doc id, error).
+        """
+        with self._cond:
+            return list(self._failures)
+
+    def metrics(self) -> dict:
+        with self._cond:
+            metrics = dict(self._metrics)
+            metrics["queue_depth"] = self._enqueued - self._written
+        batches = metrics["batches"]
+        metrics["flush_ms_avg"] = metrics["flush_ms_total"] / batches if batches else 0.0
+        return metrics
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.max_batch and not self._flush_requested.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=min(remaining, 0.005))
+                except queue.Empty:
+                    continue
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            # Take whatever else is already queued when a flush was requested
+            while self._flush_requested.is_set() and len(batch) < self.max_batch:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._write(batch)
+        # Drain anything queued behind the stop marker
+        remaining = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                remaining.append(item)
+        for start in range(0, len(remaining), self.max_batch):
+            self._write(remaining[start:start + self.max_batch])
+
+    def _write(self, batch):
+        # Group by collection so each collection gets one add per batch
+        groups = {}
+        for seq, collection, doc_id, document, metadata in batch:
+            group = groups.setdefault(id(collection), (collection, [], [], []))
+            group[1].append(doc_id)
+            group[2].append(document)
+            group[3].append(metadata)
+        start = time.perf_counter()
+        error = None
+        failed = []
+        for collection, ids, documents, metadatas in groups.values():
+            try:
+                self._add(collection, ids, documents, metadatas)
+            except Exception as e:
+                error = e
+                # A group can hold several users' writes; one bad document must not drop the rest
+                for item in zip(ids, documents, metadatas):
+                    try:
+                        self._add(collection, *([value] for value in item))
+                    except Exception as item_error:
+                        failed.append((getattr(collection, "name", None), item[0], str(item_error)))
+        for name, doc_id, message in failed:
+            print(f"⚠️ Memory write of {doc_id} to {name} failed: {message}")
+        # Embedding and insert of one batch, off the request path
+        observe("ingest.write", time.perf_counter() - start)
+        count("ingest.items", len(batch))
+        elapsed = (time.perf_counter() - start) * 1000.0
+        with self._cond:
+            for key, (collection, ids, _, _) in groups.items():
+                self._pending[key] -= len(ids)
+                if not self._pending[key]:
+                    del self._pending[key]
+            self._written = max(self._written, max(item[0] for item in batch))
+            self._metrics["batches"] += 1
+            self._metrics["documents"] += len(batch)
+            self._metrics["flush_ms_total"] += elapsed
+            self._metrics["flush_ms_max"] = max(self._metrics["flush_ms_max"], elapsed)
+            if error is not None:
+                self._metrics["errors"] += 1
+                self._metrics["last_error"] = str(error)
+            self._metrics["failed_documents"] += len(failed)
+            self._failures.extend(failed)
+            if self._queue.empty():
+                self._flush_requested.clear()
+            self._cond.notify_all()
+
+    @staticmethod
+    def _add(collection, ids, documents, metadatas):
+        if any(metadata is not None for metadata in metadatas):
+            collection.add(ids=ids, documents=documents, metadatas=metadatas)
+        else:
+            collection.add(ids=ids, documents=documents)
@@ -1,58 +1,257 @@
+import hashlib
+import os
+import threading
 import chromadb
 from chromadb.config import Settings
+from .ids import IdAllocator
+from .records import MemoryRecord, build_filter
+from instrumentation import timed
+
+# Store directory used by every user in shared mode
+SHARED_STORE_PATH = "./long_term_memory_shared"
+
+def store_path(user_id):
+    """
+    Directory of a user's persistent store.
+    """
+    return f"./long_term_memory_db_{user_id}"
+
+def shard_of(user_id, shards) -> int:
+    """
+    Stable shard number of a user (the same in every process, unlike hash()).
+    """
+    return int.from_bytes(hashlib.sha1(str(user_id).encode()).digest()[:8], "big") % shards
+
+# Handles of users in one shard share its id allocator, so their ids never overlap
+_shard_ids = {}
+_shard_ids_lock = threading.Lock()
+
+def _shard_allocator(path, collection):
+    with _shard_ids_lock:
+        key = (path, collection.name)
+        if key not in _shard_ids:
+            _shard_ids[key] = IdAllocator(collection, persist=True)
+        return _shard_ids[key]
 
 class LongTermMemory:
-    def __init__(self, user_id="default", collection_name="long_term_memory"):
+    def __init__(self, user_id="default", collection_name="long_term_memory", embedding_function=None, ingest=None,
+                 cache=None, path=None, shared=False, shards=16):
         """
         Initializes the LongTermMemory with a ChromaDB persistent client and a collection per user.
+        In shared mode all users live in one store instead: each user is hashed to one of `shards`
+        collections, records carry the user id, and every read is filtered on it and every write
+        namespaced by it, so one tenant can never see or change another's memories.
         Args:
             user_id (str): The ID of the user. Defaults to "default".
             collection_name (str): The name of the collection to use. Defaults to "long_term_memory".
+            embedding_function (optional): ChromaDB embedding function. Defaults to ChromaDB's default model.
+            ingest (IngestionQueue, optional): Write-behind queue for store(). Defaults to None (synchronous writes).
+            cache (RetrievalCache, optional): Shared query embedding and result cache for retrieve().
+                Defaults to None (every retrieve queries the store).
+            path (str, optional): Store directory. Defaults to store_path(user_id), or SHARED_STORE_PATH when shared.
+            shared (bool, optional): Keep this user in the multi-tenant store. Defaults to False.
+            shards (int, optional): Collections users are spread over in shared mode; 1 partitions a
+                single collection by user metadata alone. Defaults to 16.
         """
         self.user_id = user_id
-        self.client = chromadb.PersistentClient(path=f"./long_term_memory_db_{user_id}")
-        self.collection = self.client.get_or_create_collection(name=collection_name)
+        self.ingest = ingest
+        self.embedding_function = embedding_function
+        self.cache = cache
+        self.scope = ("ltm", user_id, collection_name)
+        self.shared = shared
+        if shared:
+            self.path = SHARED_STORE_PATH if path is None else path
+            if shards > 1:
+                collection_name = f"{collection_name}_{shard_of(user_id, shards):03d}"
+        else:
+            self.path = store_path(user_id) if path is None else path
+        # ChromaDB reuses one system per path string, so shared-mode handles are cheap to open;
+        # made absolute so a later change of working directory cannot hand back another store's
+        self.path = os.path.abspath(self.path)
+        self.client = chromadb.PersistentClient(path=self.path)
+        if embedding_function is None:
+            self.collection = self.client.get_or_create_collection(name=collection_name)
+        else:
+            self.collection = self.client.get_or_create_collection(name=collection_name, embedding_function=embedding_function)
+        # Ids survive restarts and deletes, so they are persisted with the collection
+        if shared:
+            self.ids = _shard_allocator(self.path, self.collection)
+        else:
+            self.ids = IdAllocator(self.collection, persist=True)
 
-    def store(self, knowledge, id=None):
+    def _doc_id(self, id):
+        # Shared-mode ids are namespaced by user, so imported ids cannot collide across tenants
+        return f"{self.user_id}:{id}" if self.shared else id
+
+    def _metadata(self, metadata):
+        if not self.shared:
+            return metadata
+        return {**(metadata or {}), "user_id": str(self.user_id)}
+
+    def _where(self, where=None, **filters):
+        clause = build_filter(where=where, **filters)
+        if not self.shared:
+            return clause
+        tenant = {"user_id": str(self.user_id)}
+        return tenant if clause is None else {"$and": [tenant, clause]}
+
+    def _local_ids(self, results):
+        # Strip the user namespace from get (flat) and query (nested) results
+        if self.shared:
+            prefix = len(f"{self.user_id}:")
+            ids = results["ids"]
+            if ids and isinstance(ids[0], list):
+                results["ids"] = [[i[prefix:] for i in row] for row in ids]
+            else:
+                results["ids"] = [i[prefix:] for i in ids]
+        return results
+
+    @timed("ltm.store")
+    def store(self, knowledge, id=None, session_id=None, timestamp=None):
         """
         Stores knowledge in the long term memory.
         Args:
-            knowledge (str): The knowledge to store.
+            knowledge (dict | str): The NLU output (or plain text) to store.
             id (str, optional): The ID of the data. Defaults to None.
+            session_id (str, optional): The session the knowledge came from. Defaults to None.
+            timestamp (float, optional): Epoch seconds. Defaults to now.
         """
-        # knowledge as string
-        text = str(knowledge)
+        # The transcript is embedded; sentiment, emotions and entities become filterable metadata
+        record = MemoryRecord.from_knowledge(knowledge, session_id, timestamp)
         if id is None:
-            id = str(len(self.collection.get()['ids']) + 1)
-        self.collection.add(documents=[text], ids=[id])
+            id = self.ids.allocate()
+        else:
+            # Allocated ids must never land on an explicit one
+            self.ids.advance_past([id])
+        metadata = self._metadata(record.to_metadata())
+        if self.ingest is not None:
+            self.ingest.put(self.collection, self._doc_id(id), record.document, metadata)
+        else:
+            self.collection.add(documents=[record.document], metadatas=[metadata], ids=[self._doc_id(id)])
+        if self.cache is not None:
+            self.cache.invalidate(self.scope)
+
+    def flush(self):
+        """
+        Waits until queued writes for this memory are in the collection (read-your-writes).
+        """
+        if self.ingest is not None:
+            self.ingest.flush(self.collection)
 
-    def retrieve(self, query, n_results=10):
+    @timed("ltm.retrieve")
+    def retrieve(self, query, n_results=10, where=None, **filters):
         """
         Retrieves data from the long term memory based on a query.
         Args:
             query (str): The query to use.
             n_results (int, optional): The number of results to return. Defaults to 10.
+            where (dict, optional): Raw ChromaDB metadata filter.
+            **filters: mood, emotion, since, until or session_id, applied inside the store (see build_filter).
         Returns:
             list: The results of the query.
         """
-        results = self.collection.query(query_texts=[query], n_results=n_results)
-        return results
+        self.flush()
+        where = self._where(where, **filters)
+        if self.cache is not None:
+            results = self.cache.query(self.scope, self.collection, self.embedding_function, query, n_results, where)
+        else:
+            results = self.collection.query(query_texts=[query], n_results=n_results, where=where)
+        return self._local_ids(results)
+
+    def find(self, limit=None, where=None, **filters):
+        """
+        Retrieves memories by metadata alone, e.g. find(mood="negative", since=time.time() - 7 * 86400).
+        Args:
+            limit (int, optional): Maximum number of results. Defaults to no limit.
+            where (dict, optional): Raw ChromaDB metadata filter.
+            **filters: mood, emotion, since, until or session_id (see build_filter).
+        Returns:
+            dict: 'ids', 'documents' and 'metadatas' of the matching memories.
+        """
+        self.flush()
+        return self._local_ids(self.collection.get(where=self._where(where, **filters), limit=limit,
+                                                   include=["documents", "metadatas"]))
 
     def update(self, id, new_knowledge):
         """
         Updates knowledge in the long term memory.
         Args:
             id (str): The ID of the data to update.
-            new_knowledge (str): The new knowledge to store.
+            new_knowledge (dict | str): The new knowledge to store.
         """
         # ChromaDB doesn't support direct update, so delete and add
-        self.collection.delete(ids=[id])
+        self.flush()
+        self.collection.delete(ids=[self._doc_id(id)])
+        # store() invalidates cached results for this memory
         self.store(new_knowledge, id)
 
+    def delete(self, id):
+        """
+        Deletes knowledge from the long term memory.
+        Args:
+            id (str): The ID of the data to delete.
+        """
+        self.flush()
+        self.collection.delete(ids=[self._doc_id(id)])
+        if self.cache is not None:
+            self.cache.invalidate(self.scope)
+
+    def close(self):
+        """
+        Releases the underlying ChromaDB client (SQLite connections and index handles).
+        """
+        self.flush()
+        if self.shared:
+            # Every user's handle shares the client; it lives as long as the process
+            return
+        # Older ChromaDB releases have no close(); their clients are released on garbage collection
+        close = getattr(self.client, "close", None)
+        if close is not None:
+            close()
+
+    def put_many(self, ids, documents, metadatas=None, embeddings=None):
+        """
+        Writes a batch of already-built records as is (e.g. from an export), replacing any with the same id.
+        Args:
+            ids (list): Document ids; later store() calls allocate ids after them.
+            documents (list): The documents.
+            metadatas (list, optional): Their metadata.
+            embeddings (list, optional): Their embeddings; computed by the collection when omitted.
+        """
+        self.flush()
+        if self.shared:
+            metadatas = [self._metadata(metadata) for metadata in (metadatas or [None] * len(ids))]
+        self.collection.upsert(ids=[self._doc_id(id) for id in ids], documents=documents,
+                               metadatas=metadatas, embeddings=embeddings)
+        self.ids.advance_past(ids)
+        if self.cache is not None:
+            self.cache.invalidate(self.scope)
+
+    def iter_all(self, page_size=500, include=("documents", "metadatas")):
+        """
+        Streams all of this user's memories page by page, so memory use is bounded by page_size
+        whatever the collection size.
+        Args:
+            page_size (int, optional): Documents per page. Defaults to 500.
+            include (tuple, optional): Fields to fetch, as for collection.get. Defaults to documents and metadatas.
+        Yields:
+            dict: One collection.get page with 'ids' and the included fields.
+        """
+        self.flush()
+        offset = 0
+        while True:
+            page = self.collection.get(where=self._where(), include=list(include), limit=page_size, offset=offset)
+            if not page["ids"]:
+                return
+            yield self._local_ids(page)
+            offset += len(page["ids"])
+
     def get_all(self):
         """
         Retrieves all stored information from the collection for display.
+        Loads the whole collection at once; use iter_all for large stores.
         Returns:
             dict: A dictionary containing all 'ids', 'documents', and 'metadatas'.
         """
-        return self.collection.get()
+        self.flush()
+        return self._local_ids(self.collection.get(where=self._where()))
@@ -0,0 +1,191 @@
+import ast
+import json
+import time
+from dataclasses import dataclass, field
+
+# Version of the metadata layout written by MemoryRecord
+SCHEMA_VERSION = 1
+
+EMOTIONS = ("happy", "sad", "angry", "fear", "surprise", "disgust", "neutral")
+
+# Salience floor for a memory with any non-neutral emotion, however mild its sentiment
+EMOTION_SALIENCE = 0.5
+
+@dataclass
+class MemoryRecord:
+    """
+    One stored memory: the transcript is the embedded document and everything else is
+    Chroma metadata, so retrieval can filter on it inside the store.
+    """
+    document: str
+    emotions: list = field(default_factory=list)
+    polarity: float | None = None
+    subjectivity: float | None = None
+    compound: float | None = None
+    entities: list = field(default_factory=list)
+    timestamp: float = field(default_factory=time.time)
+    session_id: str | None = None
+    pitch: float | None = None
+
+    @classmethod
+    def from_knowledge(cls, knowledge, session_id=None, timestamp=None):
+        """
+        Build a record from an nlu_process output dict or plain text; records pass through unchanged.
+        """
+        if isinstance(knowledge, cls):
+            return knowledge
+        timestamp = time.time() if timestamp is None else timestamp
+        if not isinstance(knowledge, dict):
+            return cls(str(knowledge), timestamp=timestamp, session_id=session_id)
+        sentiment = knowledge.get("sentiment") or {}
+        # Without a transcript the dict itself is the memory, so it is still searchable
+        document = knowledge["transcript"] if "transcript" in knowledge else json.dumps(knowledge, default=str)
+        return cls(
+            document=document,
+            emotions=list(knowledge.get("emotions") or []),
+            polarity=sentiment.get("polarity"),
+            subjectivity=sentiment.get("subjectivity"),
+            compound=sentiment.get("compound_score"),
+            entities=list(knowledge.get("entities") or []),
+            timestamp=timestamp,
+            session_id=session_id,
+            pitch=knowledge.get("pitch"),
+        )
+
+    @property
+    def mood(self):
+        # Same thresholds analyze_tone uses for overall_mood
+        if self.polarity is None:
+            return None
+        return "positive" if self.polarity > 0 else "negative" if self.polarity < 0 else "neutral"
+
+    def to_metadata(self) -> dict:
+        """
+        Flat Chroma metadata (Chroma only stores str/int/float/bool values, never None).
+        """
+        metadata = {"schema": SCHEMA_VERSION, "timestamp": float(self.timestamp)}
+        if self.session_id is not None:
+            metadata["session_id"] = str(self.session_id)
+        for key in ("polarity", "subjectivity", "compound", "pitch"):
+            value = getattr(self, key)
+            if value is not None:
+                metadata[key] = float(value)
+        if self.mood is not None:
+            metadata["mood"] = self.mood
+        if self.emotions:
+            metadata["emotions"] = ",".join(self.emotions)
+            # One flag per emotion so filters can use plain equality
+            for emotion in self.emotions:
+                metadata[f"emotion_{emotion}"] = True
+        if self.entities:
+            metadata["entities"] = json.dumps(self.entities)
+        return metadata
+
+    @classmethod
+    def from_chroma(cls, document, metadata):
+        metadata = metadata or {}
+        return cls(
+            document=document,
+            emotions=[e for e in metadata.get("emotions", "").split(",") if e],
+            polarity=metadata.get("polarity"),
+            subjectivity=metadata.get("subjectivity"),
+            compound=metadata.get("compound"),
+            entities=json.loads(metadata.get("entities", "[]")),
+            timestamp=metadata.get("timestamp", 0.0),
+            session_id=metadata.get("session_id"),
+            pitch=metadata.get("pitch"),
+        )
+
+def salience(record) -> float:
+    """
+    How worth keeping a memory is, in [0, 1]: its strongest sentiment magnitude, raised to
+    EMOTION_SALIENCE when a non-neutral emotion was detected.
+    """
+    score = max((abs(v) for v in (record.compound, record.polarity) if v is not None), default=0.0)
+    if any(emotion != "neutral" for emotion in record.emotions):
+        score = max(score, EMOTION_SALIENCE)
+    return min(score, 1.0)
+
+def build_filter(mood=None, emotion=None, since=None, until=None, session_id=None, where=None):
+    """
+    Build a Chroma `where` clause from common memory filters.
+    Args:
+        mood (str, optional): "positive", "negative" or "neutral".
+        emotion (str, optional): Only records with this emotion.
+        since (float, optional): Earliest timestamp (epoch seconds), inclusive.
+        until (float, optional): Latest timestamp (epoch seconds), exclusive.
+        session_id (str, optional): Only records from this session.
+        where (dict, optional): Extra raw Chroma clause to AND in.
+    Returns:
+        dict | None: The clause, or None when there is nothing to filter on.
+    """
+    clauses = []
+    if mood is not None:
+        clauses.append({"mood": mood})
+    if emotion is not None:
+        clauses.append({f"emotion_{emotion}": True})
+    if since is not None:
+        clauses.append({"timestamp": {"$gte": float(since)}})
+    if until is not None:
+        clauses.append({"timestamp": {"$lt": float(until)}})
+    if session_id is not None:
+        clauses.append({"session_id": str(session_id)})
+    if where:
+        clauses.append(where)
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+def parse_legacy_document(document):
+    """
+    Recover the knowledge stored by the old `str(nlu_output)` scheme; plain text is returned as is.
+    """
+    if document and document.startswith("{"):
+        try:
+            value = ast.literal_eval(document)
+        except (ValueError, SyntaxError):
+            return document
+        if isinstance(value, dict):
+            return value
+    return document
+
+def migrate_collection(collection, batch_size=500) -> int:
+    """
+    Rewrite legacy `str(dict)` documents of a collection as MemoryRecords, in pages.
+    Records that already carry a schema version are left alone. The original store time is
+    unknown, so migrated records have no timestamp and are skipped by time filters.
+    Returns:
+        int: Number of migrated documents.
+    """
+    migrated = 0
+    offset = 0
+    while True:
+        page = collection.get(include=["documents", "metadatas"], limit=batch_size, offset=offset)
+        if not page["ids"]:
+            return migrated
+        ids, documents, metadatas = [], [], []
+        for doc_id, document, metadata in zip(page["ids"], page["documents"], page["metadatas"]):
+            if metadata and "schema" in metadata:
+                continue
+            record = MemoryRecord.from_knowledge(parse_legacy_document(document))
+            metadata = record.to_metadata()
+            del metadata["timestamp"]
+            metadata["migrated"] = True
+            ids.append(doc_id)
+            documents.append(record.document)
+            metadatas.append(metadata)
+        if ids:
+            collection.update(ids=ids, documents=documents, metadatas=metadatas)
+            migrated += len(ids)
+        offset += batch_size
+
+if __name__ == "__main__":
+    # Migrate every per-user store in the working directory
+    import glob
+    import chromadb
+    for path in sorted(glob.glob("./long_term_memory_db*")):
+        client = chromadb.PersistentClient(path=path)
+        for collection in client.list_collections():
+            # Older ChromaDB releases list names, newer ones Collection objects
+            collection = client.get_collection(getattr(collection, "name", collection))
+            print(f"{path}/{collection.name}: migrated {migrate_collection(collection)} documents")
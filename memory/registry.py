@@ -0,0 +1,102 @@
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from .long_term_memory import LongTermMemory
+
+class MemoryRegistry:
+    def __init__(self, factory=LongTermMemory, capacity=64):
+        """
+        Process-wide, thread-safe cache of open memory handles (per user or per session) with LRU eviction.
+        Args:
+            factory (callable): Called as factory(key) to open a handle, e.g. with a user id. Defaults to LongTermMemory.
+            capacity (int, optional): Maximum number of open handles. Defaults to 64.
+        """
+        self.factory = factory
+        self.capacity = capacity
+        self._entries = OrderedDict()  # key -> {"handle", "leases", "evicted"}
+        self._opening = {}             # key -> lock held while that store is being opened
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @contextmanager
+    def lease(self, key):
+        """
+        Borrow the handle for a key (e.g. a user id), opening it on first use.
+        A handle evicted while leased is closed only once its last lease ends.
+        """
+        entry = self._acquire(key)
+        try:
+            yield entry["handle"]
+        finally:
+            with self._lock:
+                entry["leases"] -= 1
+                close = entry["evicted"] and entry["leases"] == 0
+            if close:
+                entry["handle"].close()
+
+    def _acquire(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                entry["leases"] += 1
+                self.hits += 1
+                return entry
+            opening = self._opening.setdefault(key, threading.Lock())
+
+        # Open outside the registry lock so a slow open only blocks requests for the same key
+        with opening:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    entry["leases"] += 1
+                    self.hits += 1
+                    return entry
+            handle = self.factory(key)
+            with self._lock:
+                if self._opening.get(key) is opening:
+                    del self._opening[key]
+                entry = self._entries.get(key)
+                if entry is not None:
+                    # Another opener for the same key won the race; keep its handle
+                    self._entries.move_to_end(key)
+                    entry["leases"] += 1
+                    to_close = [handle]
+                else:
+                    entry = {"handle": handle, "leases": 1, "evicted": False}
+                    self._entries[key] = entry
+                    to_close = self._evict()
+                self.misses += 1
+        for handle in to_close:
+            handle.close()
+        return entry
+
+    def _evict(self):
+        # Caller holds self._lock; returns idle handles to close once the lock is released
+        to_close = []
+        while len(self._entries) > self.capacity:
+            _, entry = self._entries.popitem(last=False)
+            entry["evicted"] = True
+            self.evictions += 1
+            if entry["leases"] == 0:
+                to_close.append(entry["handle"])
+        return to_close
+
+    def close_all(self):
+        """
+        Close every idle handle and mark leased ones to close when released.
+        """
+        with self._lock:
+            capacity, self.capacity = self.capacity, 0
+            to_close = self._evict()
+            self.capacity = capacity
+        for handle in to_close:
+            handle.close()
+
+    def stats(self):
+        with self._lock:
+            return {"open": len(self._entries), "capacity": self.capacity,
+                    "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
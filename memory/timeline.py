@@ -0,0 +1,276 @@
+import hashlib
+import math
+import os
+import threading
+import numpy as np
+try:
+    import fcntl
+except ImportError:  # Windows: appends from other processes are not serialized
+    fcntl = None
+from .records import EMOTIONS, MemoryRecord
+from instrumentation import timed
+
+# One stored analysis: emotions are a bit mask over EMOTIONS, missing values are NaN
+EVENT_DTYPE = np.dtype([("timestamp", "<f8"), ("polarity", "<f4"), ("compound", "<f4"),
+                        ("pitch", "<f4"), ("emotions", "<u2")])
+
+# Rollup bucket widths in seconds; buckets are aligned to UTC hours and days
+RESOLUTIONS = {"hour": 3600, "day": 86400}
+
+# Rollup columns: event count, then sum and count of each measure, then one count per emotion
+MEASURES = ("polarity", "compound", "pitch")
+FEATURES = 1 + 2 * len(MEASURES) + len(EMOTIONS)
+
+# Longest series trend() returns, so one request cannot ask for years of hourly buckets
+MAX_BUCKETS = 5000
+
+def timeline_path(user_id):
+    """
+    File of a user's mood timeline. Named by a hash of the id, so no user id can reach outside
+    the working directory or collide with another's file.
+    """
+    return f"./mood_timeline_{hashlib.sha1(str(user_id).encode()).hexdigest()}.bin"
+
+def _features(events) -> np.ndarray:
+    # One rollup row per event
+    rows = np.zeros((len(events), FEATURES))
+    rows[:, 0] = 1.0
+    for i, measure in enumerate(MEASURES):
+        values = events[measure].astype(np.float64)
+        present = ~np.isnan(values)
+        rows[:, 1 + 2 * i] = np.where(present, values, 0.0)
+        rows[:, 2 + 2 * i] = present
+    for i in range(len(EMOTIONS)):
+        rows[:, 1 + 2 * len(MEASURES) + i] = (events["emotions"] >> i) & 1
+    return rows
+
+def _summary(row) -> dict:
+    summary = {"count": int(row[0])}
+    for i, measure in enumerate(MEASURES):
+        n = row[2 + 2 * i]
+        summary[measure] = float(row[1 + 2 * i] / n) if n else None
+    start = 1 + 2 * len(MEASURES)
+    summary["emotions"] = {emotion: int(n) for emotion, n in zip(EMOTIONS, row[start:]) if n}
+    return summary
+
+class _Rollup:
+    """
+    Running totals per time bucket, kept as cumulative sums so the totals of any bucket range
+    are one subtraction. Appends to the latest bucket cost O(1); older buckets O(later buckets).
+    """
+    def __init__(self, width):
+        self.width = width
+        self.origin = None  # first bucket number (timestamp // width)
+        self.n = 0          # buckets in use
+        self.cum = np.zeros((1, FEATURES))
+
+    def build(self, timestamps, rows):
+        if len(timestamps) == 0:
+            self.__init__(self.width)
+            return
+        buckets = np.floor(timestamps / self.width).astype(np.int64)
+        self.origin = int(buckets.min())
+        self.n = int(buckets.max()) - self.origin + 1
+        totals = np.zeros((self.n, FEATURES))
+        np.add.at(totals, buckets - self.origin, rows)
+        self.cum = np.zeros((2 * self.n + 1, FEATURES))
+        np.cumsum(totals, axis=0, out=self.cum[1:self.n + 1])
+
+    def add(self, timestamp, row) -> bool:
+        """
+        Add one event; False when it is older than the first bucket and needs a rebuild.
+        """
+        bucket = math.floor(timestamp / self.width)
+        if self.origin is None:
+            self.origin = bucket
+        index = bucket - self.origin
+        if index < 0:
+            return False
+        if index >= self.n:
+            if index + 1 >= len(self.cum):
+                # Grow geometrically so appending new buckets is amortized O(1)
+                grown = np.zeros((2 * (index + 1) + 1, FEATURES))
+                grown[:self.n + 1] = self.cum[:self.n + 1]
+                self.cum = grown
+            self.cum[self.n + 1:index + 2] = self.cum[self.n]
+            self.n = index + 1
+        self.cum[index + 1:self.n + 1] += row
+        return True
+
+    def bounds(self, since, until):
+        # Bucket index range covering [since, until), widened to whole buckets and clamped
+        if self.origin is None:
+            return 0, 0
+        low = 0 if since is None else math.floor(since / self.width) - self.origin
+        high = self.n if until is None else math.ceil(until / self.width) - self.origin
+        return min(max(low, 0), self.n), min(max(high, 0), self.n)
+
+    def total(self, since=None, until=None) -> np.ndarray:
+        low, high = self.bounds(since, until)
+        return self.cum[max(high, low)] - self.cum[low]
+
+class MoodTimeline:
+    def __init__(self, user_id="default", path=None):
+        """
+        Append-only time series of a user's analyses (polarity, compound score, emotions, pitch)
+        with hourly and daily rollups, so mood over any window is answered without reading the
+        user's memories. Events are appended to a flat binary file, the source of truth, that is
+        memory-mapped for reads; rollups are rebuilt from it when the timeline is opened. The
+        file is only created (and opened for writing) by the first append, so querying a user
+        without a timeline changes nothing on disk. Several handles (or processes) may share a
+        file: appends are serialized by a file lock, and each handle picks up the others'
+        events before appending and querying.
+        Args:
+            user_id (str): The ID of the user. Defaults to "default".
+            path (str, optional): Timeline file. Defaults to timeline_path(user_id).
+        """
+        self.user_id = user_id
+        self.path = timeline_path(user_id) if path is None else path
+        self._lock = threading.Lock()
+        self._rollups = {name: _Rollup(width) for name, width in RESOLUTIONS.items()}
+        self._file = None
+        # A partial event left by a crash mid-append is ignored, and cut off by the next append
+        self._count = self._stored()
+        self._rebuild()
+
+    def __len__(self):
+        return self._count
+
+    def _stored(self) -> int:
+        # Complete events in the file, including those appended through other handles
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        return size // EVENT_DTYPE.itemsize
+
+    def _sync(self):
+        # Add events appended through other handles since this one last looked; caller holds _lock
+        count = self._stored()
+        if count <= self._count:
+            return
+        start, self._count = self._count, count
+        events = self.events()[start:]
+        rows = _features(events)
+        for timestamp, row in zip(events["timestamp"], rows):
+            if not all(rollup.add(timestamp, row) for rollup in self._rollups.values()):
+                self._rebuild()
+                return
+
+    def _rebuild(self):
+        events = self.events()
+        rows = _features(events)
+        for rollup in self._rollups.values():
+            rollup.build(events["timestamp"], rows)
+
+    def events(self) -> np.ndarray:
+        """
+        All events in append order as a read-only EVENT_DTYPE array (memory-mapped, not loaded).
+        """
+        count = len(self)
+        if count == 0:
+            return np.zeros(0, dtype=EVENT_DTYPE)
+        return np.memmap(self.path, dtype=EVENT_DTYPE, mode="r", shape=(count,))
+
+    @timed("timeline.append")
+    def append(self, knowledge, timestamp=None):
+        """
+        Add one analysis.
+        Args:
+            knowledge (dict | MemoryRecord): The NLU output (or a record) that was stored.
+            timestamp (float, optional): Epoch seconds. Defaults to the record's, or now.
+        """
+        record = MemoryRecord.from_knowledge(knowledge, timestamp=timestamp)
+        event = np.zeros(1, dtype=EVENT_DTYPE)
+        event["timestamp"] = record.timestamp
+        for measure in MEASURES:
+            value = getattr(record, measure)
+            event[measure] = np.nan if value is None else value
+        event["emotions"] = sum(1 << EMOTIONS.index(e) for e in set(record.emotions) if e in EMOTIONS)
+        row = _features(event)[0]
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, "ab")
+            if fcntl is not None:
+                fcntl.flock(self._file, fcntl.LOCK_EX)
+            try:
+                # Only a torn tail is cut off: every complete event, whoever wrote it, is kept
+                size = os.path.getsize(self.path)
+                if size % EVENT_DTYPE.itemsize:
+                    self._file.truncate(size - size % EVENT_DTYPE.itemsize)
+                self._sync()
+                self._file.write(event.tobytes())
+                self._file.flush()
+                self._count += 1
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(self._file, fcntl.LOCK_UN)
+            if not all(rollup.add(record.timestamp, row) for rollup in self._rollups.values()):
+                # Older than anything seen so far (e.g. a backfill); rare, so rebuild everything
+                self._rebuild()
+
+    def backfill(self, memory, page_size=500) -> int:
+        """
+        Append every memory of a store (e.g. a LongTermMemory written before the timeline
+        existed). Migrated memories without a timestamp are skipped.
+        Returns:
+            int: Number of events added.
+        """
+        added = 0
+        for page in memory.iter_all(page_size, include=("metadatas",)):
+            for metadata in page["metadatas"]:
+                if metadata and "timestamp" in metadata:
+                    self.append(MemoryRecord.from_chroma("", metadata))
+                    added += 1
+        return added
+
+    @timed("timeline.query")
+    def summary(self, since=None, until=None, resolution="hour") -> dict:
+        """
+        Event count, mean polarity, compound score and pitch, and emotion counts over a window,
+        in constant time. The window is widened to whole buckets of the resolution.
+        Args:
+            since (float, optional): Start of the window (epoch seconds). Defaults to the first event.
+            until (float, optional): End of the window, exclusive. Defaults to after the last event.
+            resolution (str, optional): "hour" or "day". Defaults to "hour".
+        """
+        with self._lock:
+            self._sync()
+            return _summary(self._rollups[resolution].total(since, until))
+
+    @timed("timeline.query")
+    def trend(self, since=None, until=None, resolution="day") -> list:
+        """
+        Per-bucket summaries over a window, oldest first; each has the bucket's "start" (epoch
+        seconds) and is empty (count 0) when nothing was stored in it. The window is clamped to
+        the first and last event. Costs O(buckets in the window), whatever the number of events.
+        Raises:
+            ValueError: When the window holds more than MAX_BUCKETS buckets.
+        """
+        with self._lock:
+            self._sync()
+            rollup = self._rollups[resolution]
+            low, high = rollup.bounds(since, until)
+            if high - low > MAX_BUCKETS:
+                raise ValueError(f"{high - low} {resolution} buckets requested, at most {MAX_BUCKETS}")
+            totals = np.diff(rollup.cum[low:max(high, low) + 1], axis=0)
+            origin = rollup.origin
+        return [{"start": (origin + low + i) * rollup.width, **_summary(row)} for i, row in enumerate(totals)]
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+if __name__ == "__main__":
+    # Build timelines for the per-user stores in the working directory that have none yet
+    import glob
+    from .long_term_memory import LongTermMemory, store_path
+    prefix = len(store_path(""))
+    for path in sorted(glob.glob(store_path("*"))):
+        user_id = path[prefix:]
+        if os.path.exists(timeline_path(user_id)):
+            continue
+        memory = LongTermMemory(user_id)
+        timeline = MoodTimeline(user_id)
+        print(f"{user_id}: {timeline.backfill(memory)} events")
+        timeline.close()
+        memory.close()
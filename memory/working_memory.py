@@ -1,45 +1,227 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
 import chromadb
 from chromadb.config import Settings
+from .ids import IdAllocator
+from .records import MemoryRecord, build_filter, salience
+from instrumentation import timed
+
+def session_scope(user_id, session_id) -> str:
+    """
+    Unambiguous WorkingMemory session_id for a user's session: the user id is length-prefixed,
+    so ("a:b", "c") and ("a", "b:c") get different scopes.
+    """
+    user_id = str(user_id)
+    return f"{len(user_id)}:{user_id}:{session_id}"
 
 class WorkingMemory:
-    def __init__(self, collection_name="working_memory"):
+    def __init__(self, collection_name="working_memory", embedding_function=None, ingest=None,
+                 session_id=None, capacity=None, ttl=None, promote=None, salience_threshold=0.5, cache=None):
         """
         Initializes the WorkingMemory with a ChromaDB client and a collection.
         Args:
             collection_name (str): The name of the collection to use. Defaults to "working_memory".
+            embedding_function (optional): ChromaDB embedding function. Defaults to ChromaDB's default model.
+            ingest (IngestionQueue, optional): Write-behind queue for store(). Defaults to None (synchronous writes).
+            session_id (str, optional): Scope this memory to one session: its records are tagged with the
+                session, retrieve() only sees them and clear()/close() only drop them. Sessions share
+                the collection, since ChromaDB does not release a dropped collection's memory.
+                Defaults to None (the whole collection).
+            capacity (int, optional): Items kept; once it is exceeded by 10% the least recently used
+                items are evicted back down to it. Defaults to None (unbounded).
+            ttl (float, optional): Seconds since an item was stored or last retrieved before it is
+                evicted. Defaults to None (no expiry).
+            promote (callable, optional): Called with each evicted MemoryRecord whose salience reaches
+                salience_threshold, e.g. LongTermMemory.store. Defaults to None (evictions are dropped).
+            salience_threshold (float, optional): Minimum salience for promotion. Defaults to 0.5.
+            cache (RetrievalCache, optional): Shared query embedding and result cache for retrieve().
+                Defaults to None (every retrieve queries the store).
         """
         self.client = chromadb.Client(Settings())
-        self.collection = self.client.get_or_create_collection(name=collection_name)
+        self.ingest = ingest
+        self.embedding_function = embedding_function
+        self.session_id = session_id
+        self.capacity = capacity
+        self.ttl = ttl
+        self.promote = promote
+        self.salience_threshold = salience_threshold
+        self.cache = cache
+        # Evict in small batches past capacity so queued writes are flushed once per batch, not per store
+        self._slack = max(1, capacity // 10) if capacity else 0
+        self._entries = OrderedDict()  # id -> (last used, MemoryRecord), least recently used first
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.promotions = 0
+        self.collection = self._create_collection(collection_name)
+        self.scope = ("wm", collection_name, session_id)
+        self.ids = IdAllocator(self.collection) if session_id is None else None
+
+    def _create_collection(self, name):
+        if self.embedding_function is None:
+            return self.client.get_or_create_collection(name=name)
+        return self.client.get_or_create_collection(name=name, embedding_function=self.embedding_function)
+
+    def _allocate_id(self):
+        if self.session_id is None:
+            return self.ids.allocate()
+        # Random, so a reopened session never reuses (and an old handle's close never deletes)
+        # ids of another handle, without scanning the shared collection
+        return f"{self.session_id}:{uuid.uuid4().hex}"
 
-    def store(self, nlu_output, id=None):
+    @timed("wm.store")
+    def store(self, nlu_output, id=None, session_id=None, timestamp=None):
         """
-        Stores the NLU output in the working memory.
+        Stores the NLU output in the working memory, evicting expired and excess items.
         Args:
             nlu_output (dict): The NLU output to store.
             id (str, optional): The ID of the data. Defaults to None.
+            session_id (str, optional): The session the output came from. Session-scoped memories
+                always use their own session.
+            timestamp (float, optional): Epoch seconds. Defaults to now.
         """
-        # Convert nlu_output to string for embedding
-        text = str(nlu_output)
+        # Embed the transcript; sentiment, emotions and entities become filterable metadata
+        if self.session_id is not None:
+            session_id = self.session_id
+        record = MemoryRecord.from_knowledge(nlu_output, session_id, timestamp)
         if id is None:
-            id = str(len(self.collection.get()['ids']) + 1)
-        self.collection.add(documents=[text], ids=[id])
+            id = self._allocate_id()
+        elif self.ids is not None:
+            # Allocated ids must never land on an explicit one
+            self.ids.advance_past([id])
+        if self.ingest is not None:
+            self.ingest.put(self.collection, id, record.document, record.to_metadata())
+        else:
+            self.collection.add(documents=[record.document], metadatas=[record.to_metadata()], ids=[id])
+        with self._lock:
+            self._entries[id] = (time.time(), record)
+            self._entries.move_to_end(id)
+        self._invalidate()
+        self.evict()
+
+    def flush(self):
+        """
+        Waits until queued writes for this memory are in the collection (read-your-writes).
+        """
+        if self.ingest is not None:
+            self.ingest.flush(self.collection)
 
-    def retrieve(self, query, n_results=5):
+    @timed("wm.retrieve")
+    def retrieve(self, query, n_results=5, where=None, **filters):
         """
         Retrieves data from the working memory based on a query.
+        Returned items count as used again for TTL and LRU eviction.
         Args:
             query (str): The query to use.
             n_results (int, optional): The number of results to return. Defaults to 5.
+            where (dict, optional): Raw ChromaDB metadata filter.
+            **filters: mood, emotion, since, until or session_id, applied inside the store (see build_filter).
+                Session-scoped memories always filter on their own session.
         Returns:
             list: The results of the query.
         """
-        results = self.collection.query(query_texts=[query], n_results=n_results)
+        if self.session_id is not None:
+            filters["session_id"] = self.session_id
+        self.evict()
+        self.flush()
+        where = build_filter(where=where, **filters)
+        if self.cache is not None:
+            results = self.cache.query(self.scope, self.collection, self.embedding_function, query, n_results, where)
+        else:
+            results = self.collection.query(query_texts=[query], n_results=n_results, where=where)
+        now = time.time()
+        with self._lock:
+            for id in results["ids"][0]:
+                entry = self._entries.get(id)
+                if entry is not None:
+                    self._entries[id] = (now, entry[1])
+                    self._entries.move_to_end(id)
         return results
 
+    def evict(self, now=None) -> int:
+        """
+        Evicts items idle for longer than the TTL, then least recently used items past capacity.
+        Evicted items are deleted from the collection and salient ones are promoted.
+        Args:
+            now (float, optional): Epoch seconds to expire against. Defaults to now.
+        Returns:
+            int: Number of evicted items.
+        """
+        now = time.time() if now is None else now
+        evicted = []
+        with self._lock:
+            if self.ttl is not None:
+                while self._entries:
+                    id, (last_used, record) = next(iter(self._entries.items()))
+                    if now - last_used < self.ttl:
+                        break
+                    del self._entries[id]
+                    evicted.append((id, record))
+            if self.capacity is not None and len(self._entries) > self.capacity + self._slack:
+                while len(self._entries) > self.capacity:
+                    id, (_, record) = self._entries.popitem(last=False)
+                    evicted.append((id, record))
+            self.evictions += len(evicted)
+        if evicted:
+            self._drop(evicted)
+        return len(evicted)
+
+    def _drop(self, evicted):
+        # Queued adds must land before the delete, or evicted items would reappear
+        self.flush()
+        self.collection.delete(ids=[id for id, _ in evicted])
+        self._invalidate()
+        self._promote(record for _, record in evicted)
+
+    def _invalidate(self):
+        if self.cache is not None:
+            self.cache.invalidate(self.scope)
+
+    def _promote(self, records):
+        if self.promote is None:
+            return
+        for record in records:
+            if salience(record) >= self.salience_threshold:
+                self.promote(record)
+                with self._lock:
+                    self.promotions += 1
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"items": len(self._entries), "evictions": self.evictions, "promotions": self.promotions}
+
     def clear(self):
         """
-        Clears the working memory by recreating the collection.
+        Clears the working memory; a session-scoped memory only drops its own session.
         """
+        self.flush()
+        with self._lock:
+            ids = list(self._entries)
+            self._entries.clear()
+        self._invalidate()
+        if self.session_id is not None:
+            if ids:
+                self.collection.delete(ids=ids)
+            return
         # To clear, recreate collection
         self.client.delete_collection(self.collection.name)
-        self.collection = self.client.get_or_create_collection(name=self.collection.name)
+        self.collection = self._create_collection(self.collection.name)
+        self.ids = IdAllocator(self.collection)
+
+    def close(self):
+        """
+        Ends the session: promotes what is still salient and drops its items.
+        """
+        self.flush()
+        with self._lock:
+            remaining = list(self._entries.items())
+            self._entries.clear()
+        if remaining:
+            self.collection.delete(ids=[id for id, _ in remaining])
+            self._invalidate()
+        self._promote(record for _, (_, record) in remaining)
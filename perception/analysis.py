@@ -0,0 +1,57 @@
+# perception/analysis.py
+from functools import cached_property
+import nltk
+from textblob import TextBlob
+from perception.resources import resources
+from instrumentation import span
+
+class AnalysisContext:
+    """
+    Per-transcript analysis state shared by the tone and NLU stages.
+    Tokens, POS tags, TextBlob sentiment and VADER scores are computed once on first use
+    and reused by every function that receives the same context.
+    """
+    def __init__(self, text: str, tokens: list | None = None, pos_tags: list | None = None):
+        self.text = text
+        # Precomputed values (e.g. from a batched tagging pass) take the place of the lazy ones
+        if tokens is not None:
+            self.tokens = tokens
+        if pos_tags is not None:
+            self.pos_tags = pos_tags
+
+    @classmethod
+    def batch(cls, texts: list) -> list:
+        """
+        Build contexts for many texts at once, POS tagging all of them in a single
+        tagger pass.
+        """
+        resources.ensure_data()
+        token_lists = [nltk.word_tokenize(text) for text in texts]
+        tag_lists = resources.tagger().tag_sents(token_lists)
+        return [cls(text, tokens, tags) for text, tokens, tags in zip(texts, token_lists, tag_lists)]
+
+    @cached_property
+    def tokens(self) -> list:
+        resources.ensure_data()
+        with span("tokenize"):
+            return nltk.word_tokenize(self.text)
+
+    @cached_property
+    def lower_tokens(self) -> list:
+        return [token.lower() for token in self.tokens]
+
+    @cached_property
+    def pos_tags(self) -> list:
+        tokens = self.tokens
+        with span("pos_tag"):
+            return resources.tagger().tag(tokens)
+
+    @cached_property
+    def sentiment(self):
+        with span("textblob"):
+            return TextBlob(self.text).sentiment
+
+    @cached_property
+    def vader_scores(self) -> dict:
+        with span("vader"):
+            return resources.vader().polarity_scores(self.text)
@@ -0,0 +1,144 @@
+# perception/batch.py
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import islice
+
+def chunked(items, size):
+    """
+    Lazily split an iterable into lists of at most `size` items.
+    """
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+def _warm_worker():
+    """
+    Process pool initializer: load the tagger, NE chunker and VADER lexicon once per worker
+    instead of once per chunk.
+    """
+    from perception.resources import resources
+    resources.warmup()
+
+class AnalysisPool:
+    """
+    Process pool for the server's CPU-bound steps, with the Executor.submit interface.
+    Workers are spawned rather than forked, since forking the threaded server can deadlock
+    the child. A pool broken by a dead worker or a failing initializer (e.g. missing NLTK
+    data) is replaced and the affected tasks resubmitted; after `max_restarts` breaks in a
+    row, tasks run on threads in this process instead.
+    Args:
+        workers (int): Worker processes.
+        initializer (callable, optional): Run once in each worker. Defaults to _warm_worker.
+        max_restarts (int, optional): Consecutive breaks before falling back. Defaults to 3.
+        fallback_workers (int, optional): Threads used after falling back. Defaults to 4.
+    """
+    def __init__(self, workers, initializer=_warm_worker, max_restarts=3, fallback_workers=4):
+        self.workers = workers
+        self.initializer = initializer
+        self.max_restarts = max_restarts
+        self.fallback_workers = fallback_workers
+        self.restarts = 0  # consecutive breaks, reset by any task a worker completes
+        self._lock = threading.Lock()
+        self._pool = self._start()
+
+    def _start(self):
+        return ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"),
+                                   initializer=self.initializer)
+
+    @property
+    def in_process(self) -> bool:
+        return isinstance(self._pool, ThreadPoolExecutor)
+
+    def _replace(self, broken):
+        with self._lock:
+            if self._pool is not broken:  # already replaced after another task saw it break
+                return
+            broken.shutdown(wait=False, cancel_futures=True)
+            self.restarts += 1
+            if self.restarts > self.max_restarts:
+                print(f"⚠️ NLP worker pool broke {self.restarts} times in a row; analyzing in-process")
+                self._pool = ThreadPoolExecutor(self.fallback_workers, thread_name_prefix="nlp")
+            else:
+                print(f"⚠️ NLP worker pool broke; restarting it ({self.restarts}/{self.max_restarts})")
+                self._pool = self._start()
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        pool = self._pool
+        if isinstance(pool, ThreadPoolExecutor):
+            return pool.submit(fn, *args, **kwargs)
+        try:
+            inner = pool.submit(fn, *args, **kwargs)
+        except BrokenProcessPool:
+            self._replace(pool)
+            return self.submit(fn, *args, **kwargs)
+        outer = Future()
+
+        def relay(future):
+            if future.cancelled():
+                outer.cancel()
+                return
+            error = future.exception()
+            if isinstance(error, BrokenProcessPool):
+                # The task never finished; run it again on the replacement
+                self._replace(pool)
+                try:
+                    again = self.submit(fn, *args, **kwargs)
+                except Exception as e:  # e.g. shut down meanwhile
+                    outer.set_exception(e)
+                    return
+                again.add_done_callback(lambda f: _copy(f, outer))
+                return
+            self.restarts = 0
+            _copy(future, outer)
+
+        inner.add_done_callback(relay)
+        return outer
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        with self._lock:
+            self._pool.shutdown(wait=wait, cancel_futures=cancel_futures)
+
+def _copy(source, target):
+    # Settle `target` with the outcome of the finished future `source`
+    if source.cancelled():
+        target.cancel()
+    elif source.exception() is not None:
+        target.set_exception(source.exception())
+    else:
+        target.set_result(source.result())
+
+def run_batched(chunk_fn, items, batch_size=64, workers=None):
+    """
+    Apply `chunk_fn` (a picklable function taking a list and returning a list of the same
+    length) to `items` in chunks and yield the individual results in input order.
+    Args:
+        chunk_fn (callable): Module-level function processing one chunk.
+        items (iterable): Inputs; consumed lazily.
+        batch_size (int, optional): Items per chunk. Defaults to 64.
+        workers (int, optional): Worker processes. Defaults to os.cpu_count(); 1 runs in-process.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for chunk in chunked(items, batch_size):
+            yield from chunk_fn(chunk)
+        return
+
+    # Keep at most two chunks in flight per worker so memory stays bounded for any input size
+    max_pending = workers * 2
+    # Spawned, not forked: the caller may be a threaded server (see AnalysisPool)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                             initializer=_warm_worker) as pool:
+        pending = deque()
+        for chunk in chunked(items, batch_size):
+            pending.append(pool.submit(chunk_fn, chunk))
+            if len(pending) >= max_pending:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
@@ -1,15 +1,13 @@
 # nlu/nlu_live.py
 import nltk
+from perception.analysis import AnalysisContext
+from perception.resources import resources
+from instrumentation import span, timed
 
-nltk.download("punkt_tab", quiet=True)
-nltk.download("averaged_perceptron_tagger_eng", quiet=True)
-nltk.download("maxent_ne_chunker_tab", quiet=True)
-nltk.download("words", quiet=True)
-
-def get_entities(text):
-    tokens = nltk.word_tokenize(text)
-    tags = nltk.pos_tag(tokens)
-    tree = nltk.ne_chunk(tags)
+def get_entities(text, ctx=None):
+    tags = (ctx or AnalysisContext(text)).pos_tags
+    with span("ne_chunk"):
+        tree = resources.ne_chunker().parse(tags)
     entities = []
     for subtree in tree:
         if isinstance(subtree, nltk.Tree):
@@ -18,20 +16,50 @@ def get_entities(text):
             entities.append({"entity": entity, "type": label})
     return entities
 
-def get_roles(text):
-    tokens = nltk.word_tokenize(text)
-    tags = nltk.pos_tag(tokens)
+def get_roles(text, ctx=None):
+    tags = (ctx or AnalysisContext(text)).pos_tags
     roles = []
     for w, t in tags:
         if t.startswith("NN"): roles.append({"word": w, "role": "entity"})
         elif t.startswith("VB"): roles.append({"word": w, "role": "action"})
     return roles
 
-def nlu_process(text, tone_obj):
+@timed("nlu")
+def nlu_process(text, tone_obj, ctx=None):
+    # Share tokens and POS tags between entity and role extraction
+    ctx = ctx or AnalysisContext(text)
     return {
         "transcript": text,
         "sentiment": tone_obj["sentiment"],
         "emotions": tone_obj["emotions"],
-        "entities": get_entities(text),
-        "semantic_roles": get_roles(text)
+        "pitch": tone_obj.get("pitch"),
+        "entities": get_entities(text, ctx),
+        "semantic_roles": get_roles(text, ctx)
     }
+
+def _nlu_process_chunk(items):
+    # Worker entry point for nlu_process_batch; items are (text, tone_obj) pairs and a missing
+    # tone is computed from the same context
+    from perception.tone.tone_sentiment_live import analyze_tone
+    contexts = AnalysisContext.batch([text for text, _ in items])
+    results = []
+    for (text, tone_obj), ctx in zip(items, contexts):
+        if tone_obj is None:
+            tone_obj = analyze_tone(text, ctx=ctx)
+        results.append(nlu_process(text, tone_obj, ctx))
+    return results
+
+def nlu_process_batch(texts, tone_objs=None, batch_size=64, workers=None):
+    """
+    Stream nlu_process results for many texts, in input order.
+    When tone_objs is omitted the tone is analyzed in the same pass, which is the usual
+    case for transcript backfills. Results are identical to the single-call path.
+    Args:
+        texts (iterable): Transcripts to process; consumed lazily.
+        tone_objs (iterable, optional): analyze_tone output per transcript, aligned with texts.
+        batch_size (int, optional): Transcripts per worker task. Defaults to 64.
+        workers (int, optional): Worker processes. Defaults to the CPU count; 1 runs in-process.
+    """
+    from perception.batch import run_batched
+    items = zip(texts, tone_objs) if tone_objs is not None else ((text, None) for text in texts)
+    return run_batched(_nlu_process_chunk, items, batch_size, workers)
@@ -1,23 +1,59 @@
-from .stt.stt_live import record_audio, save_wav, transcribe_audio
+from .stt.stt_live import record_audio
+from .stt.backends import default_backend
+from .stt.audio import wav_view
+from .stt.pitch import extract_prosody
+from .stt.vad import speech_only
 from .tone.tone_sentiment_live import analyze_tone
 from .nlu.nlu_live import nlu_process
+from .analysis import AnalysisContext
+from instrumentation import span
+
+def analyze_transcription(transcription):
+    """
+    Tone and NLU for a (transcript, prosody) pair as returned by process_audio_bytes.
+    Module-level so it can run in a process pool (see perception.batch._warm_worker).
+    """
+    transcript, prosody = transcription
+    # Tokenize, tag and score the transcript once for tone and NLU
+    ctx = AnalysisContext(transcript)
+    tone = analyze_tone(transcript, prosody, ctx)
+    return nlu_process(transcript, tone, ctx)
 
 class PerceptionModule:
-    def __init__(self):
-        pass
+    def __init__(self, stt_backend=None):
+        self._stt_backend = stt_backend
+
+    @property
+    def stt_backend(self):
+        # Defaults to the backend selected by the STT_BACKEND setting, resolved on first use
+        return self._stt_backend or default_backend()
 
     def process_audio(self, duration=5):
         # Record audio
         audio_data = record_audio(duration)
-        filename = "temp_audio.wav"
-        save_wav(audio_data, filename)
-        # Transcribe
-        text = transcribe_audio(filename)
+        # Only the speech is transcribed; a silent recording costs no STT call
+        audio_data = speech_only(audio_data)
+        if audio_data is None:
+            return ""
+        # Transcribe the in-memory buffer, no temp file
+        with span("transcribe"):
+            text = self.stt_backend.transcribe(audio_data)
         return text
 
+    def process_audio_bytes(self, data):
+        """
+        Transcribe an uploaded audio file held in memory and extract its prosody.
+        Returns (transcript, prosody); prosody is None unless the upload is 16-bit PCM WAV.
+        """
+        with span("transcribe"):
+            text = self.stt_backend.transcribe(data)
+        try:
+            # Zero-copy view of the samples inside the upload
+            samples, sr = wav_view(data)
+        except ValueError:
+            return text, None
+        return text, extract_prosody(samples, sr)
+
     def process_text(self, text):
-        # Analyze tone
-        tone = analyze_tone(text)
-        # NLU process
-        nlu_output = nlu_process(text, tone)
-        return nlu_output
+        # Tone and NLU, without prosody
+        return analyze_transcription((text, None))
@@ -0,0 +1,122 @@
+# perception/resources.py
+"""
+Lazy, shared loading of the NLTK models used by perception.
+
+Nothing here touches the network unless asked to: missing data is reported, and only
+downloaded by ensure_data(download=True), NLTK_AUTO_DOWNLOAD=1 or
+`python -m perception.resources --download`.
+"""
+import os
+import sys
+import threading
+import nltk
+
+# NLTK package name -> resource path checked with nltk.data.find
+REQUIRED_DATA = {
+    "punkt_tab": "tokenizers/punkt_tab",
+    "averaged_perceptron_tagger_eng": "taggers/averaged_perceptron_tagger_eng",
+    "maxent_ne_chunker_tab": "chunkers/maxent_ne_chunker_tab",
+    "words": "corpora/words",
+    "vader_lexicon": "sentiment/vader_lexicon.zip",
+}
+
+class ResourceManager:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._checked = False
+        self._tagger = None
+        self._ne_chunker = None
+        self._vader = None
+
+    def missing_data(self) -> list:
+        """
+        Returns the NLTK packages not found in the local data path.
+        """
+        missing = []
+        for package, path in REQUIRED_DATA.items():
+            try:
+                nltk.data.find(path)
+            except LookupError:
+                missing.append(package)
+        return missing
+
+    def ensure_data(self, download: bool = False) -> None:
+        """
+        Checks the local NLTK data once per process.
+        Args:
+            download (bool, optional): Download missing packages. Defaults to False, in which
+                case NLTK_AUTO_DOWNLOAD=1 in the environment still allows it.
+        """
+        if self._checked and not download:
+            return
+        with self._lock:
+            if self._checked and not download:
+                return
+            missing = self.missing_data()
+            if missing and (download or os.environ.get("NLTK_AUTO_DOWNLOAD") == "1"):
+                for package in missing:
+                    nltk.download(package, quiet=True)
+                missing = self.missing_data()
+            if missing:
+                raise LookupError(
+                    f"Missing NLTK data: {', '.join(missing)}. "
+                    "Run `python -m perception.resources --download` to fetch it."
+                )
+            self._checked = True
+
+    def tagger(self):
+        """
+        Returns the shared perceptron POS tagger.
+        """
+        if self._tagger is None:
+            self.ensure_data()
+            with self._lock:
+                if self._tagger is None:
+                    from nltk.tag import PerceptronTagger
+                    self._tagger = PerceptronTagger()
+        return self._tagger
+
+    def ne_chunker(self):
+        """
+        Returns the shared named-entity chunker (nltk.ne_chunk reloads it on every call).
+        """
+        if self._ne_chunker is None:
+            self.ensure_data()
+            with self._lock:
+                if self._ne_chunker is None:
+                    from nltk.chunk import ne_chunker
+                    self._ne_chunker = ne_chunker()
+        return self._ne_chunker
+
+    def vader(self):
+        """
+        Returns the shared VADER SentimentIntensityAnalyzer.
+        """
+        if self._vader is None:
+            self.ensure_data()
+            with self._lock:
+                if self._vader is None:
+                    from nltk.sentiment.vader import SentimentIntensityAnalyzer
+                    self._vader = SentimentIntensityAnalyzer()
+        return self._vader
+
+    def warmup(self) -> None:
+        """
+        Loads every model up front, e.g. in a preforking server's master process or in a
+        worker before it starts accepting requests.
+        """
+        self.ensure_data()
+        nltk.word_tokenize("warm up")
+        self.tagger()
+        self.ne_chunker()
+        self.vader()
+
+# Process-wide instance shared by the tone and NLU modules
+resources = ResourceManager()
+
+if __name__ == "__main__":
+    if "--download" in sys.argv:
+        resources.ensure_data(download=True)
+    missing = resources.missing_data()
+    print("Missing NLTK data: " + ", ".join(missing) if missing else "All NLTK data present.")
+    sys.exit(1 if missing else 0)
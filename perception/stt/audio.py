@@ -0,0 +1,74 @@
+# stt/audio.py
+import io
+import struct
+import wave
+import numpy as np
+from .pitch import SAMPLE_RATE
+
+def encode_wav(samples, sr=SAMPLE_RATE) -> bytes:
+    """
+    Encode int16 mono samples as an in-memory WAV file
+    """
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(sr)
+        wf.writeframes(np.asarray(samples, dtype=np.int16).tobytes())
+    return buffer.getvalue()
+
+def as_wav_bytes(audio, sr=SAMPLE_RATE) -> bytes:
+    """
+    Normalize a file path, WAV bytes or an int16 sample array to WAV bytes
+    """
+    if isinstance(audio, str):
+        with open(audio, 'rb') as f:
+            return f.read()
+    if isinstance(audio, (bytes, bytearray, memoryview)):
+        return bytes(audio)
+    return encode_wav(audio, sr)
+
+def wav_view(data) -> tuple:
+    """
+    Zero-copy view of the PCM samples inside in-memory WAV bytes.
+    Returns (int16 samples shaped (frames,) or (frames, channels), sample rate).
+    Raises:
+        ValueError: If the data is not a 16-bit PCM WAV file.
+    """
+    data = memoryview(data).cast('B')
+    if len(data) < 12 or data[0:4] != b'RIFF' or data[8:12] != b'WAVE':
+        raise ValueError("not a WAV file")
+    offset = 12
+    fmt = None
+    while offset + 8 <= len(data):
+        chunk_id = bytes(data[offset:offset + 4])
+        size, = struct.unpack('<I', data[offset + 4:offset + 8])
+        body = offset + 8
+        if chunk_id == b'fmt ':
+            if size < 16 or body + 16 > len(data):
+                raise ValueError("WAV fmt chunk is truncated")
+            audio_format, channels, sr, _, _, bits = struct.unpack('<HHIIHH', data[body:body + 16])
+            fmt = (audio_format, channels, sr, bits)
+        elif chunk_id == b'data':
+            if fmt is None or fmt[0] != 1 or fmt[3] != 16:
+                raise ValueError("only 16-bit PCM WAV is supported")
+            if fmt[1] == 0 or fmt[2] == 0:
+                raise ValueError("WAV file has no channels or no sample rate")
+            channels, sr = fmt[1], fmt[2]
+            count = min(size, len(data) - body) // (2 * channels) * channels
+            samples = np.frombuffer(data, dtype='<i2', count=count, offset=body)
+            return (samples if channels == 1 else samples.reshape(-1, channels)), sr
+        # Chunks are word aligned
+        offset = body + size + (size & 1)
+    raise ValueError("WAV file has no data chunk")
+
+def as_samples(audio) -> tuple:
+    """
+    Normalize a file path, WAV bytes or an int16 sample array to (int16 samples, sample rate)
+    """
+    if isinstance(audio, np.ndarray):
+        return audio.reshape(-1), SAMPLE_RATE
+    if isinstance(audio, str):
+        with open(audio, 'rb') as f:
+            audio = f.read()
+    return wav_view(audio)
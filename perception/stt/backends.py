@@ -0,0 +1,137 @@
+# stt/backends.py
+"""
+Speech-to-text backends.
+
+Every backend takes audio as a WAV file path, WAV bytes or an int16 sample array.
+The active backend is chosen by name ("assemblyai", "local" or "fake") through the
+STT_BACKEND environment variable or the STT_BACKEND setting in config.py.
+"""
+import itertools
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from .audio import as_samples, as_wav_bytes
+from .pitch import to_float_audio
+from .transcription import AsyncTranscriptionClient, ASSEMBLYAI_URL, background_loop
+
+def setting(name, default=None):
+    """
+    Read a setting from the environment, then from the optional root config module
+    """
+    if name in os.environ:
+        return os.environ[name]
+    try:
+        import config
+    except ImportError:
+        return default
+    return getattr(config, name, default)
+
+class STTBackend(ABC):
+    name = None
+
+    @abstractmethod
+    def transcribe(self, audio) -> str:
+        """
+        Transcribe one utterance and return its text.
+        """
+
+class AssemblyAIBackend(STTBackend):
+    """
+    Remote transcription through the pooled AssemblyAI client.
+    """
+    name = "assemblyai"
+
+    def __init__(self, api_key=None, base_url=None, client=None):
+        if client is None:
+            api_key = api_key or setting("ASSEMBLYAI_API_KEY") or setting("API_KEY")
+            if not api_key:
+                raise ValueError("AssemblyAI backend needs ASSEMBLYAI_API_KEY (or API_KEY in config.py)")
+            client = AsyncTranscriptionClient(api_key, base_url or setting("ASSEMBLYAI_URL", ASSEMBLYAI_URL))
+        self.client = client
+
+    def transcribe(self, audio) -> str:
+        return background_loop.run(self.client.transcribe(as_wav_bytes(audio)))
+
+class LocalBackend(STTBackend):
+    """
+    On-box transcription with faster-whisper (optional dependency), no network round trip.
+    Args:
+        model_size (str, optional): Whisper model name. Defaults to the STT_LOCAL_MODEL setting or "base.en".
+        device (str, optional): "cpu", "cuda" or "auto". Defaults to "auto".
+    """
+    name = "local"
+
+    def __init__(self, model_size=None, device="auto", compute_type="default"):
+        self.model_size = model_size or setting("STT_LOCAL_MODEL", "base.en")
+        self.device = device
+        self.compute_type = compute_type
+        self._model = None
+        self._lock = threading.Lock()
+
+    def _get_model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    try:
+                        from faster_whisper import WhisperModel
+                    except ImportError as e:
+                        raise ImportError("The local STT backend needs faster-whisper: pip install faster-whisper") from e
+                    self._model = WhisperModel(self.model_size, device=self.device, compute_type=self.compute_type)
+        return self._model
+
+    def transcribe(self, audio) -> str:
+        samples, sr = as_samples(audio)
+        samples = to_float_audio(samples)
+        if sr != 16000:
+            import librosa
+            samples = librosa.resample(samples, orig_sr=sr, target_sr=16000)
+        segments, _ = self._get_model().transcribe(samples, beam_size=1)
+        return " ".join(segment.text.strip() for segment in segments).strip()
+
+class FakeBackend(STTBackend):
+    """
+    Deterministic backend for tests and benchmarks: returns the given transcripts in order,
+    cycling, after an optional simulated latency.
+    """
+    name = "fake"
+
+    def __init__(self, transcripts=("I am feeling happy today.",), latency=0.0):
+        self.latency = latency
+        self._transcripts = itertools.cycle(transcripts)
+        self._lock = threading.Lock()
+
+    def transcribe(self, audio) -> str:
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            return next(self._transcripts)
+
+BACKENDS = {backend.name: backend for backend in (AssemblyAIBackend, LocalBackend, FakeBackend)}
+
+_default_backend = None
+_default_lock = threading.Lock()
+
+def get_backend(name=None, **kwargs) -> STTBackend:
+    """
+    Create a backend by name; defaults to the STT_BACKEND setting, else "assemblyai".
+    """
+    name = name or setting("STT_BACKEND", "assemblyai")
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown STT backend '{name}', expected one of {sorted(BACKENDS)}")
+    return BACKENDS[name](**kwargs)
+
+def default_backend() -> STTBackend:
+    """
+    Process-wide backend shared by start_stt, PerceptionModule and the Flask app; created on first use.
+    """
+    global _default_backend
+    if _default_backend is None:
+        with _default_lock:
+            if _default_backend is None:
+                _default_backend = get_backend()
+    return _default_backend
+
+def set_default_backend(backend: STTBackend) -> None:
+    global _default_backend
+    _default_backend = backend
@@ -0,0 +1,47 @@
+# stt/pitch.py
+import numpy as np
+from instrumentation import timed
+
+SAMPLE_RATE = 16000
+
+def to_float_audio(audio) -> np.ndarray:
+    """
+    Convert a recording buffer (int16 as returned by record_audio, or float) to a mono
+    float32 array in [-1, 1]. Float32 mono input is returned without copying.
+    """
+    audio = np.asarray(audio)
+    if audio.ndim > 1:
+        audio = audio.reshape(-1) if audio.shape[1] == 1 else audio.mean(axis=1)
+    if audio.dtype == np.int16:
+        return audio.astype(np.float32) / 32768.0
+    return audio.astype(np.float32, copy=False)
+
+@timed("pitch")
+def extract_prosody(audio, sr=SAMPLE_RATE) -> dict | None:
+    """
+    Pitch statistics for one utterance, computed directly from an in-memory buffer.
+    Args:
+        audio (np.ndarray): int16 or float samples.
+        sr (int, optional): Sample rate. Defaults to 16000.
+    Returns:
+        dict: mean, median and variance of the voiced pitch (Hz), the voiced frame ratio and
+            the frame count, or None if no frame is voiced.
+    """
+    import librosa
+    y = to_float_audio(audio)
+    if y.size == 0:
+        return None
+    pitches, magnitudes = librosa.piptrack(y=y, sr=sr)
+    # Strongest bin per frame, selected for all frames at once
+    strongest = magnitudes.argmax(axis=0)
+    frame_pitch = pitches[strongest, np.arange(pitches.shape[1])]
+    voiced = frame_pitch[frame_pitch > 0]
+    if voiced.size == 0:
+        return None
+    return {
+        "mean": float(voiced.mean()),
+        "median": float(np.median(voiced)),
+        "variance": float(voiced.var()),
+        "voiced_ratio": float(voiced.size / frame_pitch.size),
+        "frames": int(frame_pitch.size),
+    }
@@ -0,0 +1,307 @@
+# stt/stream.py
+import asyncio
+import itertools
+import threading
+import time
+import wave
+from collections import deque
+import numpy as np
+from .pitch import SAMPLE_RATE, extract_prosody
+from instrumentation import span
+
+class RingBuffer:
+    """
+    Fixed-size int16 sample buffer written by the capture callback and drained by the pipeline.
+    When the reader falls behind, the oldest samples are overwritten and counted in `dropped`.
+    """
+    def __init__(self, capacity):
+        self._data = np.zeros(capacity, dtype=np.int16)
+        self.capacity = capacity
+        self._read = 0   # absolute index of the next sample to read
+        self._write = 0  # absolute index one past the last sample written
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def __len__(self):
+        with self._lock:
+            return self._write - self._read
+
+    def write(self, samples):
+        samples = np.asarray(samples, dtype=np.int16).reshape(-1)
+        with self._lock:
+            if samples.size > self.capacity:
+                self.dropped += samples.size - self.capacity
+                samples = samples[-self.capacity:]
+            n = samples.size
+            pos = self._write % self.capacity
+            first = min(n, self.capacity - pos)
+            self._data[pos:pos + first] = samples[:first]
+            self._data[:n - first] = samples[first:]
+            self._write += n
+            overflow = self._write - self._read - self.capacity
+            if overflow > 0:
+                self._read += overflow
+                self.dropped += overflow
+
+    def read(self, n):
+        """
+        Remove and return up to n of the oldest samples as a contiguous array.
+        """
+        with self._lock:
+            n = min(n, self._write - self._read)
+            out = np.empty(n, dtype=np.int16)
+            pos = self._read % self.capacity
+            first = min(n, self.capacity - pos)
+            out[:first] = self._data[pos:pos + first]
+            out[first:] = self._data[:n - first]
+            self._read += n
+            return out
+
+class MicrophoneSource:
+    """
+    Callback-driven microphone capture; blocks are delivered as they arrive.
+    """
+    finished = False
+
+    def __init__(self, samplerate=SAMPLE_RATE, blocksize=1600):
+        self.samplerate = samplerate
+        self.blocksize = blocksize
+        self._stream = None
+
+    def start(self, callback):
+        import sounddevice as sd
+        self._stream = sd.InputStream(
+            samplerate=self.samplerate, channels=1, dtype='int16', blocksize=self.blocksize,
+            callback=lambda indata, frames, time_info, status: callback(indata[:, 0])
+        )
+        self._stream.start()
+
+    def stop(self):
+        if self._stream is not None:
+            self._stream.stop()
+            self._stream.close()
+            self._stream = None
+
+class FileSource:
+    """
+    Fake input device replaying a 16 kHz mono int16 WAV file through the same callback
+    interface as MicrophoneSource, so the pipeline can run without a microphone.
+    Args:
+        path (str): WAV file to replay.
+        blocksize (int, optional): Samples per callback. Defaults to 1600 (100 ms).
+        speed (float, optional): Replay speed relative to real time; 0 replays as fast as possible.
+    """
+    def __init__(self, path, blocksize=1600, speed=1.0):
+        with wave.open(path, 'rb') as wf:
+            self.samplerate = wf.getframerate()
+            self.samples = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+        self.blocksize = blocksize
+        self.speed = speed
+        self.finished = False
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self, callback):
+        self._thread = threading.Thread(target=self._replay, args=(callback,), daemon=True)
+        self._thread.start()
+
+    def _replay(self, callback):
+        interval = self.blocksize / self.samplerate / self.speed if self.speed else 0
+        for start in range(0, self.samples.size, self.blocksize):
+            if self._stop.is_set():
+                break
+            callback(self.samples[start:start + self.blocksize])
+            if interval:
+                time.sleep(interval)
+        self.finished = True
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+class PushSource:
+    """
+    Input fed by the caller, e.g. from audio chunks received over a network connection:
+    push() delivers samples to the pipeline and close() marks the end of the stream.
+    Samples pushed before the pipeline starts are held until it does.
+    """
+    def __init__(self):
+        self.finished = False
+        self._callback = None
+        self._early = []
+
+    def start(self, callback):
+        self._callback = callback
+        for samples in self._early:
+            callback(samples)
+        self._early = []
+
+    def push(self, samples):
+        if self.finished:
+            return
+        if self._callback is None:
+            self._early.append(samples)
+        else:
+            self._callback(samples)
+
+    def close(self):
+        self.finished = True
+
+    def stop(self):
+        self.finished = True
+
+class StreamingPipeline:
+    """
+    Producer/consumer STT pipeline: capture -> pitch -> transcription -> handle_text.
+    Capture runs continuously into a ring buffer while earlier chunks are still being
+    processed. Stages are connected by bounded asyncio queues, so a slow stage holds back the
+    ones before it instead of letting work pile up. Blocking stage work runs in the default
+    executor, so the stages overlap each other.
+    Args:
+        handle_text (callable): Called as handle_text(text, pitch) for every non-empty transcript.
+        source: MicrophoneSource, FileSource or any object with start(callback)/stop()/finished.
+        transcribe (callable): Takes an int16 chunk and returns its transcript.
+        chunk_seconds (float, optional): Audio per chunk. Defaults to 5.
+        queue_size (int, optional): Bound of every inter-stage queue. Defaults to 2.
+        segmenter (UtteranceSegmenter, optional): Cut the audio into utterances at pauses and
+            drop silence, instead of fixed chunk_seconds chunks.
+        emit (callable, optional): Called from worker threads with an event dict as each stage
+            finishes a chunk: {"type": "prosody", "seq", "prosody"}, then
+            {"type": "transcript", "seq", "text"}. When given, handle_text is called as
+            handle_text(text, pitch, emit) so it can report its own steps for the chunk.
+    """
+    STAGES = ("pitch", "transcribe", "analyze", "end_to_end")
+    # Latency samples kept per stage; the report covers the most recent ones
+    LATENCY_WINDOW = 1000
+
+    def __init__(self, handle_text, source, transcribe, chunk_seconds=5.0, queue_size=2, samplerate=SAMPLE_RATE,
+                 emit=None, segmenter=None):
+        self.handle_text = handle_text
+        self.segmenter = segmenter
+        self.emit = emit
+        self.source = source
+        self.transcribe = transcribe
+        self.samplerate = samplerate
+        self.chunk_samples = int(chunk_seconds * samplerate)
+        self.queue_size = queue_size
+        # Room for the chunks that can be queued plus the one being captured
+        self.ring = RingBuffer(self.chunk_samples * (queue_size + 2))
+        self.latencies = {stage: deque(maxlen=self.LATENCY_WINDOW) for stage in self.STAGES}
+        self.counts = dict.fromkeys(self.STAGES, 0)
+
+    async def run(self, should_stop=lambda: False):
+        """
+        Run until should_stop() returns True or a finite source is exhausted, then drain.
+        """
+        audio_q = asyncio.Queue(self.queue_size)
+        stt_q = asyncio.Queue(self.queue_size)
+        text_q = asyncio.Queue(self.queue_size)
+        stages = [
+            asyncio.create_task(self._stage("pitch", self._pitch, audio_q, stt_q)),
+            asyncio.create_task(self._stage("transcribe", self._transcribe, stt_q, text_q)),
+            asyncio.create_task(self._stage("analyze", self._analyze, text_q, None)),
+        ]
+        self.source.start(self.ring.write)
+        try:
+            await self._produce(audio_q, should_stop)
+        finally:
+            self.source.stop()
+        await asyncio.gather(*stages)
+        return self.latency_report()
+
+    async def _produce(self, outbox, should_stop):
+        seq = itertools.count()
+
+        async def put(audio):
+            # Blocks while downstream queues are full (backpressure)
+            await outbox.put({"audio": audio, "captured_at": time.perf_counter(), "seq": next(seq)})
+
+        while not should_stop():
+            if self.segmenter is not None and len(self.ring):
+                # Only speech goes downstream, one utterance at a time
+                for utterance in self.segmenter.push(self.ring.read(len(self.ring))):
+                    await put(utterance)
+            elif self.segmenter is None and len(self.ring) >= self.chunk_samples:
+                await put(self.ring.read(self.chunk_samples))
+            elif self.source.finished:
+                break
+            else:
+                await asyncio.sleep(0.02)
+        if self.segmenter is not None:
+            # End the utterance still in progress
+            for utterance in self.segmenter.push(self.ring.read(len(self.ring))) + self.segmenter.flush():
+                await put(utterance)
+        else:
+            # Flush the partial tail of a finite source
+            tail = self.ring.read(len(self.ring))
+            if tail.size >= self.samplerate // 2:
+                await put(tail)
+        await outbox.put(None)
+
+    async def _stage(self, name, fn, inbox, outbox):
+        loop = asyncio.get_running_loop()
+        while True:
+            chunk = await inbox.get()
+            if chunk is None:
+                if outbox is not None:
+                    await outbox.put(None)
+                return
+            start = time.perf_counter()
+            try:
+                chunk = await loop.run_in_executor(None, fn, chunk)
+            except Exception as e:
+                # Drop the chunk but keep the stage alive so upstream queues keep draining
+                print(f"⚠️ {name} stage failed: {e}")
+                self._emit(chunk, {"type": "error", "stage": name, "error": str(e)})
+                chunk = None
+            self._record(name, time.perf_counter() - start)
+            if chunk is not None and outbox is not None:
+                await outbox.put(chunk)
+
+    def _pitch(self, chunk):
+        chunk["pitch"] = extract_prosody(chunk["audio"], self.samplerate)
+        self._emit(chunk, {"type": "prosody", "prosody": chunk["pitch"]})
+        return chunk
+
+    def _transcribe(self, chunk):
+        with span("transcribe"):
+            chunk["text"] = self.transcribe(chunk["audio"])
+        self._emit(chunk, {"type": "transcript", "text": chunk["text"]})
+        # Silent chunks stop here
+        return chunk if chunk["text"] else None
+
+    def _analyze(self, chunk):
+        if self.emit is None:
+            self.handle_text(chunk["text"], chunk["pitch"])
+        else:
+            self.handle_text(chunk["text"], chunk["pitch"], lambda event: self._emit(chunk, event))
+        self._record("end_to_end", time.perf_counter() - chunk["captured_at"])
+
+    def _record(self, stage, seconds):
+        self.latencies[stage].append(seconds)
+        self.counts[stage] += 1
+
+    def _emit(self, chunk, event):
+        if self.emit is not None:
+            self.emit({**event, "seq": chunk["seq"]})
+
+    def latency_report(self):
+        """
+        Returns count, mean, p50 and max latency in ms per stage, plus dropped samples (and, with
+        a segmenter, the fraction of audio skipped as silence). The count covers the whole run;
+        the latencies the last LATENCY_WINDOW chunks of each stage.
+        """
+        report = {}
+        for stage, values in self.latencies.items():
+            values = np.asarray(values) * 1000.0
+            report[stage] = {
+                "count": self.counts[stage],
+                "mean_ms": float(values.mean()) if values.size else None,
+                "p50_ms": float(np.median(values)) if values.size else None,
+                "max_ms": float(values.max()) if values.size else None,
+            }
+        report["dropped_samples"] = self.ring.dropped
+        if self.segmenter is not None:
+            report["skipped_ratio"] = self.segmenter.skipped_ratio
+        return report
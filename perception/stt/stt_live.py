@@ -1,14 +1,9 @@
-
 # stt/stt_live.py
-import sounddevice as sd
-import requests
-import time
-import wave
-import numpy as np
-import asyncio
-import os
-import librosa
-from config import API_KEY   # import from root config
+from instrumentation import span
+from .pitch import extract_prosody
+from .stream import MicrophoneSource, StreamingPipeline
+from .backends import default_backend
+from .vad import UtteranceSegmenter
 
 stop_stream = False
 
@@ -16,76 +11,42 @@ def record_audio(duration=5):
     """
     Record audio from microphone for given duration
     """
+    # Imported on first use: loading PortAudio is slow and fails on headless servers
+    import sounddevice as sd
     fs = 16000
-    recording = sd.rec(int(duration * fs), samplerate=fs, channels=1, dtype='int16')
-    sd.wait()
+    with span("record"):
+        recording = sd.rec(int(duration * fs), samplerate=fs, channels=1, dtype='int16')
+        sd.wait()
     return recording
 
-def save_wav(data, filename):
+def extract_pitch(source):
     """
-    Save numpy array to wav file
+    Extract pitch (fundamental frequency) from a WAV file path or an in-memory sample buffer
+    Returns average pitch in Hz or None if pitch not found
     """
-    with wave.open(filename, 'wb') as wf:
-        wf.setnchannels(1)
-        wf.setsampwidth(2)
-        wf.setframerate(16000)
-        wf.writeframes(data.tobytes())
+    if isinstance(source, str):
+        # librosa pulls in numba/scipy, so only pay for it when a file is actually read
+        import librosa
+        source, _ = librosa.load(source, sr=16000)
+    prosody = extract_prosody(source)
+    return prosody["mean"] if prosody else None
 
-def extract_pitch(filename):
+def transcribe_audio(audio, backend=None):
     """
-    Extract pitch (fundamental frequency) from audio file using librosa
-    Returns average pitch in Hz or None if pitch not found
+    Transcribe a WAV file path, WAV bytes or int16 samples with the configured STT backend
     """
-    y, sr = librosa.load(filename, sr=16000)
-    pitches, magnitudes = librosa.piptrack(y=y, sr=sr)
-    pitch_values = []
-
-    for i in range(pitches.shape[1]):
-        index = magnitudes[:, i].argmax()
-        pitch = pitches[index, i]
-        if pitch > 0:
-            pitch_values.append(pitch)
+    with span("transcribe"):
+        return (backend or default_backend()).transcribe(audio)
 
-    if pitch_values:
-        avg_pitch = float(np.mean(pitch_values))
-        return avg_pitch
-    else:
-        return None
-
-def transcribe_audio(filename):
+async def start_stt(handle_text, source=None, chunk_seconds=5, backend=None, vad=True):
     """
-    Upload audio to AssemblyAI and get transcript
+    Stream audio from the microphone (or a FileSource) through pitch, transcription and
+    handle_text(text, pitch) until stop_stream is set. Capture never pauses while earlier
+    chunks are processed. With vad, audio is cut into utterances at pauses and silence never
+    reaches transcription; without it, into fixed chunk_seconds windows.
+    Returns the per-stage latency report.
     """
-    headers = {"authorization": API_KEY}
-    with open(filename, 'rb') as f:
-        response = requests.post("https://api.assemblyai.com/v2/upload", headers=headers, data=f)
-    upload_url = response.json()["upload_url"]
-
-    transcript_request = {
-        "audio_url": upload_url
-    }
-    response = requests.post("https://api.assemblyai.com/v2/transcript", json=transcript_request, headers=headers)
-    transcript_id = response.json()["id"]
-
-    while True:
-        response = requests.get(f"https://api.assemblyai.com/v2/transcript/{transcript_id}", headers=headers)
-        data = response.json()
-        if data["status"] == "completed":
-            return data["text"]
-        elif data["status"] == "error":
-            raise Exception(data["error"])
-        time.sleep(1)
-
-async def start_stt(handle_text):
-    global stop_stream
-    while not stop_stream:
-        audio = record_audio(5)
-        save_wav(audio, "temp.wav")
-        pitch = extract_pitch("temp.wav")
-        text = transcribe_audio("temp.wav")
-        if text:
-            handle_text(text, pitch)
-        await asyncio.sleep(1)
-    # Clean up temp file
-    if os.path.exists("temp.wav"):
-        os.remove("temp.wav")
+    backend = backend or default_backend()
+    pipeline = StreamingPipeline(handle_text, source or MicrophoneSource(), backend.transcribe, chunk_seconds,
+                                 segmenter=UtteranceSegmenter() if vad else None)
+    return await pipeline.run(lambda: stop_stream)
@@ -0,0 +1,136 @@
+# stt/transcription.py
+import asyncio
+import threading
+import aiohttp
+from instrumentation import count, span
+
+ASSEMBLYAI_URL = "https://api.assemblyai.com/v2"
+
+class TranscriptionError(Exception):
+    pass
+
+class AsyncTranscriptionClient:
+    """
+    aiohttp client for the AssemblyAI upload/transcript API.
+    One session (and its connection pool) is shared by every request made through the client.
+    Status polling starts fast and backs off exponentially, and every transcription is bounded
+    by an overall deadline. Cancelling the awaiting task abandons the transcription.
+    Args:
+        api_key (str): AssemblyAI API key.
+        base_url (str, optional): API root. Defaults to the public AssemblyAI endpoint.
+        max_connections (int, optional): Connection pool size. Defaults to 16.
+        poll_initial (float, optional): First poll delay in seconds. Defaults to 0.25.
+        poll_max (float, optional): Upper bound of the poll delay. Defaults to 3.0.
+        poll_factor (float, optional): Poll delay growth per attempt. Defaults to 1.5.
+        timeout (float, optional): Overall deadline per transcription in seconds. Defaults to 120.
+    """
+    def __init__(self, api_key, base_url=ASSEMBLYAI_URL, max_connections=16,
+                 poll_initial=0.25, poll_max=3.0, poll_factor=1.5, timeout=120.0):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.max_connections = max_connections
+        self.poll_initial = poll_initial
+        self.poll_max = poll_max
+        self.poll_factor = poll_factor
+        self.timeout = timeout
+        self._session = None
+
+    def _get_session(self):
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections),
+                headers={"authorization": self.api_key},
+            )
+        return self._session
+
+    async def upload(self, data) -> str:
+        """
+        Upload audio bytes (or a file path) and return the upload URL.
+        """
+        if isinstance(data, str):
+            with open(data, 'rb') as f:
+                data = f.read()
+        async with self._get_session().post(f"{self.base_url}/upload", data=data) as response:
+            response.raise_for_status()
+            return (await response.json())["upload_url"]
+
+    async def transcribe(self, data, timeout=None) -> str:
+        """
+        Upload audio and wait for its transcript.
+        Args:
+            data (bytes | str): Audio bytes or a file path.
+            timeout (float, optional): Overall deadline; defaults to the client's timeout.
+        Raises:
+            TranscriptionError: If the service reports an error.
+            asyncio.TimeoutError: If the deadline passes first.
+        """
+        return await asyncio.wait_for(self._transcribe(data), timeout or self.timeout)
+
+    async def _transcribe(self, data):
+        session = self._get_session()
+        with span("transcribe.upload"):
+            upload_url = await self.upload(data)
+            async with session.post(f"{self.base_url}/transcript", json={"audio_url": upload_url}) as response:
+                response.raise_for_status()
+                transcript_id = (await response.json())["id"]
+
+        # Time spent waiting for the service to finish, including every status request
+        with span("transcribe.poll"):
+            delay = self.poll_initial
+            while True:
+                count("transcribe.polls")
+                async with session.get(f"{self.base_url}/transcript/{transcript_id}") as response:
+                    response.raise_for_status()
+                    result = await response.json()
+                if result["status"] == "completed":
+                    return result["text"]
+                elif result["status"] == "error":
+                    raise TranscriptionError(result["error"])
+                await asyncio.sleep(delay)
+                delay = min(delay * self.poll_factor, self.poll_max)
+
+    async def transcribe_many(self, items, concurrency=None) -> list:
+        """
+        Transcribe several audio inputs concurrently, returning transcripts in input order.
+        """
+        semaphore = asyncio.Semaphore(concurrency or self.max_connections)
+
+        async def one(data):
+            async with semaphore:
+                return await self.transcribe(data)
+        return await asyncio.gather(*(one(data) for data in items))
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+class BackgroundLoop:
+    """
+    Event loop on a daemon thread, so synchronous callers (Flask workers, the CLI) can share
+    one AsyncTranscriptionClient and its connection pool.
+    """
+    def __init__(self):
+        self._loop = None
+        self._lock = threading.Lock()
+
+    def run(self, coro, timeout=None):
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, daemon=True).start()
+        future = asyncio.run_coroutine_threadsafe(coro, self._loop)
+        try:
+            return future.result(timeout)
+        except BaseException:
+            # Caller gave up (timeout or interrupt): cancel the transcription on the loop too
+            future.cancel()
+            raise
+
+background_loop = BackgroundLoop()
@@ -0,0 +1,160 @@
+# stt/vad.py
+from collections import deque
+import numpy as np
+from .pitch import SAMPLE_RATE
+
+class VoiceActivityDetector:
+    """
+    Energy and pitch based speech detector for int16 buffers (as returned by record_audio).
+    A frame is speech when its energy is margin_db above the running noise floor (and above
+    floor_db) and it is voiced, i.e. its normalized autocorrelation peaks in the speaking pitch
+    range; frames louder still count as speech without voicing (fricatives, plosives).
+    Args:
+        sr (int, optional): Sample rate. Defaults to 16000.
+        frame_ms (int, optional): Frame length. Defaults to 30.
+        margin_db (float, optional): Energy above the noise floor needed for speech. Defaults to 10.
+        floor_db (float, optional): Energy (dBFS) below which a frame is never speech. Defaults to -50.
+        voicing (float, optional): Autocorrelation peak needed to count as voiced. Defaults to 0.35.
+        fmin, fmax (float, optional): Pitch range in Hz. Defaults to 60 and 400.
+    """
+    def __init__(self, sr=SAMPLE_RATE, frame_ms=30, margin_db=10.0, floor_db=-50.0, voicing=0.35,
+                 fmin=60.0, fmax=400.0):
+        self.sr = sr
+        self.frame = int(sr * frame_ms / 1000)
+        self.margin_db = margin_db
+        self.floor_db = floor_db
+        self.voicing = voicing
+        self.min_lag = int(sr / fmax)
+        self.max_lag = min(int(sr / fmin), self.frame - 1)
+        self._nfft = 1 << (2 * self.frame - 1).bit_length()
+        self.noise_db = None
+
+    def frames(self, samples) -> np.ndarray:
+        """
+        Whole frames of a buffer as a (n_frames, frame) view; a partial tail is left out.
+        """
+        samples = np.asarray(samples).reshape(-1)
+        n = samples.size // self.frame
+        return samples[:n * self.frame].reshape(n, self.frame)
+
+    def classify(self, frames) -> np.ndarray:
+        """
+        Speech flag per frame, for all frames at once; updates the noise floor.
+        """
+        if len(frames) == 0:
+            return np.zeros(0, dtype=bool)
+        x = frames.astype(np.float32) / 32768.0
+        x -= x.mean(axis=1, keepdims=True)
+        energy_db = 10.0 * np.log10(np.mean(x * x, axis=1) + 1e-10)
+        if self.noise_db is None:
+            # A first buffer that is all speech must not set the floor at speech level
+            self.noise_db = min(float(np.percentile(energy_db, 10)), self.floor_db - self.margin_db)
+        threshold = max(self.noise_db + self.margin_db, self.floor_db)
+
+        # Normalized autocorrelation from the power spectrum, one FFT per frame
+        spectrum = np.fft.rfft(x, self._nfft, axis=1)
+        ac = np.fft.irfft(spectrum.real ** 2 + spectrum.imag ** 2, self._nfft, axis=1)
+        peak = ac[:, self.min_lag:self.max_lag + 1].max(axis=1) / np.maximum(ac[:, 0], 1e-10)
+        speech = (energy_db > threshold) & ((peak > self.voicing) | (energy_db > threshold + self.margin_db))
+
+        # Track the noise floor on non-speech frames; it falls fast and rises slowly
+        quiet = energy_db[~speech]
+        if quiet.size:
+            level = float(np.median(quiet))
+            rate = 0.5 if level < self.noise_db else 0.05
+            self.noise_db += rate * (level - self.noise_db)
+        return speech
+
+    def is_speech(self, samples, min_speech=0.1) -> bool:
+        """
+        Whether a buffer holds at least min_speech seconds of speech frames.
+        """
+        return int(self.classify(self.frames(samples)).sum()) * self.frame >= min_speech * self.sr
+
+class UtteranceSegmenter:
+    """
+    Cuts a stream of int16 samples into utterances at speech boundaries and drops the silence
+    between them. push() takes blocks of any size and returns the utterances completed so far;
+    an utterance ends after min_silence seconds without speech, or at max_utterance seconds.
+    Args:
+        vad (VoiceActivityDetector, optional): Frame classifier. Defaults to a new one.
+        min_speech (float, optional): Speech needed to start an utterance. Defaults to 0.1.
+        min_silence (float, optional): Pause that ends an utterance. Defaults to 0.5.
+        pad (float, optional): Audio kept before and after the speech. Defaults to 0.15.
+        max_utterance (float, optional): Longest utterance. Defaults to 15.
+        max_segments (int, optional): Most recent utterance spans kept in `segments`; None keeps
+            all of them (e.g. to score a whole recording). Defaults to 1000.
+    """
+    def __init__(self, vad=None, min_speech=0.1, min_silence=0.5, pad=0.15, max_utterance=15.0,
+                 max_segments=1000):
+        self.vad = vad or VoiceActivityDetector()
+        frame_seconds = self.vad.frame / self.vad.sr
+        self.min_speech = max(1, round(min_speech / frame_seconds))
+        self.min_silence = max(1, round(min_silence / frame_seconds))
+        self.pad = round(pad / frame_seconds)
+        self.max_frames = round(max_utterance / frame_seconds)
+        self.segments = deque(maxlen=max_segments)  # (start, end) sample offsets of utterances returned
+        self.frames_seen = 0
+        self.frames_kept = 0
+        self._tail = np.zeros(0, dtype=np.int16)
+        self._preroll = deque(maxlen=self.min_speech + self.pad)
+        self._utterance = None
+        self._start = 0
+        self._run = 0
+        self._silence = 0
+
+    def push(self, samples) -> list:
+        samples = np.concatenate([self._tail, np.asarray(samples, dtype=np.int16).reshape(-1)])
+        frames = self.vad.frames(samples)
+        self._tail = samples[frames.size:]
+        done = []
+        for frame, speech in zip(frames, self.vad.classify(frames)):
+            index = self.frames_seen
+            self.frames_seen += 1
+            if self._utterance is None:
+                self._preroll.append(frame)
+                self._run = self._run + 1 if speech else 0
+                if self._run >= self.min_speech:
+                    self._utterance = list(self._preroll)
+                    self._start = index + 1 - len(self._preroll)
+                    self._silence = 0
+                continue
+            self._utterance.append(frame)
+            self._silence = 0 if speech else self._silence + 1
+            if self._silence >= self.min_silence or len(self._utterance) >= self.max_frames:
+                done.append(self._finish())
+        return done
+
+    def flush(self) -> list:
+        """
+        End of stream: returns the utterance in progress, if any.
+        """
+        return [self._finish()] if self._utterance is not None else []
+
+    def _finish(self):
+        # Keep pad frames of the trailing pause
+        keep = len(self._utterance) - max(0, self._silence - self.pad)
+        utterance = np.concatenate(self._utterance[:keep])
+        self.segments.append((self._start * self.vad.frame, (self._start + keep) * self.vad.frame))
+        self.frames_kept += keep
+        self._utterance = None
+        self._preroll.clear()
+        self._run = 0
+        self._silence = 0
+        return utterance
+
+    @property
+    def skipped_ratio(self) -> float:
+        """
+        Fraction of the audio seen so far that was dropped as silence.
+        """
+        return 1.0 - self.frames_kept / self.frames_seen if self.frames_seen else 0.0
+
+def speech_only(samples, **options):
+    """
+    The speech of a whole buffer (e.g. from record_audio) with the pauses between utterances
+    removed, or None if nothing was said. Options are those of UtteranceSegmenter.
+    """
+    segmenter = UtteranceSegmenter(**options)
+    utterances = segmenter.push(samples) + segmenter.flush()
+    return np.concatenate(utterances) if utterances else None
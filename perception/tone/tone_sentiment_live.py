@@ -1,9 +1,6 @@
-from textblob import TextBlob
-from nltk.sentiment.vader import SentimentIntensityAnalyzer
-import nltk 
-
-# Initialize VADER
-sia = SentimentIntensityAnalyzer()
+from typing import NamedTuple
+from perception.analysis import AnalysisContext
+from instrumentation import timed
 
 # Expanded emotion lexicon for keyword-based detection including negations and dislike-related words
 
@@ -43,39 +40,100 @@ emotion_lexicon = {
 
 question_words = ["who", "what", "when", "where", "why", "how", "is", "are", "do", "does", "did", "can", "could", "will", "would", "should"]
 
-def detect_emotions(text: str) -> list:
+# Simple negation words
+negations = {"not", "no", "never", "n't", "dont", "don't", "didn't", "doesn't", "isn't", "wasn't", "aren't", "cannot"}
+
+# Number of tokens before a keyword that are checked for a negation
+NEGATION_WINDOW = 3
+
+# Minimum fraction of voiced frames before prosody stats influence the mood
+MIN_VOICED_RATIO = 0.1
+
+class EmotionMatch(NamedTuple):
+    emotion: str
+    keyword: str
+    start: int
+    end: int
+    negated: bool
+
+class EmotionMatcher:
+    """
+    Precompiled keyword matcher for the emotion lexicon.
+    Single-word and multi-word keywords ("taken aback") are compiled into a token trie once,
+    so matching is a single pass over the tokens regardless of the lexicon size.
+    """
+    def __init__(self, lexicon: dict, negation_words=negations, window: int = NEGATION_WINDOW):
+        self.negation_words = frozenset(negation_words)
+        self.window = window
+        self.max_phrase_len = 1
+        # Root of the trie doubles as the token -> node index; the None key of a node
+        # holds the (emotion, keyword) pairs ending at that node.
+        self.index = {}
+        for emotion, keywords in lexicon.items():
+            for keyword in keywords:
+                words = keyword.lower().split()
+                if not words:
+                    continue
+                node = self.index
+                for word in words:
+                    node = node.setdefault(word, {})
+                node.setdefault(None, []).append((emotion, keyword))
+                self.max_phrase_len = max(self.max_phrase_len, len(words))
+
+    def find(self, tokens: list) -> list:
+        """
+        Return every keyword occurrence in the (lowercased) tokens, in order of appearance.
+        A match is negated when a negation word occurs within the window before it.
+        """
+        matches = []
+        index = self.index
+        negation_words = self.negation_words
+        last_negation = -len(tokens) - self.window - 1
+        for i, token in enumerate(tokens):
+            node = index.get(token)
+            if node is not None:
+                negated = i - last_negation <= self.window
+                j = i
+                while True:
+                    for emotion, keyword in node.get(None, ()):
+                        matches.append(EmotionMatch(emotion, keyword, i, j + 1, negated))
+                    j += 1
+                    if j >= len(tokens):
+                        break
+                    node = node.get(tokens[j])
+                    if node is None:
+                        break
+            if token in negation_words:
+                last_negation = i
+        return matches
+
+# Compiled once at import and shared by every call to detect_emotions
+emotion_matcher = EmotionMatcher(emotion_lexicon)
+
+def detect_emotions(text: str, ctx: AnalysisContext | None = None) -> list:
     """
     Detect emotions based on keyword matching, negation handling, and polarity score.
     More sensitive to negative and positive emotions using polarity thresholds.
     """
-    tokens = nltk.word_tokenize(text.lower())
+    ctx = ctx or AnalysisContext(text)
+    tokens = ctx.lower_tokens
     detected = set()
 
-    # Simple negation words
-    negations = {"not", "no", "never", "n't", "dont", "don't", "didn't", "doesn't", "isn't", "wasn't", "aren't", "cannot"}
-
     # Keyword-based detection with negation handling
-    for emotion, keywords in emotion_lexicon.items():
-        for word in keywords:
-            if word in tokens:
-                # Check for negation within 3 words before the keyword
-                word_index = tokens.index(word)
-                window_start = max(0, word_index - 3)
-                window = tokens[window_start:word_index]
-                if any(neg in window for neg in negations):
-                    # If negation found, invert emotion if applicable
-                    if emotion == "happy":
-                        detected.add("sad")
-                    elif emotion == "sad":
-                        detected.add("happy")
-                    else:
-                        detected.add(emotion)
-                else:
-                    detected.add(emotion)
+    for match in emotion_matcher.find(tokens):
+        if match.negated:
+            # If negation found, invert emotion if applicable
+            if match.emotion == "happy":
+                detected.add("sad")
+            elif match.emotion == "sad":
+                detected.add("happy")
+            else:
+                detected.add(match.emotion)
+        else:
+            detected.add(match.emotion)
 
     # Polarity-based detection enhancement
-    blob = TextBlob(text)
-    sentiment = blob.sentiment
+    sentiment = ctx.sentiment
     polarity = sentiment.polarity  # type: ignore
 
     # If no keywords detected, use polarity to infer emotion
@@ -93,33 +151,36 @@ def detect_emotions(text: str) -> list:
         elif polarity < -0.5:
             detected.add("sad")
 
-    return list(detected) if detected else ["neutral"]
+    # Sorted so results are identical across processes regardless of hash seed
+    return sorted(detected) if detected else ["neutral"]
 
-def is_questioning(text: str) -> bool:
+def is_questioning(text: str, ctx: AnalysisContext | None = None) -> bool:
     """
     Detect if the text is a question.
     """
     if '?' in text:
         return True
-    tokens = nltk.word_tokenize(text.lower())
+    tokens = (ctx or AnalysisContext(text)).lower_tokens
     return any(word in tokens for word in question_words)
 
-def analyze_tone(text: str, pitch: float | None  = None) -> dict:
+@timed("tone")
+def analyze_tone(text: str, pitch: float | dict | None  = None, ctx: AnalysisContext | None = None) -> dict:
     """
     Enhanced tone & sentiment analysis for therapeutic context.
-    Accepts optional pitch (Hz) to enhance tone sensitivity.
+    Accepts optional pitch (Hz), or the prosody stats from extract_prosody, to enhance tone sensitivity.
+    Pass the same AnalysisContext to nlu_process to reuse its tokens and tags.
     """
-    blob = TextBlob(text)
-    sentiment = blob.sentiment
+    ctx = ctx or AnalysisContext(text)
+    sentiment = ctx.sentiment
     polarity = sentiment.polarity  # type: ignore
     subjectivity = sentiment.subjectivity  # type: ignore
 
     # VADER compound score
-    vader_scores = sia.polarity_scores(text)
+    vader_scores = ctx.vader_scores
     compound = vader_scores['compound']
 
     # Detect emotions
-    emotions = detect_emotions(text)
+    emotions = detect_emotions(text, ctx)
 
     # Overall mood based on polarity
     if polarity > 0:
@@ -130,7 +191,13 @@ def analyze_tone(text: str, pitch: float | None  = None) -> dict:
         overall_mood = "neutral"
 
     # Questioning detection
-    questioning = is_questioning(text)
+    questioning = is_questioning(text, ctx)
+
+    # Prosody stats carry the mean pitch plus how much of the utterance was voiced
+    prosody = pitch if isinstance(pitch, dict) else None
+    if prosody is not None:
+        # Too few voiced frames make the pitch estimate unreliable
+        pitch = prosody["mean"] if prosody["voiced_ratio"] >= MIN_VOICED_RATIO else None
 
     # Enhance mood and emotions based on pitch if provided
     if pitch is not None:
@@ -158,5 +225,26 @@ def analyze_tone(text: str, pitch: float | None  = None) -> dict:
         "emotions": emotions,
         "overall_mood": overall_mood,
         "is_questioning": questioning,
-        "pitch": pitch
+        "pitch": pitch,
+        "prosody": prosody
     }
+
+def _analyze_tone_chunk(items: list) -> list:
+    # Worker entry point for analyze_tone_batch; items are (text, pitch) pairs
+    contexts = AnalysisContext.batch([text for text, _ in items])
+    return [analyze_tone(text, pitch, ctx) for (text, pitch), ctx in zip(items, contexts)]
+
+def analyze_tone_batch(texts, pitches=None, batch_size: int = 64, workers: int | None = None):
+    """
+    Stream analyze_tone results for many texts, in input order.
+    Texts are POS tagged per chunk and chunks are spread over a process pool whose workers
+    load the NLTK models once. Results are identical to calling analyze_tone per text.
+    Args:
+        texts (iterable): Transcripts to analyze; consumed lazily.
+        pitches (iterable, optional): Pitch per transcript, aligned with texts.
+        batch_size (int, optional): Transcripts per worker task. Defaults to 64.
+        workers (int, optional): Worker processes. Defaults to the CPU count; 1 runs in-process.
+    """
+    from perception.batch import run_batched
+    items = zip(texts, pitches) if pitches is not None else ((text, None) for text in texts)
+    return run_batched(_analyze_tone_chunk, items, batch_size, workers)
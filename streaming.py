@@ -0,0 +1,147 @@
+import asyncio
+import json
+import threading
+import numpy as np
+import websockets
+from perception.stt.pitch import SAMPLE_RATE, extract_prosody
+from perception.stt.stream import PushSource, StreamingPipeline
+from perception.tone.tone_sentiment_live import analyze_tone
+from perception.nlu.nlu_live import nlu_process
+from perception.analysis import AnalysisContext
+
+# Longest chunk a client may ask for; bounds the audio buffered per connection
+MAX_CHUNK_SECONDS = 30.0
+
+class StreamingServer:
+    """
+    WebSocket front end streaming analysis events while the client is still sending audio.
+
+    Protocol: the client sends {"type": "start", "user_id", "session_id"} (and optionally
+    "chunk_seconds", at most MAX_CHUNK_SECONDS) as text (answered with
+    "ready"), then raw 16 kHz mono int16 little-endian PCM as binary messages, then
+    {"type": "stop"}. Audio is cut into chunk_seconds chunks; for every chunk the server pushes, as each stage completes:
+    "prosody", "transcript", "tone", "entities" (the full NLU result) and "stored", each with the
+    chunk's "seq". A stage that fails sends "error" instead. After stop, the remaining audio is
+    processed and the server sends "done" with the stage latency report.
+    Args:
+        perception (PerceptionModule): Provides the STT backend.
+        store (callable, optional): store(user_id, session_id, result) saving one analysis.
+        chunk_seconds (float, optional): Audio per transcribed chunk. Defaults to 2.
+    """
+    def __init__(self, perception, store=None, chunk_seconds=2.0):
+        self.perception = perception
+        self.store = store
+        self.chunk_seconds = chunk_seconds
+
+    async def handler(self, websocket):
+        try:
+            start = json.loads(await websocket.recv())
+        except (ValueError, TypeError):
+            start = {}
+        if not isinstance(start, dict) or start.get("type") != "start":
+            await websocket.send(json.dumps({"type": "error", "error": "expected a start message"}))
+            return
+        user_id = start.get("user_id") or "default"
+        session_id = start.get("session_id") or user_id
+        try:
+            chunk_seconds = min(float(start.get("chunk_seconds") or self.chunk_seconds), MAX_CHUNK_SECONDS)
+        except (TypeError, ValueError):
+            chunk_seconds = self.chunk_seconds
+        await websocket.send(json.dumps({"type": "ready", "sample_rate": SAMPLE_RATE, "chunk_seconds": chunk_seconds}))
+
+        loop = asyncio.get_running_loop()
+        events = asyncio.Queue()
+
+        def emit(event):
+            # Called from pipeline worker threads
+            loop.call_soon_threadsafe(events.put_nowait, event)
+
+        def handle_text(text, prosody, emit):
+            ctx = AnalysisContext(text)
+            tone = analyze_tone(text, prosody, ctx)
+            emit({"type": "tone", "tone": tone})
+            result = nlu_process(text, tone, ctx)
+            emit({"type": "entities", "result": result})
+            if self.store is not None:
+                self.store(user_id, session_id, result)
+                emit({"type": "stored", "user_id": user_id, "session_id": session_id})
+
+        source = PushSource()
+        pipeline = StreamingPipeline(handle_text, source, self.perception.stt_backend.transcribe,
+                                     chunk_seconds=chunk_seconds, emit=emit)
+        running = asyncio.create_task(pipeline.run())
+        sender = asyncio.create_task(self._send(websocket, events))
+        try:
+            async for message in websocket:
+                if isinstance(message, bytes):
+                    samples = np.frombuffer(message, dtype="<i2", count=len(message) // 2)
+                    # Frames larger than the ring are pushed in ring-sized pieces
+                    for start in range(0, samples.size, pipeline.ring.capacity):
+                        piece = samples[start:start + pipeline.ring.capacity]
+                        # Stop reading while the pipeline is behind, so a client sending faster
+                        # than real time is slowed down instead of having its audio overwritten
+                        while pipeline.ring.capacity - len(pipeline.ring) < piece.size and not running.done():
+                            await asyncio.sleep(0.01)
+                        source.push(piece)
+                    continue
+                try:
+                    control = json.loads(message)
+                except ValueError:
+                    control = None
+                if not isinstance(control, dict):
+                    emit({"type": "error", "error": "expected a JSON object control message"})
+                elif control.get("type") == "stop":
+                    break
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            source.close()
+            report = await running
+            events.put_nowait({"type": "done", "latency": report})
+            await sender
+
+    async def _send(self, websocket, events):
+        while True:
+            event = await events.get()
+            try:
+                await websocket.send(json.dumps(event, default=str))
+            except Exception:
+                # Client went away; keep draining until the pipeline is done
+                pass
+            if event["type"] == "done":
+                return
+
+    async def serve(self, host="127.0.0.1", port=8765, ready=None):
+        async with websockets.serve(self.handler, host, port) as server:
+            if ready is not None:
+                ready(server)
+            await asyncio.Future()
+
+    def warmup(self):
+        # librosa imports and compiles its pitch tracker on first use (seconds), which would
+        # otherwise delay the first client's first event
+        extract_prosody(np.zeros(SAMPLE_RATE // 2, dtype=np.int16))
+
+    def start(self, host="127.0.0.1", port=8765):
+        """
+        Warm up, then serve on a daemon thread with its own event loop; returns the bound port.
+        """
+        self.warmup()
+        bound = []
+        started = threading.Event()
+
+        def ready(server):
+            bound.append(next(iter(server.sockets)).getsockname()[1])
+            started.set()
+
+        def run():
+            try:
+                asyncio.run(self.serve(host, port, ready))
+            except Exception as e:  # e.g. the port is taken
+                bound.append(e)
+                started.set()
+        threading.Thread(target=run, daemon=True, name="websocket").start()
+        started.wait()
+        if isinstance(bound[0], Exception):
+            raise bound[0]
+        return bound[0]
@@ -0,0 +1,28 @@
+import os
+
+from perception.batch import AnalysisPool
+
+def _failing_initializer():
+    # Like _warm_worker without the NLTK data
+    raise LookupError("resource not found")
+
+def _pid(_):
+    return os.getpid()
+
+def test_healthy_pool_runs_tasks_in_workers():
+    pool = AnalysisPool(1, initializer=None)
+    try:
+        assert pool.submit(_pid, None).result(timeout=60) != os.getpid()
+        assert not pool.in_process and pool.restarts == 0
+    finally:
+        pool.shutdown()
+
+def test_broken_pool_is_restarted_then_falls_back_in_process():
+    pool = AnalysisPool(1, initializer=_failing_initializer, max_restarts=1)
+    try:
+        # The task is resubmitted after each break and finally runs on a thread here
+        assert pool.submit(_pid, None).result(timeout=60) == os.getpid()
+        assert pool.in_process and pool.restarts == 2
+        assert pool.submit(_pid, None).result(timeout=5) == os.getpid()
+    finally:
+        pool.shutdown()
@@ -0,0 +1,47 @@
+import io
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from perception.stt.audio import encode_wav, wav_view
+from perception.stt import backends
+from perception.stt.backends import STTBackend
+
+class EchoBackend(STTBackend):
+    # Transcript names the session encoded in the first sample, so mixed-up audio is detected
+    def transcribe(self, audio):
+        samples, _ = wav_view(audio)
+        return f"I feel hopeful about session {int(samples[0])}"
+
+def upload(session):
+    t = np.arange(16000) / 16000
+    samples = (0.3 * np.sin(2 * np.pi * 180 * t) * 32767).astype(np.int16)
+    samples[0] = session
+    return encode_wav(samples)
+
+def test_parallel_analyze_uses_no_temp_files_and_keeps_requests_apart(tmp_path, monkeypatch):
+    # Memory stores are created relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    # Restored by monkeypatch afterwards, so later tests get their own backend
+    monkeypatch.setattr(backends, "_default_backend", EchoBackend())
+    import app as app_module
+    client = app_module.app.test_client()
+    # librosa's first use imports numba, which probes its cache directory with a temp file
+    app_module.streaming.warmup()
+
+    def no_temp_files(*args, **kwargs):
+        raise AssertionError("audio path must not touch temp files")
+    monkeypatch.setattr(tempfile, "NamedTemporaryFile", no_temp_files)
+    monkeypatch.setattr(tempfile, "TemporaryFile", no_temp_files)
+    monkeypatch.setattr(tempfile, "mkstemp", no_temp_files)
+
+    def analyze(session):
+        response = client.post("/analyze", data={"audio": (io.BytesIO(upload(session)), "recording.wav")},
+                               content_type="multipart/form-data")
+        return session, response.status_code, response.get_json()
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        results = list(pool.map(analyze, range(1, 65)))
+
+    for session, status, body in results:
+        assert status == 200, body
+        assert body["perception"]["transcript"] == f"I feel hopeful about session {session}"
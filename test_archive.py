@@ -0,0 +1,78 @@
+import io
+import os
+
+import numpy as np
+import pytest
+
+from benchmarks.embeddings import HashEmbeddingFunction
+from memory import archive
+from memory.long_term_memory import store_path
+
+EMBEDDING = HashEmbeddingFunction()
+
+def open_memory(user_id, **options):
+    return archive._open_store(user_id, embedding_function=EMBEDDING, **options)
+
+def snapshot(ltm):
+    # id -> (document, metadata without the tenant, embedding)
+    pages = list(ltm.iter_all(include=("documents", "metadatas", "embeddings")))
+    return {doc_id: (page["documents"][i], {k: v for k, v in page["metadatas"][i].items() if k != "user_id"},
+                     np.asarray(page["embeddings"][i]))
+            for page in pages for i, doc_id in enumerate(page["ids"])}
+
+def assert_same(copy, original):
+    assert sorted(copy) == sorted(original)
+    for doc_id, (document, metadata, embedding) in original.items():
+        assert copy[doc_id][:2] == (document, metadata)
+        assert np.allclose(copy[doc_id][2], embedding)
+
+@pytest.fixture
+def alice(tmp_path, monkeypatch):
+    # Stores live relative to the working directory; id 3 is deleted, so only the
+    # high-water mark keeps it from being handed out again
+    monkeypatch.chdir(tmp_path)
+    with open_memory("alice") as ltm:
+        for text in ("calm about work", "anxious about exams", "relieved after the call"):
+            ltm.store({"transcript": text, "emotions": ["neutral"]}, timestamp=1000.0)
+        ltm.store("an imported note", id="7")
+        ltm.collection.delete(ids=["3"])
+        high_water = ltm.collection.metadata["next_id"]
+        memories = snapshot(ltm)
+    return memories, high_water
+
+def test_export_import_round_trip_keeps_ids_metadata_embeddings_and_high_water(alice):
+    memories, high_water = alice
+    out = io.StringIO()
+    assert archive.export_users(["alice"], out, page_size=2, open_memory=open_memory) == 3
+    out.seek(0)
+    assert archive.import_lines(out, open_memory, batch_size=2, user_id="bob") == {"bob": 3}
+
+    with open_memory("bob") as bob:
+        assert_same(snapshot(bob), memories)
+        assert int(bob.ids.allocate()) >= high_water
+
+def test_compact_store_keeps_memories_and_high_water(alice):
+    memories, high_water = alice
+    before, after, count = archive.compact_store("alice", page_size=2, embedding_function=EMBEDDING)
+    assert count == 3 and not os.path.exists(store_path("alice") + ".bak")
+    with open_memory("alice") as ltm:
+        assert_same(snapshot(ltm), memories)
+        assert int(ltm.ids.allocate()) >= high_water
+
+def test_merge_store_appends_with_new_ids(alice):
+    memories, _ = alice
+    with open_memory(None, path="./legacy") as legacy:
+        legacy.store("said before users existed", id="1")
+    assert archive.merge_store("./legacy", "alice", embedding_function=EMBEDDING) == 1
+    with open_memory("alice") as ltm:
+        merged = snapshot(ltm)
+    new = set(merged) - set(memories)
+    assert len(new) == 1 and merged[new.pop()][0] == "said before users existed"
+    assert_same({doc_id: merged[doc_id] for doc_id in memories}, memories)
+
+def test_migrate_to_shared_keeps_memories_and_high_water(alice):
+    memories, high_water = alice
+    assert archive.migrate_to_shared(["alice"], shards=4, path="./shared", embedding_function=EMBEDDING) == {"alice": 3}
+    with open_memory("alice", path="./shared", shared=True, shards=4) as ltm:
+        assert_same(snapshot(ltm), memories)
+        assert int(ltm.ids.allocate()) >= high_water
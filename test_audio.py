@@ -0,0 +1,37 @@
+import struct
+
+import numpy as np
+import pytest
+
+from perception.perception import PerceptionModule
+from perception.stt.audio import encode_wav, wav_view
+from perception.stt.backends import FakeBackend
+
+def riff(*chunks):
+    body = b"WAVE" + b"".join(chunk_id + struct.pack("<I", len(payload)) + payload for chunk_id, payload in chunks)
+    return b"RIFF" + struct.pack("<I", len(body)) + body
+
+def fmt(channels=1, sr=16000, bits=16):
+    return b"fmt ", struct.pack("<HHIIHH", 1, channels, sr, sr * channels * bits // 8, channels * bits // 8, bits)
+
+def test_wav_view_reads_samples_without_copying():
+    samples = np.arange(-5, 5, dtype=np.int16)
+    view, sr = wav_view(encode_wav(samples))
+    assert sr == 16000 and view.tolist() == samples.tolist()
+
+@pytest.mark.parametrize("data", [
+    pytest.param(riff(), id="no-chunks"),
+    pytest.param(riff((b"fmt ", b"\x01\x00\x01\x00"), (b"data", b"\0\0")), id="truncated-fmt"),
+    pytest.param(riff(fmt(channels=0), (b"data", b"\0\0")), id="no-channels"),
+    pytest.param(riff(fmt(sr=0), (b"data", b"\0\0")), id="no-sample-rate"),
+    pytest.param(riff(fmt(bits=8), (b"data", b"\0\0")), id="8-bit"),
+    pytest.param(riff((b"data", b"\0\0")), id="data-before-fmt"),
+])
+def test_malformed_wav_raises_value_error(data):
+    with pytest.raises(ValueError):
+        wav_view(data)
+
+def test_malformed_upload_is_transcribed_without_prosody():
+    perception = PerceptionModule(FakeBackend(["hello"]))
+    data = riff(fmt(channels=0), (b"data", b"\0\0"))
+    assert perception.process_audio_bytes(data) == ("hello", None)
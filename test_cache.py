@@ -0,0 +1,63 @@
+import gc
+
+import pytest
+
+from benchmarks.embeddings import HashEmbeddingFunction
+from memory.cache import RetrievalCache
+from memory.long_term_memory import LongTermMemory
+
+class RecordingEmbedding(HashEmbeddingFunction):
+    def __init__(self, dim=64):
+        super().__init__(dim)
+        self.inputs = []
+
+    def __call__(self, input):
+        self.inputs.extend(input)
+        return super().__call__(input)
+
+def test_query_is_embedded_as_given_and_cached_by_normalized_text():
+    cache = RetrievalCache()
+    embedding = RecordingEmbedding()
+    cache.embed(embedding, "  Calm about   Work ")
+    cache.embed(embedding, "calm about work")
+    assert embedding.inputs == ["  Calm about   Work "]
+    assert cache.stats()["embedding_hits"] == 1
+
+def test_embeddings_of_a_collected_function_are_never_served_to_a_new_one():
+    cache = RetrievalCache()
+    first = HashEmbeddingFunction(8)
+    address = id(first)
+    cache.embed(first, "calm")
+    del first
+    gc.collect()
+    # Allocate until a new function lands on the collected one's id()
+    alive = []
+    while len(alive) < 10000:
+        alive.append(HashEmbeddingFunction(16))
+        if id(alive[-1]) == address:
+            break
+    else:
+        pytest.skip("the collected function's id was not reused")
+    assert len(cache.embed(alive[-1], "calm")) == 16
+    assert cache.stats()["embedding_hits"] == 0
+
+def test_writes_invalidate_cached_results(tmp_path):
+    cache = RetrievalCache()
+    ltm = LongTermMemory("cached", embedding_function=HashEmbeddingFunction(), cache=cache, path=str(tmp_path))
+
+    def documents():
+        return sorted(ltm.retrieve("calm about work", n_results=10)["documents"][0])
+
+    ltm.store({"transcript": "calm about work"}, id="1")
+    assert documents() == ["calm about work"]
+    assert documents() == ["calm about work"]
+    assert cache.stats()["result_hits"] == 1
+    ltm.store({"transcript": "calm about exams"}, id="2")
+    assert documents() == ["calm about exams", "calm about work"]
+    ltm.update("1", {"transcript": "tense about work"})
+    assert documents() == ["calm about exams", "tense about work"]
+    ltm.delete("2")
+    assert documents() == ["tense about work"]
+    assert cache.stats()["result_hits"] == 1
+    assert cache.stats()["invalidations"] == 4
+    ltm.close()
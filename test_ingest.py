@@ -0,0 +1,25 @@
+from memory.ingest import IngestionQueue
+
+class PickyCollection:
+    # Rejects any add holding a "bad" document, like a batch with one unembeddable record
+    name = "picky"
+
+    def __init__(self):
+        self.documents = {}
+
+    def add(self, ids, documents, metadatas=None):
+        if "bad" in documents:
+            raise ValueError("cannot embed")
+        self.documents.update(zip(ids, documents))
+
+def test_failed_batch_is_retried_per_document():
+    ingest = IngestionQueue(max_delay=1.0)
+    collection = PickyCollection()
+    for doc_id, document in (("1", "fine"), ("2", "bad"), ("3", "also fine")):
+        ingest.put(collection, doc_id, document, {"user_id": doc_id})
+    assert ingest.flush(timeout=5)
+    ingest.close()
+
+    assert collection.documents == {"1": "fine", "3": "also fine"}
+    assert ingest.failures() == [("picky", "2", "cannot embed")]
+    assert ingest.metrics()["failed_documents"] == 1
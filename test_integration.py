@@ -0,0 +1,22 @@
+from benchmarks.embeddings import HashEmbeddingFunction
+from integration import IntegratedSystem
+from perception.stt.backends import FakeBackend
+
+class CannedPerception:
+    # Stands in for NLU so the test is about where results are stored
+    def process_text(self, text):
+        return {"transcript": text, "polarity": 0.1, "compound": 0.2, "emotions": []}
+
+def test_every_result_reaches_long_term_memory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    system = IntegratedSystem(FakeBackend(), embedding_function=HashEmbeddingFunction())
+    system.perception = CannedPerception()
+    for text in ("first thing said", "second thing said"):
+        system.process_input(text=text)
+    system.close()
+    system.close()
+
+    from memory.long_term_memory import LongTermMemory
+    ltm = LongTermMemory(embedding_function=HashEmbeddingFunction())
+    assert sorted(ltm.collection.get()["documents"]) == ["first thing said", "second thing said"]
+    ltm.close()
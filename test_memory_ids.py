@@ -0,0 +1,28 @@
+from benchmarks.embeddings import HashEmbeddingFunction
+from memory.working_memory import WorkingMemory, session_scope
+
+def test_reopened_session_keeps_its_items_when_the_old_handle_closes():
+    embedding = HashEmbeddingFunction()
+    # An evicted handle still leased while the session is opened again
+    old = WorkingMemory("test_reopen", embedding, session_id=session_scope("alice", "s1"))
+    new = WorkingMemory("test_reopen", embedding, session_id=session_scope("alice", "s1"))
+    old.store({"transcript": "said before the reopen"})
+    new.store({"transcript": "said after the reopen"})
+    old.close()
+    assert new.collection.get(where={"session_id": session_scope("alice", "s1")})["documents"] == ["said after the reopen"]
+
+def test_session_scopes_are_unambiguous():
+    assert session_scope("a:b", "c") != session_scope("a", "b:c")
+
+def test_allocated_ids_skip_past_explicit_ones(tmp_path):
+    from memory.long_term_memory import LongTermMemory
+    embedding = HashEmbeddingFunction()
+    ltm = LongTermMemory("explicit", embedding_function=embedding, path=str(tmp_path / "ltm"))
+    wm = WorkingMemory("test_explicit_ids", embedding)
+    for memory in (ltm, wm):
+        memory.store("test", "1")
+        memory.store("allocated")
+        stored = memory.collection.get(include=["documents"])
+        assert sorted(stored["documents"]) == ["allocated", "test"]
+        assert memory.collection.get(ids=["1"])["documents"] == ["test"]
+    ltm.close()
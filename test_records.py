@@ -0,0 +1,40 @@
+import chromadb
+
+from benchmarks.embeddings import HashEmbeddingFunction
+from memory.records import MemoryRecord, build_filter
+
+KNOWLEDGE = {"transcript": "I was so angry at work", "emotions": ["angry"], "entities": [["work", "LOC"]],
+             "sentiment": {"polarity": -0.6, "subjectivity": 0.9, "compound_score": -0.7}, "pitch": 190.0}
+
+def test_record_round_trips_through_chroma_metadata():
+    record = MemoryRecord.from_knowledge(KNOWLEDGE, session_id="s1", timestamp=1000.0)
+    restored = MemoryRecord.from_chroma(record.document, record.to_metadata())
+    assert restored == record
+    assert record.to_metadata()["mood"] == "negative"
+    assert record.to_metadata()["emotion_angry"] is True
+
+def test_dict_without_transcript_is_stored_as_json():
+    assert MemoryRecord.from_knowledge({"test": "test"}).document == '{"test": "test"}'
+    assert MemoryRecord.from_knowledge("plain text").document == "plain text"
+
+def test_filters_select_inside_the_store():
+    collection = chromadb.EphemeralClient().get_or_create_collection(
+        "test_record_filters", embedding_function=HashEmbeddingFunction())
+    records = {
+        "1": MemoryRecord("angry at work", ["angry"], polarity=-0.6, timestamp=100.0, session_id="a"),
+        "2": MemoryRecord("happy at home", ["happy"], polarity=0.8, timestamp=200.0, session_id="a"),
+        "3": MemoryRecord("happy again", ["happy"], polarity=0.4, timestamp=300.0, session_id="b"),
+    }
+    collection.add(ids=list(records), documents=[r.document for r in records.values()],
+                   metadatas=[r.to_metadata() for r in records.values()])
+
+    def ids(**filters):
+        return sorted(collection.get(where=build_filter(**filters))["ids"])
+
+    assert build_filter() is None
+    assert ids(mood="negative") == ["1"]
+    assert ids(emotion="happy") == ["2", "3"]
+    assert ids(since=200.0) == ["2", "3"]
+    assert ids(until=200.0) == ["1"]
+    assert ids(emotion="happy", session_id="a") == ["2"]
+    assert ids(mood="positive", where={"polarity": {"$gt": 0.5}}) == ["2"]
@@ -0,0 +1,50 @@
+import pytest
+
+from benchmarks.embeddings import HashEmbeddingFunction
+from memory.cache import RetrievalCache
+from memory.long_term_memory import LongTermMemory
+
+@pytest.fixture(params=["uncached", "cached"])
+def tenants(request, tmp_path):
+    # Two users in one shard of the shared store
+    cache = RetrievalCache() if request.param == "cached" else None
+    embedding = HashEmbeddingFunction()
+    alice, bob = (LongTermMemory(user_id, embedding_function=embedding, cache=cache, path=str(tmp_path),
+                                 shared=True, shards=1) for user_id in ("alice", "bob"))
+    assert alice.collection.name == bob.collection.name
+    alice.store({"transcript": "alice feels calm about work"}, id="1")
+    alice.store({"transcript": "alice is anxious about exams"})
+    bob.store({"transcript": "bob feels calm about work"}, id="1")
+    yield alice, bob
+    alice.close()
+    bob.close()
+
+def documents(results):
+    documents = results["documents"]
+    return sorted(documents[0] if documents and isinstance(documents[0], list) else documents)
+
+def test_retrieve_and_iteration_see_only_the_tenant(tenants):
+    alice, bob = tenants
+    assert documents(alice.retrieve("calm about work", n_results=10)) == [
+        "alice feels calm about work", "alice is anxious about exams"]
+    assert documents(bob.retrieve("calm about work", n_results=10)) == ["bob feels calm about work"]
+    assert [i for page in alice.iter_all(page_size=1) for i in page["ids"]] == ["1", "2"]
+    assert documents(bob.get_all()) == ["bob feels calm about work"]
+
+def test_caller_where_clause_is_anded_with_the_tenant(tenants):
+    alice, bob = tenants
+    # Asking for another tenant's records by metadata finds nothing
+    assert alice.find(where={"user_id": "bob"})["ids"] == []
+    assert documents(alice.retrieve("work", n_results=10, where={"user_id": "bob"})) == []
+    assert documents(bob.find(where={"$or": [{"user_id": "alice"}, {"user_id": "bob"}]})) == [
+        "bob feels calm about work"]
+
+def test_update_and_delete_touch_only_the_tenant(tenants):
+    alice, bob = tenants
+    alice.update("1", {"transcript": "alice changed her mind"})
+    bob.delete("2")  # alice's id, not bob's
+    assert documents(alice.get_all()) == ["alice changed her mind", "alice is anxious about exams"]
+    assert documents(bob.get_all()) == ["bob feels calm about work"]
+    bob.delete("1")
+    assert documents(bob.get_all()) == []
+    assert len(alice.get_all()["ids"]) == 2
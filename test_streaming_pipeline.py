@@ -0,0 +1,150 @@
+import asyncio
+import wave
+import numpy as np
+from perception.stt.stream import FileSource, PushSource, RingBuffer, StreamingPipeline
+
+def write_tone(path, seconds, freq=180.0, fs=16000):
+    t = np.arange(int(seconds * fs)) / fs
+    samples = (0.5 * np.sin(2 * np.pi * freq * t) * 32767).astype(np.int16)
+    with wave.open(path, 'wb') as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(fs)
+        wf.writeframes(samples.tobytes())
+
+def test_ring_buffer_wraps_and_drops_oldest():
+    ring = RingBuffer(5)
+    ring.write(np.arange(4))
+    assert ring.read(2).tolist() == [0, 1]
+    ring.write(np.arange(4, 9))
+    assert ring.dropped == 2
+    assert ring.read(10).tolist() == [4, 5, 6, 7, 8]
+
+def test_pipeline_replays_file_without_microphone(tmp_path):
+    path = str(tmp_path / "session.wav")
+    write_tone(path, seconds=3.25)
+    chunks = []
+    results = []
+
+    def transcribe(audio):
+        chunks.append(audio.size)
+        return f"chunk {len(chunks)}"
+
+    def handle_text(text, pitch):
+        results.append((text, pitch))
+
+    pipeline = StreamingPipeline(handle_text, FileSource(path, speed=0), transcribe, chunk_seconds=1.0)
+    report = asyncio.run(pipeline.run())
+
+    # Three full chunks plus the flushed 0.25s tail is too short and skipped
+    assert chunks == [16000, 16000, 16000]
+    assert [text for text, _ in results] == ["chunk 1", "chunk 2", "chunk 3"]
+    assert all(pitch["voiced_ratio"] > 0 for _, pitch in results)
+    assert report["end_to_end"]["count"] == 3
+    assert report["dropped_samples"] == 0
+
+def test_pipeline_keeps_a_bounded_latency_window(tmp_path, monkeypatch):
+    path = str(tmp_path / "session.wav")
+    write_tone(path, seconds=4)
+    monkeypatch.setattr(StreamingPipeline, "LATENCY_WINDOW", 2)
+    pipeline = StreamingPipeline(lambda text, pitch: None, FileSource(path, speed=0), lambda audio: "text",
+                                 chunk_seconds=1.0)
+    report = asyncio.run(pipeline.run())
+
+    assert report["end_to_end"]["count"] == 4
+    assert all(len(values) == 2 for values in pipeline.latencies.values())
+
+def test_pipeline_emits_stage_events_per_chunk():
+    t = np.arange(40000) / 16000
+    samples = (0.5 * np.sin(2 * np.pi * 180 * t) * 32767).astype(np.int16)
+    events = []
+
+    def handle_text(text, pitch, emit):
+        emit({"type": "tone", "text": text})
+
+    async def stream():
+        source = PushSource()
+        pipeline = StreamingPipeline(handle_text, source, lambda audio: f"{audio.size} samples",
+                                     chunk_seconds=1.0, emit=events.append)
+        running = asyncio.create_task(pipeline.run())
+        for start in range(0, samples.size, 1600):
+            source.push(samples[start:start + 1600])
+            await asyncio.sleep(0)
+        source.close()
+        return await running
+
+    asyncio.run(stream())
+
+    # Two full chunks and the 0.5s tail, each through every stage in order
+    for seq, size in enumerate([16000, 16000, 8000]):
+        chunk = [event["type"] for event in events if event["seq"] == seq]
+        assert chunk == ["prosody", "transcript", "tone"]
+        assert {"type": "tone", "text": f"{size} samples", "seq": seq} in events
+
+def test_pipeline_with_segmenter_transcribes_speech_only():
+    from perception.stt.vad import UtteranceSegmenter
+    fs = 16000
+    tone = lambda seconds: (0.3 * np.sin(2 * np.pi * 180 * np.arange(int(seconds * fs)) / fs) * 32767).astype(np.int16)
+    silence = lambda seconds: np.zeros(int(seconds * fs), dtype=np.int16)
+    samples = np.concatenate([silence(1), tone(1), silence(2), tone(1.5), silence(1)])
+    chunks = []
+
+    async def stream():
+        source = PushSource()
+        pipeline = StreamingPipeline(lambda text, pitch: None, source, lambda audio: chunks.append(audio.size) or "",
+                                     chunk_seconds=5.0, segmenter=UtteranceSegmenter(pad=0.15))
+        running = asyncio.create_task(pipeline.run())
+        for start in range(0, samples.size, 1600):
+            source.push(samples[start:start + 1600])
+            await asyncio.sleep(0)
+        source.close()
+        return await running
+
+    report = asyncio.run(stream())
+
+    # One call per burst, each about the burst plus 0.15s of padding on either side
+    assert len(chunks) == 2
+    assert abs(chunks[0] / fs - 1.3) < 0.1 and abs(chunks[1] / fs - 1.8) < 0.1
+    assert 0.4 < report["skipped_ratio"] < 0.6
+    assert report["dropped_samples"] == 0
+
+def test_server_accepts_frames_larger_than_the_ring_and_bad_control_messages():
+    import json
+    import websockets
+    from perception.perception import PerceptionModule
+    from perception.stt.backends import FakeBackend
+    from streaming import StreamingServer
+    server = StreamingServer(PerceptionModule(FakeBackend(("",))), chunk_seconds=1.0)
+    port = server.start(port=0)
+    # 10 s in one frame; the ring holds 4 chunks
+    t = np.arange(160000) / 16000
+    samples = (0.3 * np.sin(2 * np.pi * 180 * t) * 32767).astype("<i2")
+
+    async def session():
+        async with websockets.connect(f"ws://127.0.0.1:{port}", max_size=None) as websocket:
+            await websocket.send(json.dumps({"type": "start", "user_id": "big"}))
+            assert json.loads(await websocket.recv())["type"] == "ready"
+            await websocket.send(samples.tobytes())
+            await websocket.send("not json")
+            await websocket.send("[1, 2]")
+            await websocket.send(json.dumps({"type": "stop"}))
+            events = []
+            async for message in websocket:
+                events.append(json.loads(message))
+                if events[-1]["type"] == "done":
+                    return events
+
+    events = asyncio.run(asyncio.wait_for(session(), 60))
+    assert sum(1 for event in events if event["type"] == "error" and "seq" not in event) == 2
+    assert sum(1 for event in events if event["type"] == "transcript") == 10
+    assert events[-1]["latency"]["dropped_samples"] == 0
+
+def test_segmenter_keeps_only_the_most_recent_spans():
+    from benchmarks.bench_vad import synthetic_session
+    from perception.stt.vad import UtteranceSegmenter
+    samples, _ = synthetic_session(seconds=60, seed=1)
+    segmenter = UtteranceSegmenter(max_segments=3)
+    utterances = segmenter.push(samples) + segmenter.flush()
+    assert len(utterances) > 3
+    assert len(segmenter.segments) == 3
+    assert segmenter.segments[-1][1] - segmenter.segments[-1][0] == utterances[-1].size
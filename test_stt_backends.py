@@ -0,0 +1,15 @@
+import pytest
+
+from perception.stt.backends import FakeBackend, STTBackend, get_backend
+
+def test_incomplete_backend_fails_when_created():
+    class Incomplete(STTBackend):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+def test_fake_backend_cycles_its_transcripts():
+    backend = get_backend("fake", transcripts=("one", "two"))
+    assert isinstance(backend, FakeBackend)
+    assert [backend.transcribe(b"") for _ in range(3)] == ["one", "two", "one"]
@@ -0,0 +1,30 @@
+from memory.timeline import EVENT_DTYPE, MoodTimeline
+
+def knowledge(polarity):
+    return {"transcript": "", "polarity": polarity, "compound": polarity, "emotions": ["joy"]}
+
+def test_handles_on_one_file_keep_each_others_events(tmp_path):
+    path = str(tmp_path / "timeline.bin")
+    first, second = MoodTimeline("u", path=path), MoodTimeline("u", path=path)
+    for i, timeline in enumerate((first, second, first, second)):
+        timeline.append(knowledge(0.1 * i), timestamp=1000.0 + i)
+
+    assert len(MoodTimeline("u", path=path)) == 4
+    # Each handle also sees what the other appended
+    assert first.summary()["count"] == second.summary()["count"] == 4
+    first.close()
+    second.close()
+
+def test_append_cuts_only_a_torn_tail_and_reopens_after_close(tmp_path):
+    path = str(tmp_path / "timeline.bin")
+    timeline = MoodTimeline("u", path=path)
+    timeline.append(knowledge(0.5), timestamp=1000.0)
+    timeline.close()
+    with open(path, "ab") as f:
+        f.write(b"\0" * (EVENT_DTYPE.itemsize // 2))  # a crash mid-append
+
+    timeline.append(knowledge(-0.5), timestamp=2000.0)
+    timeline.close()
+    reopened = MoodTimeline("u", path=path)
+    assert len(reopened) == 2
+    assert list(reopened.events()["timestamp"]) == [1000.0, 2000.0]